@@ -0,0 +1,136 @@
+import time
+import random
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import tasks
+from accounts.models.account import Account
+from accounts.models.notification import Notification
+
+from back.models.domain import Domain
+from back.models.profile import Profile
+from back.models.zone import Zone
+
+
+WINDOWS = [
+    (0, 2, 'domain_expire_in_1_day', ),
+    (2, 5, 'domain_expire_in_3_days', ),
+    (4, 7, 'domain_expire_in_5_days', ),
+    (7, 30, 'domain_expire_soon', ),
+    (31, 60, 'domain_expiring', ),
+]
+
+
+def legacy_check_notify_domain_expiring(min_days_before_expire, max_days_before_expire, subject):
+    time_now = timezone.now()
+    outgoing_emails = []
+    for user in Account.users.all():
+        if not hasattr(user, 'profile'):
+            continue
+        expiring_domains = {}
+        for domain in user.domains.all():
+            if not domain.epp_id or domain.status in ['inactive', ]:
+                continue
+            time_delta = domain.expiry_date - time_now
+            if time_delta.days >= max_days_before_expire:
+                continue
+            if time_delta.days <= min_days_before_expire:
+                continue
+            expiring_domains[domain.name] = domain.expiry_date.date()
+        domains_notified = user.notifications.filter(subject=subject).values_list('domain_name', flat=True)
+        for expiring_domain in set(expiring_domains.keys()).difference(set(domains_notified)):
+            outgoing_emails.append((user, expiring_domain, expiring_domains[expiring_domain], ))
+    return outgoing_emails
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py check_notify_expiring_benchmark --domains=100000 --accounts=1000
+
+    All the fixture records are created inside a transaction which is rolled back at the end.
+    """
+
+    help = 'Compares legacy per-account loop and set-based selection of expiring domains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--domains', type=int, default=100000, dest='domains')
+        parser.add_argument('--accounts', type=int, default=1000, dest='accounts')
+        parser.add_argument('--notified', type=float, default=0.5, dest='notified')
+
+    def handle(self, domains, accounts, notified, *args, **options):
+        try:
+            with transaction.atomic():
+                self._prepare_fixture(domains, accounts, notified)
+                self._measure('legacy check_notify_domain_expiring() x%d' % len(WINDOWS), lambda: sum([
+                    len(legacy_check_notify_domain_expiring(*window)) for window in WINDOWS
+                ]))
+                self._measure('check_notify_domains_expiring()', lambda: len(
+                    tasks.check_notify_domains_expiring(dry_run=True, windows=WINDOWS)
+                ))
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _measure(self, label, func):
+        started = time.perf_counter()
+        found = func()
+        self.stdout.write('%s: %d notifications in %.3f sec\n' % (label, found, time.perf_counter() - started, ))
+
+    def _prepare_fixture(self, domains, accounts, notified):
+        started = time.perf_counter()
+        zone, _ = Zone.zones.get_or_create(name='ai')
+        prefix = 'benchmark%d' % int(time.time())
+        Account.users.bulk_create([
+            Account(email='%s_%d@zenaida.ai' % (prefix, i, ), is_active=True) for i in range(accounts)
+        ], batch_size=1000)
+        account_objects = list(Account.users.filter(email__startswith=prefix + '_'))
+        Profile.profiles.bulk_create([
+            Profile(
+                account=account_object,
+                person_name='Tester',
+                address_street='Somewhere',
+                address_city='Anywhere',
+                address_country='AI',
+                contact_voice='1234567890',
+                contact_email=account_object.email,
+            ) for account_object in account_objects
+        ], batch_size=1000)
+        time_now = timezone.now()
+        domain_objects = []
+        notification_objects = []
+        for i in range(domains):
+            account_object = account_objects[i % len(account_objects)]
+            domain_name = '%s-%d.ai' % (prefix, i, )
+            expiry_date = time_now + datetime.timedelta(days=random.randint(-30, 400), hours=random.randint(0, 23))
+            domain_objects.append(Domain(
+                name=domain_name,
+                epp_id='%s_%d' % (prefix, i, ),
+                status='active',
+                expiry_date=expiry_date,
+                create_date=expiry_date - datetime.timedelta(days=365),
+                owner=account_object,
+                zone=zone,
+            ))
+            days_left = (expiry_date - time_now).days
+            for min_days_before_expire, max_days_before_expire, subject in WINDOWS:
+                if min_days_before_expire < days_left < max_days_before_expire and random.random() < notified:
+                    notification_objects.append(Notification(
+                        account=account_object,
+                        recipient=account_object.email,
+                        subject=subject,
+                        domain_name=domain_name,
+                        status='sent',
+                    ))
+        Domain.domains.bulk_create(domain_objects, batch_size=1000)
+        Notification.notifications.bulk_create(notification_objects, batch_size=1000)
+        self.stdout.write('prepared %d accounts, %d domains and %d notifications in %.3f sec\n' % (
+            len(account_objects), len(domain_objects), len(notification_objects), time.perf_counter() - started, ))
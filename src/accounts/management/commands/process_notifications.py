@@ -7,5 +7,18 @@ class Command(BaseCommand):
 
     help = 'Sending Email/SMS notifications from the queue'
 
-    def handle(self, *args, **options):
-        notifications.process_notifications_queue()
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, dest='workers')
+        parser.add_argument('--batch_size', type=int, default=None, dest='batch_size')
+        parser.add_argument('--max_per_second', type=float, default=None, dest='max_per_second')
+        parser.add_argument('--stats', action='store_true', dest='stats', default=False)
+
+    def handle(self, workers, batch_size, max_per_second, stats, *args, **options):
+        if stats:
+            self.stdout.write('%r\n' % notifications.queue_stats())
+            return
+        notifications.process_notifications_queue(
+            workers=workers,
+            batch_size=batch_size,
+            max_per_second=max_per_second,
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_activation_email_sent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(choices=[('started', 'STARTED'), ('sending', 'SENDING'), ('sent', 'SENT'), ('failed', 'FAILED'), ('skipped', 'SKIPPED')], default='started', max_length=10),
+        ),
+    ]
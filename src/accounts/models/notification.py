@@ -15,6 +15,9 @@ class Notification(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # moment when the notification was taken by one of the workers to be sent
+    claimed_at = models.DateTimeField(null=True, blank=True, default=None)
+
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='notifications')
 
     recipient = models.CharField(max_length=255)
@@ -23,6 +26,7 @@ class Notification(models.Model):
         max_length=10,
         choices=(
             ('started', 'STARTED', ),
+            ('sending', 'SENDING', ),
             ('sent', 'SENT', ),
             ('failed', 'FAILED', ),
             ('skipped', 'SKIPPED', ),
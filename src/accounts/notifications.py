@@ -1,10 +1,16 @@
 import time
+import datetime
 import logging
+import threading
 
-from django.core.mail import EmailMultiAlternatives
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
 
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
 
 from django.utils.html import strip_tags
 
@@ -106,7 +112,27 @@ def start_email_notification_low_balance_back_end_renew(user, domains_list=[]):
     return new_notification
 
 
-def execute_email_notification(notification_object):
+def account_context(account, context_cache=None):
+    """
+    Returns person name, balance and domains details of the account.
+    When the same dictionary is passed via `context_cache` those are only prepared once per account.
+    """
+    if context_cache is not None and account.id in context_cache:
+        return context_cache[account.id]
+    result = {
+        'person_name': account.profile.person_name or 'dear Customer',
+        'account_balance': account.balance,
+        'domains_details': zdomains.list_domains_details(account),
+    }
+    if context_cache is not None:
+        context_cache[account.id] = result
+    return result
+
+
+def build_email_notification(notification_object, context_cache=None, templates_cache=None):
+    """
+    Renders email template of the notification and returns `EmailMultiAlternatives` object ready to be sent.
+    """
     from_email = settings.DEFAULT_FROM_EMAIL
     email_template = None
     context = {
@@ -119,68 +145,54 @@ def execute_email_notification(notification_object):
             'domain_name': notification_object.domain_name,
             'domain_expiry_date': notification_object.details.get('expiry_date'),
             'subject': 'AI domain is expiring',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_expire_soon':
         email_template = 'email/domain_expire_soon.html'
         context.update({
             'domain_name': notification_object.domain_name,
             'domain_expiry_date': notification_object.details.get('expiry_date'),
             'subject': 'AI domain will expire after 30 days',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_expire_in_5_days':
         email_template = 'email/domain_expire_in_5_days.html'
         context.update({
             'domain_name': notification_object.domain_name,
             'domain_expiry_date': notification_object.details.get('expiry_date'),
             'subject': 'AI domain will expire in few days',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_expire_in_3_days':
         email_template = 'email/domain_expire_in_3_days.html'
         context.update({
             'domain_name': notification_object.domain_name,
             'domain_expiry_date': notification_object.details.get('expiry_date'),
             'subject': 'AI domain will expire in 3 days',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_expire_in_1_day':
         email_template = 'email/domain_expire_in_1_day.html'
         context.update({
             'domain_name': notification_object.domain_name,
             'domain_expiry_date': notification_object.details.get('expiry_date'),
             'subject': 'AI domain will expire in 24 hours',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'low_balance':
         email_template = 'email/low_balance.html'
         context.update({
             'expiring_domains_list': notification_object.details.get('expiring_domains_list', []),
             'subject': 'AI account balance insufficient for auto-renew',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'low_balance_back_end_renew':
         email_template = 'email/low_balance_back_end_renew.html'
         context.update({
             'domains_list': notification_object.details.get('domains_list', []),
             'subject': 'AI account balance insufficient for domain auto-renew',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_renewed':
         email_template = 'email/domain_renewed.html'
         context.update({
@@ -190,10 +202,8 @@ def execute_email_notification(notification_object):
             'duration_years': settings.ZENAIDA_DOMAIN_RENEW_YEARS,
             'current_balance': notification_object.details.get('current_balance'),
             'subject': 'AI domain is automatically renewed',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_deleted':
         email_template = 'email/domain_deleted.html'
         context.update({
@@ -203,17 +213,15 @@ def execute_email_notification(notification_object):
             'domain_delete_end_date': notification_object.details.get('delete_end_date'),
             'insufficient_balance': 'insufficient account balance' if notification_object.details.get('insufficient_balance') else 'disabled auto-renewal configuration',
             'subject': 'AI domain expired',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
-            'account_balance': notification_object.account.balance,
-            'domains_details': zdomains.list_domains_details(notification_object.account),
         })
+        context.update(account_context(notification_object.account, context_cache))
     elif notification_object.subject == 'domain_deactivated':
         email_template = 'email/domain_deactivated.html'
         context.update({
             'domain_name': notification_object.domain_name,
             'domain_expiry_date': notification_object.details.get('expiry_date'),
             'subject': 'AI domain is deactivated',
-            'person_name': notification_object.account.profile.person_name or 'dear Customer',
+            'person_name': account_context(notification_object.account, context_cache)['person_name'],
         })
     elif notification_object.subject == 'account_approved':
         email_template = 'email/account_approved.html'
@@ -221,7 +229,12 @@ def execute_email_notification(notification_object):
             'subject': '%s account was activated' % settings.SITE_NAME,
         })
 
-    html_content = render_to_string(email_template, context=context, request=None)
+    if templates_cache is None:
+        html_content = render_to_string(email_template, context=context, request=None)
+    else:
+        if email_template not in templates_cache:
+            templates_cache[email_template] = get_template(email_template)
+        html_content = templates_cache[email_template].render(context=context, request=None)
     text_content = strip_tags(html_content)
     msg = EmailMultiAlternatives(
         context['subject'],
@@ -232,6 +245,12 @@ def execute_email_notification(notification_object):
         cc=[notification_object.recipient, ],
     )
     msg.attach_alternative(html_content, 'text/html')
+    return msg
+
+
+def execute_email_notification(notification_object, connection=None, context_cache=None, templates_cache=None):
+    msg = build_email_notification(notification_object, context_cache=context_cache, templates_cache=templates_cache)
+    msg.connection = connection
     try:
         msg.send()
     except:
@@ -239,44 +258,186 @@ def execute_email_notification(notification_object):
     return True
 
 
-def process_notifications_queue(iterations=None, delay=3, iteration_delay=5*60):
+class SendRateLimiter(object):
     """
-    Looping thru all email notifications and execute those which was was not sent yet.
+    Spreads sending of the messages evenly in time: not more than `max_per_second` messages per second
+    in total for all the workers sharing same instance.
     """
-    iteration = 0
-    while True:
-        if iterations is not None and iteration >= iterations:
-            break
-        iteration += 1
+
+    def __init__(self, max_per_second):
+        self.interval = 1.0 / max_per_second if max_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_moment = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            moment = max(self.next_moment, now)
+            self.next_moment = moment + self.interval
+        if moment > now:
+            time.sleep(moment - now)
+
+
+def queue_stats():
+    """
+    Returns number of email notifications waiting in the queue and age of the oldest one in seconds.
+    """
+    pending = Notification.notifications.filter(status='started', type='email')
+    oldest = pending.order_by('created_at').values_list('created_at', flat=True).first()
+    return {
+        'pending': pending.count(),
+        'oldest_age': (timezone.now() - oldest).total_seconds() if oldest else 0,
+    }
+
+
+def _skip_reason(notification_object):
+    if notification_object.subject == 'account_approved':
+        return None
+    if not hasattr(notification_object.account, 'profile'):
+        return 'no profile'
+    if not notification_object.account.profile.email_notifications_enabled:
+        return 'disabled'
+    return None
+
+
+def claim_notifications_batch(batch_size):
+    """
+    Marks up to `batch_size` email notifications which were not sent yet as "sending" in a short transaction
+    using `SELECT ... FOR UPDATE SKIP LOCKED`, so parallel workers never pick the same notifications.
+    """
+    with transaction.atomic():
         # TODO: able to handle SMS notifications
-        for one_notification in Notification.notifications.filter(
+        batch = list(Notification.notifications.select_for_update(skip_locked=True, of=('self', )).filter(
             status='started',
             type='email',
-        ):
-            if one_notification.subject != 'account_approved':
-                if not hasattr(one_notification.account, 'profile'):
-                    one_notification.status = 'skipped'
-                    one_notification.save()
-                    logger.info('skipped (no profile) %r', one_notification)
-                    time.sleep(delay)
-                    continue
-                if not one_notification.account.profile.email_notifications_enabled:
-                    one_notification.status = 'skipped'
-                    one_notification.save()
-                    logger.info('skipped %r', one_notification)
-                    time.sleep(delay)
-                    continue
+        ).select_related('account', 'account__profile').order_by('id')[:batch_size])
+        if batch:
+            Notification.notifications.filter(id__in=[n.id for n in batch]).update(
+                status='sending',
+                claimed_at=timezone.now(),
+            )
+    return batch
+
+
+def release_stuck_notifications(stuck_minutes=30):
+    """
+    Returns back to the queue notifications which were claimed too long ago, for example the process was killed.
+    """
+    return Notification.notifications.filter(
+        status='sending',
+        claimed_at__lt=timezone.now() - datetime.timedelta(minutes=stuck_minutes),
+    ).update(status='started', claimed_at=None)
+
+
+def process_notifications_batch(batch_size, rate_limiter=None):
+    """
+    Claims up to `batch_size` email notifications which were not sent yet and executes them.
+    All messages of the batch are sent through one SMTP connection and account details are prepared
+    only once per account. Status of every notification is stored right after it was sent, so interrupted
+    process will not send the same message again.
+    Returns dictionary with number of sent, failed and skipped notifications.
+    """
+    result = {'sent': 0, 'failed': 0, 'skipped': 0, }
+    context_cache = {}
+    templates_cache = {}
+    mail_connection = None
+    batch = claim_notifications_batch(batch_size)
+    try:
+        for one_notification in batch:
+            skip_reason = _skip_reason(one_notification)
+            if skip_reason:
+                Notification.notifications.filter(id=one_notification.id).update(status='skipped')
+                result['skipped'] += 1
+                logger.info('skipped (%s) %r', skip_reason, one_notification)
+                continue
+            if mail_connection is None:
+                mail_connection = get_connection()
+                try:
+                    mail_connection.open()
+                except:
+                    logger.exception('failed to open email connection')
+            if rate_limiter:
+                rate_limiter.wait()
             try:
-                result = execute_email_notification(one_notification)
+                sent = execute_email_notification(
+                    one_notification,
+                    connection=mail_connection,
+                    context_cache=context_cache,
+                    templates_cache=templates_cache,
+                )
             except:
-                result = False
-            if result:
-                one_notification.status = 'sent'
-                one_notification.save()
+                logger.exception('failed to execute %r' % one_notification)
+                sent = False
+            if sent:
+                Notification.notifications.filter(id=one_notification.id).update(status='sent')
+                result['sent'] += 1
                 logger.info('successfully executed %r', one_notification)
             else:
-                one_notification.status = 'failed'
-                one_notification.save()
-                logger.exception('failed to execute %r' % one_notification)
+                Notification.notifications.filter(id=one_notification.id).update(status='failed')
+                result['failed'] += 1
+                logger.error('failed to execute %r' % one_notification)
+    finally:
+        if mail_connection is not None:
+            try:
+                mail_connection.close()
+            except:
+                logger.exception('failed to close email connection')
+    return result
+
+
+def _process_notifications(batch_size, rate_limiter, delay=0):
+    totals = {'sent': 0, 'failed': 0, 'skipped': 0, }
+    while True:
+        result = process_notifications_batch(batch_size, rate_limiter=rate_limiter)
+        for status, count in result.items():
+            totals[status] += count
+        if sum(result.values()) < batch_size:
+            break
+        if delay:
             time.sleep(delay)
+    return totals
+
+
+def _process_notifications_in_thread(batch_size, rate_limiter):
+    close_old_connections()
+    try:
+        return _process_notifications(batch_size, rate_limiter)
+    finally:
+        connection.close()
+
+
+def process_notifications_queue(iterations=None, delay=3, iteration_delay=5*60, batch_size=None, workers=None, max_per_second=None):
+    """
+    Looping thru all email notifications and execute those which was was not sent yet.
+    Notifications are processed in batches by `workers` parallel threads until the queue is empty,
+    several processes can also run in parallel. Sending is rate-limited to `max_per_second` messages
+    for all the workers of the process. When only one worker is used it sleeps `delay` seconds between batches.
+    """
+    if batch_size is None:
+        batch_size = settings.ZENAIDA_NOTIFICATIONS_BATCH_SIZE
+    if workers is None:
+        workers = settings.ZENAIDA_NOTIFICATIONS_WORKERS
+    if max_per_second is None:
+        max_per_second = settings.ZENAIDA_NOTIFICATIONS_MAX_PER_SECOND
+    rate_limiter = SendRateLimiter(max_per_second)
+    iteration = 0
+    while True:
+        if iterations is not None and iteration >= iterations:
+            break
+        iteration += 1
+        started = time.time()
+        release_stuck_notifications()
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_process_notifications_in_thread, [batch_size] * workers, [rate_limiter] * workers))
+        else:
+            results = [_process_notifications(batch_size, rate_limiter, delay=delay), ]
+        totals = {status: sum(r[status] for r in results) for status in ('sent', 'failed', 'skipped', )}
+        processed = sum(totals.values())
+        if processed:
+            duration = time.time() - started
+            logger.info('%d notifications processed in %.3f seconds (%.2f per second): %r, queue: %r',
+                        processed, duration, processed / duration if duration else 0.0, totals, queue_stats())
         time.sleep(iteration_delay)
@@ -2,11 +2,13 @@ import datetime
 import logging
 
 from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
-from accounts.models.account import Account
 from accounts.models.activation import Activation
-from accounts import notifications
+from accounts.models.notification import Notification
+
+from back.models.domain import Domain
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +42,7 @@ def activations_cleanup():
 
 def check_notify_domain_expiring(dry_run=True, min_days_before_expire=0, max_days_before_expire=30, subject='domain_expiring'):
     """
-    Loop all user accounts and all domains and identify all "expiring" domains.
-
-    Skip sending any notifications if user disabled email notifications in Profile settings.
-    Also checks notifications history to make sure only one email is sent for given domain.
+    Identify all "expiring" domains within single window and start email notifications for them.
 
     Values `min_days_before_expire` and `max_days_before_expire` will select domains based on `expiry_date` field.
 
@@ -51,43 +50,74 @@ def check_notify_domain_expiring(dry_run=True, min_days_before_expire=0, max_day
 
     If `dry_run` is True only returns identified users and domains without taking any actions.
     """
+    return check_notify_domains_expiring(
+        dry_run=dry_run,
+        windows=[(min_days_before_expire, max_days_before_expire, subject, ), ],
+    )
+
+
+def check_notify_domains_expiring(dry_run=True, windows=None):
+    """
+    Identify all "expiring" domains for all given notification windows at once.
+    Every item in `windows` is a tuple: (min_days_before_expire, max_days_before_expire, subject).
+
+    Domain matches the window when whole number of days left before `expiry_date` is greater than `min_days_before_expire`
+    and less than `max_days_before_expire`.
+    Only registered and not "inactive" domains are taken in account.
+
+    Domains and already sent notifications are selected with a single query: range filter on `expiry_date`
+    and anti-join with `Notification` table, so only one email is sent for given domain and subject.
+    New notifications are created in bulk.
+
+    If `dry_run` is True only returns identified users and domains without taking any actions.
+    """
+    if not windows:
+        return []
     time_now = timezone.now()
+    domains = Domain.domains.filter(
+        expiry_date__gte=time_now + datetime.timedelta(days=min(w[0] for w in windows) + 1),
+        expiry_date__lt=time_now + datetime.timedelta(days=max(w[1] for w in windows)),
+        owner__profile__isnull=False,
+    ).exclude(
+        epp_id=None,
+    ).exclude(
+        epp_id='',
+    ).exclude(
+        status='inactive',
+    )
+    for pos, window in enumerate(windows):
+        domains = domains.annotate(**{
+            'notified_%d' % pos: Exists(Notification.notifications.filter(
+                account=OuterRef('owner'),
+                subject=window[2],
+                domain_name=OuterRef('name'),
+            )),
+        })
+    domains = domains.select_related('owner', 'owner__profile').order_by('owner_id', 'name')
     outgoing_emails = []
-    for user in Account.users.all():
-        if not hasattr(user, 'profile'):
-            continue
-        # if not user.profile.email_notifications_enabled:
-        #     continue
-        expiring_domains = {}
-        for domain in user.domains.all():
-            if not domain.epp_id or domain.status in ['inactive', ]:
-                # only take in account domains which are registered and active
-                continue
-            time_domain = domain.expiry_date
-            time_delta = time_domain - time_now
-            if time_delta.days >= max_days_before_expire:
-                # domain is not expiring at the moment or must be handled in another task
+    new_notifications = []
+    for pos, (min_days_before_expire, max_days_before_expire, subject) in enumerate(windows):
+        for domain in domains:
+            days_left = (domain.expiry_date - time_now).days
+            if days_left >= max_days_before_expire or days_left <= min_days_before_expire:
                 continue
-            if time_delta.days <= min_days_before_expire:
-                # domain already expired or must be handled in another task - no email needed
+            if getattr(domain, 'notified_%d' % pos):
                 continue
-            expiring_domains[domain.name] = domain.expiry_date.date()
-        # now look up all already sent notifications and find only domains
-        # which we did not send notification yet
-        domains_notified = user.notifications.filter(subject=subject).values_list('domain_name', flat=True)
-        domains_to_be_notified = list(set(expiring_domains.keys()).difference(set(domains_notified)))
-        # TODO: need to also clean up old notifications
-        if not domains_to_be_notified:
-            continue
-        for expiring_domain in domains_to_be_notified:
-            logger.info('for %r domain %r is expiring and has not been communicated yet', user, expiring_domain)
-            outgoing_emails.append((user, expiring_domain, expiring_domains[expiring_domain], ))
+            logger.info('for %r domain %r is expiring and has not been communicated yet', domain.owner, domain.name)
+            outgoing_emails.append((domain.owner, domain.name, domain.expiry_date.date(), ))
             if dry_run:
                 continue
-            notifications.start_email_notification_domain_expiring(
-                user=user,
-                domain_name=expiring_domain,
-                expiry_date=expiring_domains[expiring_domain],
+            new_notifications.append(Notification(
+                account=domain.owner,
+                recipient=domain.owner.profile.contact_email,
+                type='email',
                 subject=subject,
-            )
+                domain_name=domain.name,
+                details={
+                    'expiry_date': domain.expiry_date.date(),
+                },
+            ))
+    if new_notifications:
+        Notification.notifications.bulk_create(new_notifications, batch_size=500)
+        logger.info('created %d new notifications about expiring domains', len(new_notifications))
     return outgoing_emails
@@ -26,6 +26,7 @@ from base import utils
 from epp import rpc_client
 from epp import rpc_error
 
+from zen import zcache
 from zen import zcontacts
 from zen import zdomains
 
@@ -221,6 +222,7 @@ class ContactSynchronizer(automat.Automat):
             self.log(self.debug_level, 'Exception in doEppContactUpdate: %s' % exc)
             self.event('error', exc)
         else:
+            zcache.invalidate_contact_info(self.contact_info['id'])
             self.event('response', response)
 
     def doWriteDB(self, *args, **kwargs):
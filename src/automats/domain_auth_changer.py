@@ -25,6 +25,7 @@ from epp import rpc_client
 from epp import rpc_error
 
 from zen import zdomains
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -128,8 +129,8 @@ class DomainAuthChanger(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.target_domain.name,
+            response = zcache.domain_info(
+                domain_name=self.target_domain.name,
             )
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainInfo: %s' % exc)
@@ -146,6 +147,7 @@ class DomainAuthChanger(automat.Automat):
                 domain=self.target_domain.name,
                 auth_info=self.new_auth_info,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainUpdateAuthCode: %s' % exc)
             self.event('error', exc)
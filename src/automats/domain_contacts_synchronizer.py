@@ -28,6 +28,7 @@ from epp import rpc_error
 
 from zen import zdomains
 from zen import zcontacts
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -228,8 +229,8 @@ class DomainContactsSynchronizer(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.target_domain.name,
+            response = zcache.domain_info(
+                domain_name=self.target_domain.name,
             )
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainInfo: %s' % exc)
@@ -261,6 +262,7 @@ class DomainContactsSynchronizer(automat.Automat):
                 remove_contacts_list=self.remove_contacts,
                 change_registrant=self.change_registrant,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainUpdate: %s' % exc)
             self.event('error', exc)
@@ -32,6 +32,7 @@ from epp import rpc_client
 from epp import rpc_error
 
 from zen import zdomains
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -206,8 +207,8 @@ class DomainHostnamesSynchronizer(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.target_domain.name,
+            response = zcache.domain_info(
+                domain_name=self.target_domain.name,
             )
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainInfo: %s' % exc)
@@ -278,6 +279,7 @@ class DomainHostnamesSynchronizer(automat.Automat):
                 add_nameservers_list=self.hosts_to_be_added,
                 remove_nameservers_list=self.hosts_to_be_removed,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainUpdate: %s' % exc)
             self.event('error', exc)
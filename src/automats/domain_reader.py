@@ -33,6 +33,7 @@ from epp import rpc_error
 
 from zen import zdomains
 from zen import zerrors
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -198,8 +199,8 @@ class DomainReader(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.target_domain.name,
+            response = zcache.domain_info(
+                domain_name=self.target_domain.name,
                 auth_info=self.target_domain.auth_key or None,
                 raise_for_result=False,
             )
@@ -43,6 +43,7 @@ from zen import zdomains
 from zen import zusers
 from zen import zcontacts
 from zen import zerrors
+from zen import zcache
 
 from billing import orders
 
@@ -323,8 +324,8 @@ class DomainRefresher(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.domain_name,
+            response = zcache.domain_info(
+                domain_name=self.domain_name,
                 request_time_limit=self.request_time_limit,
                 raise_for_result=False,
             )
@@ -471,38 +472,40 @@ class DomainRefresher(automat.Automat):
         Action method.
         """
         received_contacts_info = {}
-        # request info about contacts
-        for received_contact in self.received_contacts:
-            try:
-                response = rpc_client.cmd_contact_info(
-                    contact_id=received_contact['id'],
-                    request_time_limit=self.request_time_limit,
-                    raise_for_result=True,
-                )
-            except rpc_error.EPPError as exc:
-                self.log(self.debug_level, 'Exception in doEPPContactsInfoMany: %s' % exc)
-                self.event('error', exc)
-                return
-            received_contacts_info[received_contact['type']] = {
-                'id': received_contact['id'],
-                'response': response,
-            }
-        # request registrant info
+        # same contact can be used in several roles, so every contact is requested only once
+        contact_ids = [received_contact['id'] for received_contact in self.received_contacts]
+        contact_ids.append(self.received_registrant_epp_id)
         try:
-            response = rpc_client.cmd_contact_info(
-                contact_id=self.received_registrant_epp_id,
+            # contacts are requested only when they must be refreshed or were changed on the back-end,
+            # so cached responses can be outdated here
+            responses = zcache.contacts_info_many(
+                contact_ids=contact_ids,
                 request_time_limit=self.request_time_limit,
-                raise_for_result=True,
+                use_cache=False,
             )
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEPPContactsInfoMany: %s' % exc)
             self.event('error', exc)
-        else:
-            received_contacts_info['registrant'] = {
-                'id': self.received_registrant_epp_id,
-                'response': response,
+            return
+        if self.received_registrant_epp_id not in responses:
+            # empty IDs are not requested at all
+            self.log(self.debug_level, 'Registrant ID is missing in doEPPContactsInfoMany')
+            self.event('error', zerrors.RegistrantUnknown('registrant ID is not known'))
+            return
+        for received_contact in self.received_contacts:
+            if received_contact['id'] not in responses:
+                self.log(self.debug_level, 'Contact ID is missing in doEPPContactsInfoMany: %r' % received_contact)
+                self.event('error', zerrors.UnexpectedEPPResponse('%s contact ID is not known' % received_contact['type']))
+                return
+            received_contacts_info[received_contact['type']] = {
+                'id': received_contact['id'],
+                'response': responses[received_contact['id']],
             }
-            self.event('all-contacts-received', received_contacts_info)
+        received_contacts_info['registrant'] = {
+            'id': self.received_registrant_epp_id,
+            'response': responses[self.received_registrant_epp_id],
+        }
+        self.event('all-contacts-received', received_contacts_info)
 
     def doEppCurrentRegistrantInfo(self, *args, **kwargs):
         """
@@ -510,10 +513,9 @@ class DomainRefresher(automat.Automat):
         """
         # request current registrant info
         try:
-            response = rpc_client.cmd_contact_info(
+            response = zcache.contact_info(
                 contact_id=self.received_registrant_epp_id,
                 request_time_limit=self.request_time_limit,
-                raise_for_result=True,
             )
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppCurrentRegistrantInfo: %s' % exc)
@@ -537,12 +539,14 @@ class DomainRefresher(automat.Automat):
                     add_contacts_list=add_contacts_list,
                     request_time_limit=self.request_time_limit,
                 )
+                zcache.invalidate_domain_info(self.domain_name)
             else:
                 response = rpc_client.cmd_domain_update(
                     domain=self.domain_name,
                     change_registrant=self.new_registrant_epp_id,
                     request_time_limit=self.request_time_limit,
                 )
+                zcache.invalidate_domain_info(self.domain_name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainUpdate: %s' % exc)
             self.event('error', exc)
@@ -921,8 +925,7 @@ class DomainRefresher(automat.Automat):
             logger.info('updating expiry date of %r : %r -> %r', self.target_domain, self.target_domain.expiry_date, new_expiry_date)
         self.target_domain.expiry_date = new_expiry_date
         self.target_domain.create_date = zdomains.response_to_datetime('crDate', self.domain_info_response)
-        self.target_domain.save()
-        zdomains.domain_update_statuses(self.target_domain, self.domain_info_response)
+        zdomains.domain_update_statuses(self.target_domain, self.domain_info_response, save=False)
         self.target_domain.latest_sync_date = timezone.now()
         self.target_domain.save()
         self.target_domain.refresh_from_db()
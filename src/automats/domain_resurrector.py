@@ -38,6 +38,7 @@ from epp import rpc_client
 from epp import rpc_error
 
 from zen import zdomains
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -237,6 +238,7 @@ class DomainResurrector(automat.Automat):
                 rgp_restore=True,
                 rgp_restore_report={},
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             if str(exc.code) == '2304':
                 try:
@@ -245,6 +247,7 @@ class DomainResurrector(automat.Automat):
                         rgp_restore=None,
                         rgp_restore_report=rgp_restore_report,
                     )
+                    zcache.invalidate_domain_info(self.target_domain.name)
                 except rpc_error.EPPError as exc:
                     self.log(self.debug_level, 'Exception in doEppDomainUpdate after restore request with report: %s' % exc)
                     self.event('error', exc)
@@ -261,6 +264,7 @@ class DomainResurrector(automat.Automat):
                 rgp_restore=None,
                 rgp_restore_report=rgp_restore_report,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainUpdate: %s' % exc)
             self.event('error', exc)
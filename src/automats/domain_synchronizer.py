@@ -36,6 +36,7 @@ from epp import rpc_error
 
 from zen import zdomains
 from zen import zerrors
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -262,8 +263,8 @@ class DomainSynchronizer(automat.Automat):
         Action method.
         """
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.target_domain.name,
+            response = zcache.domain_info(
+                domain_name=self.target_domain.name,
                 auth_info=self.target_domain.auth_key or None,
                 raise_for_result=False,
             )
@@ -318,6 +319,7 @@ class DomainSynchronizer(automat.Automat):
                 period=period_value,
                 period_units=period_units,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
             # TODO: 
             # epp_domain_info['svTRID'] = create['epp']['response']['trID']['svTRID']
             # epp_domain_info['crDate'] = create['epp']['response']['resData']['creData']['crDate']
@@ -358,6 +360,7 @@ class DomainSynchronizer(automat.Automat):
                 add_statuses_list=add_statuses,
                 remove_statuses_list=remove_statuses,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainUpdate: %s' % exc)
             self.event('error', exc)
@@ -390,6 +393,7 @@ class DomainSynchronizer(automat.Automat):
                 period=period_value,
                 period_units=period_units,
             )
+            zcache.invalidate_domain_info(self.target_domain.name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainRenew: %s' % exc)
             self.event('error', exc)
@@ -28,6 +28,7 @@ from epp import rpc_client
 from epp import rpc_error
 
 from zen import zerrors
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -164,8 +165,8 @@ class DomainTransferRequestor(automat.Automat):
             self.event('skip-info')
             return
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.target_domain_name,
+            response = zcache.domain_info(
+                domain_name=self.target_domain_name,
                 auth_info=self.auth_info or None,
                 raise_for_result=False,
             )
@@ -186,6 +187,7 @@ class DomainTransferRequestor(automat.Automat):
                 op='request',
                 auth_info=self.auth_info,
             )
+            zcache.invalidate_domain_info(self.target_domain_name)
         except rpc_error.EPPError as exc:
             self.log(self.debug_level, 'Exception in doEppDomainTransfer: %s' % exc)
             self.event('error', exc)
@@ -30,6 +30,7 @@ from epp import rpc_error
 
 from zen import zdomains
 from zen import zerrors
+from zen import zcache
 
 #------------------------------------------------------------------------------
 
@@ -240,8 +241,8 @@ class DomainsChecker(automat.Automat):
             self.event('skip-info')
             return
         try:
-            response = rpc_client.cmd_domain_info(
-                domain=self.current_domain_name,
+            response = zcache.domain_info(
+                domain_name=self.current_domain_name,
                 auth_info=self.auth_info or None,
             )
         except rpc_error.EPPError as exc:
@@ -17,12 +17,18 @@ from back.models.profile import Profile
 from back.models.domain import Domain, BlockedTransfer
 from back.models.contact import Contact, Registrant
 from back.models.back_end_renew import BackEndRenew
+from back.models.poll_message import PollMessage
+from back.models.domain_refresh_request import DomainRefreshRequest
+from back.models.task_checkpoint import TaskCheckpoint
+from back.models.announcement_delivery import AnnouncementDelivery
+from back.models.domain_snapshot import DomainSnapshot
 
 from billing import orders as billing_orders
 
 from epp import rpc_client
 
 from zen import zmaster
+from zen import zcache
 
 
 class CustomDateFieldListFilter(admin.DateFieldListFilter):
@@ -302,6 +308,7 @@ class DomainAdmin(NestedModelAdmin):
                     add_statuses_list=[{'name': 'clientTransferProhibited', 'value': f'set by Admin on {time.asctime()}', }, ],
                     raise_for_result=False,
                 )
+                zcache.invalidate_domain_info(domain_object.name)
                 zmaster.domain_synchronize_from_backend(
                     domain_name=domain_object.name,
                     refresh_contacts=True,
@@ -329,6 +336,7 @@ class DomainAdmin(NestedModelAdmin):
                     remove_statuses_list=[{'name': 'clientTransferProhibited'}, ],
                     raise_for_result=False,
                 )
+                zcache.invalidate_domain_info(domain_object.name)
                 zmaster.domain_synchronize_from_backend(
                     domain_name=domain_object.name,
                     refresh_contacts=True,
@@ -508,6 +516,51 @@ class BlockedTransferAdmin(NestedModelAdmin):
     pass
 
 
+class PollMessageAdmin(NestedModelAdmin):
+
+    list_display = ('msg_id', 'domain_name', 'created', 'status', 'attempts', 'duration', )
+    list_filter = ('status', )
+    search_fields = ('msg_id', 'domain_name', )
+    readonly_fields = ('msg_id', 'domain_name', 'created', 'processed', 'duration', 'attempts', 'error', 'payload', )
+    actions = ('replay_poll_messages', )
+
+    def replay_poll_messages(self, request, queryset):
+        from zen import zpoll
+        report = []
+        if zpoll.poller_active():
+            # received and deferred messages are still owned by the running polling loop
+            queryset = queryset.filter(status='failed')
+        for poll_message in queryset.exclude(status='processed').order_by('id'):
+            report.append('%s: %r' % (poll_message.msg_id, zpoll.process_poll_message(poll_message, poll_message.payload)))
+        self.message_user(request, ', '.join(report) or 'nothing to replay')
+    replay_poll_messages.short_description = "Replay poll messages"
+
+
+class DomainRefreshRequestAdmin(NestedModelAdmin):
+
+    list_display = ('domain_name', 'owner', 'created', 'started', 'finished', 'status', )
+    list_filter = ('status', )
+    search_fields = ('domain_name', 'owner__email', )
+
+
+class TaskCheckpointAdmin(NestedModelAdmin):
+
+    list_display = ('name', 'position', 'window_started', 'started', 'finished', 'duration', 'processed', 'skipped', 'failed', )
+
+
+class AnnouncementDeliveryAdmin(NestedModelAdmin):
+
+    list_display = ('announcement', 'email', 'status', 'created', 'sent', )
+    list_filter = ('announcement', 'status', )
+    search_fields = ('email', )
+
+
+class DomainSnapshotAdmin(NestedModelAdmin):
+
+    list_display = ('name', 'content_hash', 'updated', )
+    search_fields = ('name', )
+
+
 admin.site.register(Zone, ZoneAdmin)
 admin.site.register(Registrar, RegistrarAdmin)
 admin.site.register(Profile, ProfileAdmin)
@@ -516,3 +569,8 @@ admin.site.register(Contact, ContactAdmin)
 admin.site.register(Registrant, RegistrantAdmin)
 admin.site.register(BackEndRenew, BackEndRenewAdmin)
 admin.site.register(BlockedTransfer, BlockedTransferAdmin)
+admin.site.register(PollMessage, PollMessageAdmin)
+admin.site.register(DomainRefreshRequest, DomainRefreshRequestAdmin)
+admin.site.register(TaskCheckpoint, TaskCheckpointAdmin)
+admin.site.register(AnnouncementDelivery, AnnouncementDeliveryAdmin)
+admin.site.register(DomainSnapshot, DomainSnapshotAdmin)
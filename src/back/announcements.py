@@ -0,0 +1,199 @@
+import time
+import logging
+import datetime
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from accounts.notifications import SendRateLimiter
+
+from back.models.announcement_delivery import AnnouncementDelivery
+
+
+logger = logging.getLogger(__name__)
+
+
+class AnnouncementRenderer(object):
+    """
+    Loads the template and prepares the recipient-independent part of the context only once,
+    every recipient is rendered separately because the content includes email and name of the person.
+    """
+
+    def __init__(self, template_name, data):
+        self.template = get_template(template_name)
+        self.data = dict(data)
+        self.subject = self.data.get('subject', 'Subject')
+
+    def render(self, email, person_name):
+        context = dict(self.data)
+        context['email'] = email
+        context['person_name'] = person_name or 'dear Customer'
+        html_content = self.template.render(context=context, request=None)
+        return self.subject, html_content, strip_tags(html_content)
+
+
+def prepare_deliveries(announcement, recipients):
+    """
+    Creates pending delivery records for given list of dictionaries with "email" and optional "person_name" keys.
+    Recipients already known for that announcement are not touched, so their delivery state is kept.
+    """
+    known = set(AnnouncementDelivery.deliveries.filter(announcement=announcement).values_list('email', flat=True))
+    new_deliveries = []
+    for recipient in recipients:
+        if recipient['email'] in known:
+            continue
+        known.add(recipient['email'])
+        new_deliveries.append(AnnouncementDelivery(
+            announcement=announcement,
+            email=recipient['email'],
+            person_name=recipient.get('person_name') or '',
+        ))
+    AnnouncementDelivery.deliveries.bulk_create(new_deliveries, batch_size=1000, ignore_conflicts=True)
+    return len(new_deliveries)
+
+
+def retry_failed(announcement):
+    return AnnouncementDelivery.deliveries.filter(announcement=announcement, status='failed').update(status='pending', error=None)
+
+
+def release_stuck(announcement, stuck_minutes=30):
+    """
+    Returns back to the queue deliveries which were claimed too long ago, for example the process was killed.
+    """
+    return AnnouncementDelivery.deliveries.filter(
+        announcement=announcement,
+        status='sending',
+        claimed__lt=timezone.now() - datetime.timedelta(minutes=stuck_minutes),
+    ).update(status='pending', claimed=None)
+
+
+def delivery_stats(announcement):
+    stats = {'pending': 0, 'sending': 0, 'sent': 0, 'failed': 0, }
+    for status, count in AnnouncementDelivery.deliveries.filter(
+        announcement=announcement,
+    ).values_list('status').annotate(count=Count('id')).order_by():
+        stats[status] = count
+    return stats
+
+
+def claim_batch(announcement, batch_size):
+    """
+    Marks up to `batch_size` pending deliveries as "sending" in a short transaction using
+    `SELECT ... FOR UPDATE SKIP LOCKED`, so parallel workers never pick the same recipients.
+    """
+    with transaction.atomic():
+        batch = list(AnnouncementDelivery.deliveries.select_for_update(skip_locked=True).filter(
+            announcement=announcement,
+            status='pending',
+        ).order_by('id')[:batch_size])
+        if batch:
+            AnnouncementDelivery.deliveries.filter(id__in=[d.id for d in batch]).update(
+                status='sending',
+                claimed=timezone.now(),
+            )
+    return batch
+
+
+def send_batch(announcement, renderer, from_email, batch_size, rate_limiter=None):
+    """
+    Claims up to `batch_size` pending deliveries and sends all of them through one SMTP connection.
+    State of every recipient is stored right after the message was sent, so interrupted process
+    will not send the same message again.
+    Returns dictionary with number of sent and failed messages.
+    """
+    result = {'sent': 0, 'failed': 0, }
+    batch = claim_batch(announcement, batch_size)
+    if not batch:
+        return result
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+    except Exception as exc:
+        logger.error('failed to open email connection: %r', exc)
+    try:
+        for delivery in batch:
+            if rate_limiter:
+                rate_limiter.wait()
+            try:
+                subject, html_content, text_content = renderer.render(delivery.email, delivery.person_name)
+                msg = EmailMultiAlternatives(
+                    subject=subject,
+                    body=text_content,
+                    from_email=from_email,
+                    to=[delivery.email, ],
+                    bcc=[delivery.email, ],
+                    cc=[delivery.email, ],
+                    connection=mail_connection,
+                )
+                msg.attach_alternative(html_content, 'text/html')
+                if not msg.send():
+                    raise Exception('message was not sent')
+            except Exception as exc:
+                logger.error('failed sending announcement %r to %r: %r', announcement, delivery.email, exc)
+                AnnouncementDelivery.deliveries.filter(id=delivery.id).update(status='failed', error=str(exc))
+                result['failed'] += 1
+                continue
+            AnnouncementDelivery.deliveries.filter(id=delivery.id).update(status='sent', sent=timezone.now())
+            result['sent'] += 1
+    finally:
+        try:
+            mail_connection.close()
+        except:
+            logger.exception('failed to close email connection')
+    return result
+
+
+def _send_batches(announcement, renderer, from_email, batch_size, rate_limiter):
+    totals = {'sent': 0, 'failed': 0, }
+    while True:
+        result = send_batch(announcement, renderer, from_email, batch_size, rate_limiter=rate_limiter)
+        totals['sent'] += result['sent']
+        totals['failed'] += result['failed']
+        if result['sent'] + result['failed'] < batch_size:
+            break
+    return totals
+
+
+def _send_batches_in_thread(announcement, renderer, from_email, batch_size, rate_limiter):
+    close_old_connections()
+    try:
+        return _send_batches(announcement, renderer, from_email, batch_size, rate_limiter)
+    finally:
+        connection.close()
+
+
+def send_announcement(announcement, template_name, data, from_email, recipients=None, workers=1, batch_size=50, max_per_second=None):
+    """
+    Sends the announcement to all recipients which did not receive it yet.
+    When interrupted, the next call with the same `announcement` continues from the first pending recipient.
+    Returns dictionary with number of sent and failed messages, duration and throughput.
+    """
+    started = time.time()
+    if recipients is not None:
+        prepare_deliveries(announcement, recipients)
+    release_stuck(announcement)
+    renderer = AnnouncementRenderer(template_name, data)
+    rate_limiter = SendRateLimiter(max_per_second)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda _: _send_batches_in_thread(announcement, renderer, from_email, batch_size, rate_limiter),
+                range(workers),
+            ))
+    else:
+        results = [_send_batches(announcement, renderer, from_email, batch_size, rate_limiter), ]
+    report = {
+        'sent': sum(r['sent'] for r in results),
+        'failed': sum(r['failed'] for r in results),
+        'duration': time.time() - started,
+    }
+    report['per_second'] = (report['sent'] + report['failed']) / report['duration'] if report['duration'] else 0.0
+    logger.info('announcement %r: %d sent, %d failed in %.3f seconds (%.2f per second)',
+                announcement, report['sent'], report['failed'], report['duration'], report['per_second'])
+    return report
@@ -1,13 +1,22 @@
 import logging
 
-import re
-import datetime
 import csv
+import json
+import time
+import hashlib
+import datetime
+import functools
+import itertools
 
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection, transaction
 from django.utils.timezone import make_aware
 
 from epp import rpc_error
 
+from back import dirty_fields
+
 from zen import zcontacts
 from zen import zusers
 from zen import zdomains
@@ -29,11 +38,87 @@ def split_csv_row(csv_row, headers):
     return csv_record
 
 
+class CSVColumns(object):
+    """
+    Header layout of the CSV export resolved only once into a column index map.
+    Keys are built the same way as in `split_csv_row()`: lower-cased header name and the column index.
+    """
+
+    def __init__(self, headers):
+        self.headers = list(headers)
+        self.index = {}
+        for field_index, header in enumerate(self.headers):
+            self.index[header.lower().replace(' ', '_') + '_' + str(field_index)] = field_index
+
+    def record(self, csv_row):
+        return CSVRecord(self.index, csv_row)
+
+
+class CSVRecord(object):
+    """
+    Read-only view of a single CSV row, only fields which are actually used are looked up and stripped.
+    """
+
+    __slots__ = ('index', 'csv_row', )
+
+    def __init__(self, index, csv_row):
+        self.index = index
+        self.csv_row = csv_row
+
+    def get(self, item_id, default=None):
+        field_index = self.index.get(item_id)
+        if field_index is None or field_index >= len(self.csv_row):
+            return default
+        return self.csv_row[field_index].strip()
+
+
+@functools.lru_cache(maxsize=16)
+def _csv_columns(headers):
+    return CSVColumns(headers)
+
+
+def csv_columns(headers):
+    """
+    Returns CSVColumns object for given headers, same layout is resolved only once.
+    """
+    if isinstance(headers, CSVColumns):
+        return headers
+    return _csv_columns(tuple(headers))
+
+
+class _PhoneCharsTable(dict):
+    """
+    Translation table for `str.translate()` which keeps only digits, "+", "." and "^" characters,
+    same result as `re.sub('[^\\d^\\+^\\.]', '', value)` but much faster.
+    """
+
+    def __missing__(self, char_code):
+        char = chr(char_code)
+        self[char_code] = char_code if (char.isdecimal() or char in '+.^') else None
+        return self[char_code]
+
+
+_phone_chars_table = _PhoneCharsTable()
+
+
+def normalize_phone(value):
+    return value.translate(_phone_chars_table)[:17]
+
+
+def parse_date(value):
+    """
+    Parses date in "YYYY-MM-DD" format and returns timezone aware datetime object.
+    """
+    if len(value) == 10 and value[4] == '-' and value[7] == '-' and (value[:4] + value[5:7] + value[8:]).isdigit():
+        return make_aware(datetime.datetime(int(value[:4]), int(value[5:7]), int(value[8:])))
+    return make_aware(datetime.datetime.strptime(value, '%Y-%m-%d', ))
+
+
 def get_csv_domain_info(csv_row, headers):
-    csv_record = split_csv_row(csv_row, headers)
+    csv_record = csv_columns(headers).record(csv_row)
     info = dict(
-        create_date=make_aware(datetime.datetime.strptime(csv_record.get('create_date_5'), '%Y-%m-%d', )),  # -
-        expiry_date=make_aware(datetime.datetime.strptime(csv_record.get('expiry_date_6'), '%Y-%m-%d', )),  # 1b.
+        create_date=parse_date(csv_record.get('create_date_5')),                                           # -
+        expiry_date=parse_date(csv_record.get('expiry_date_6')),                                           # 1b.
         name=csv_record.get('name_4', ''),                                                                  # 2.
     #--- registrant contact
         registrant=dict(
@@ -44,8 +129,8 @@ def get_csv_domain_info(csv_row, headers):
             address_province=csv_record.get('registrant_state_province_35', ''),    # 3d.
             address_postal_code=csv_record.get('registrant_postalcode_36', ''),     # 3e.
             address_country=csv_record.get('registrant_countrycode_37', ''),        # 3f.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('registrant_phone_27', ''))[:17],        # -
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('registrant_fax_29', ''))[:17],            # -
+            contact_voice=normalize_phone(csv_record.get('registrant_phone_27', '')),       # -
+            contact_fax=normalize_phone(csv_record.get('registrant_fax_29', '')),           # -
             contact_email=csv_record.get('registrant_email_25', '').lower(),        # -
         ),
     #--- admin contact
@@ -57,8 +142,8 @@ def get_csv_domain_info(csv_row, headers):
             address_province=csv_record.get('admin_state_province_69', ''),         # 4g.
             address_postal_code=csv_record.get('admin_postalcode_70', ''),          # 4h.
             address_country=csv_record.get('admin_countrycode_71', ''),             # 4i.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('admin_phone_61', ''))[:17],             # 4j.
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('admin_fax_63', ''))[:17],                 # 4k.
+            contact_voice=normalize_phone(csv_record.get('admin_phone_61', '')),            # 4j.
+            contact_fax=normalize_phone(csv_record.get('admin_fax_63', '')),                # 4k.
             contact_email=csv_record.get('admin_email_59', '').lower(),             # 4l.
         ),
     #--- tech contact
@@ -70,8 +155,8 @@ def get_csv_domain_info(csv_row, headers):
             address_province=csv_record.get('technical_state_province_86', ''),     # 5g.
             address_postal_code=csv_record.get('technical_postalcode_87', ''),      # 5h.
             address_country=csv_record.get('technical_countrycode_88', ''),         # 5i.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('technical_phone_78', ''))[:17],         # 5j.
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('technical_fax_80', ''))[:17],             # 5k.
+            contact_voice=normalize_phone(csv_record.get('technical_phone_78', '')),        # 5j.
+            contact_fax=normalize_phone(csv_record.get('technical_fax_80', '')),            # 5k.
             contact_email=csv_record.get('technical_email_76', '').lower(),         # 5l.
         ),
     #--- billing contact
@@ -83,8 +168,8 @@ def get_csv_domain_info(csv_row, headers):
             address_province=csv_record.get('billing_state_province_52', ''),       # 6g.
             address_postal_code=csv_record.get('billing_postalcode_53', ''),        # 6h.
             address_country=csv_record.get('billing_countrycode_54', ''),           # 6i.
-            contact_voice=re.sub('[^\d^\+^\.]', '', csv_record.get('billing_phone_44', ''))[:17],           # 6j.
-            contact_fax=re.sub('[^\d^\+^\.]', '', csv_record.get('billing_fax_46', ''))[:17],               # 6k.
+            contact_voice=normalize_phone(csv_record.get('billing_phone_44', '')),          # 6j.
+            contact_fax=normalize_phone(csv_record.get('billing_fax_46', '')),              # 6k.
             contact_email=csv_record.get('billing_email_42', '').lower(),           # 6l.
         ),
     #--- nameservers
@@ -188,7 +273,7 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
         log = logger
     errors = []
     try:
-        csv_record = split_csv_row(csv_row, headers)
+        csv_record = csv_columns(headers).record(csv_row)
         csv_info = get_csv_domain_info(csv_row, headers)
         domain = csv_info['name']
     except Exception as exc:
@@ -426,7 +511,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_expiry_date, real_expiry_date, ))
                 return errors
             known_domain.expiry_date = real_expiry_date
-            known_domain.save()
             log.debug('known expiry date updated to %r', real_expiry_date)
     else:
         if known_domain:
@@ -436,7 +520,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('expiry date was not set, master record is %r' % real_expiry_date)
                     return errors
                 known_domain.expiry_date = real_expiry_date
-                known_domain.save()
                 log.debug('expiry date was not set, updated with new date %r', real_expiry_date)
 
     if known_create_date:
@@ -449,7 +532,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_create_date, real_create_date, ))
                 return errors
             known_domain.create_date = real_create_date
-            known_domain.save()
             log.debug('known create date updated to %r', real_create_date)
     else:
         if known_domain:
@@ -459,7 +541,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('create date was not set, master record is %r' % real_create_date)
                     return errors
                 known_domain.create_date = real_create_date
-                known_domain.save()
                 log.debug('create date was not set, update with new date %r', real_create_date)
 
     #--- check known epp_id
@@ -470,7 +551,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_epp_id, real_epp_id, ))
                 return errors
             known_domain.epp_id = real_epp_id
-            known_domain.save()
             log.debug('known epp ID updated with new value %r', real_epp_id)
     else:
         if real_epp_id:
@@ -479,7 +559,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('epp ID was not set, master record is %s' % real_epp_id)
                     return errors
                 known_domain.epp_id = real_epp_id
-                known_domain.save()
                 log.debug('epp ID was not set, now updated with a new value %r', real_epp_id)
 
     #--- check known domain status
@@ -490,7 +569,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_status, real_status_short, ))
                 return errors
             known_domain.status = real_status_short
-            known_domain.save()
             log.debug('known domain status updated with new value %r', real_status_short)
     else:
         if real_status_short:
@@ -499,7 +577,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     errors.append('domain status was not set, master record is %s' % real_status_short)
                     return errors
                 known_domain.status = real_status_short
-                known_domain.save()
                 log.debug('domain status was not set, now updated with a new value %r', real_status_short)
 
     #--- check auth_key
@@ -510,7 +587,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     known_auth_key, real_auth_key, ))
                 return errors
             known_domain.auth_key = real_auth_key
-            known_domain.save()
             log.debug('known auth_key updated with new value %r', real_auth_key)
     else:
         if real_auth_key:
@@ -520,7 +596,6 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                         real_auth_key, ))
                     return errors
                 known_domain.auth_key = real_auth_key
-                known_domain.save()
                 log.debug('auth_key was not set, now updated with new value %r', real_auth_key)
 
     #--- check nameservers
@@ -531,9 +606,10 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
                     i, known_nameservers[i], real_nameservers[i], ))
                 return errors
 
-    #--- update nameservers
+    #--- update nameservers and write all modified fields at once
     if not dry_run:
         zdomains.update_nameservers(known_domain, real_nameservers)
+        known_domain.save()
 
     if errors and dry_run:
         return errors
@@ -542,24 +618,13 @@ def domain_regenerate_from_csv_row(csv_row, headers, wanted_registrar='zenaida_a
     return errors
 
 
-def load_from_csv(filename, dry_run=True, registrar_epp_id=None, sync_after=False, log=None):
-    if log is None:
-        log = logger
-    from back.models.registrar import Registrar
-    epp_domains = csv.reader(open(filename))
-    count = 0
-    headers = next(epp_domains)
-    if not registrar_epp_id:
-        wanted_registrar = Registrar.registrars.first()
-        if wanted_registrar:
-            registrar_epp_id = wanted_registrar.epp_id
-    if not registrar_epp_id:
-        registrar_epp_id = 'zenaida_ai'
-    for row in epp_domains:
-        count += 1
-        domain = row[4]
-        try:
-            errors = domain_regenerate_from_csv_row(
+def _reconcile_row(row, headers, registrar_epp_id, dry_run, log):
+    """
+    Returns list of errors, exception raised while processing the row only rolls back changes made for that row.
+    """
+    try:
+        with transaction.atomic():
+            return domain_regenerate_from_csv_row(
                 row,
                 headers,
                 wanted_registrar=registrar_epp_id,
@@ -567,15 +632,18 @@ def load_from_csv(filename, dry_run=True, registrar_epp_id=None, sync_after=Fals
                 dry_run=dry_run,
                 log=log,
             )
-        except Exception:
-            log.exception('%s failed processing\n' % domain)
-            return -1
-        if errors:
-            log.error('%s errors:\n    %s\n', domain, ';'.join(errors))
-            continue
-        if not sync_after:
-            log.info('%s processed\n\n', domain)
-            continue
+    except Exception as exc:
+        log.exception('%s failed processing\n' % (row[4] if len(row) > 4 else row))
+        return ['failed processing csv record: %r' % exc, ]
+
+
+def _synchronize_domains(domains, log):
+    """
+    Synchronizes given domains one by one and returns list of tuples (domain_name, error).
+    """
+    results = []
+    for domain in domains:
+        error = None
         try:
             outputs = zmaster.domain_synchronize_from_backend(
                 domain_name=domain,
@@ -584,15 +652,236 @@ def load_from_csv(filename, dry_run=True, registrar_epp_id=None, sync_after=Fals
                 change_owner_allowed=True,
                 create_new_owner_allowed=True,
             )
-        except rpc_error.EPPError:
+        except rpc_error.EPPError as exc:
             log.exception('failed to synchronize domain %s from back-end\n' % domain)
-            continue
-        if not outputs:
-            log.critical('synchronize domain %s failed with empty result\n' % domain)
-            continue
-        if not outputs[-1] or isinstance(outputs[-1], Exception):
-            log.critical('synchronize domain %s failed with result: %r\n', domain, outputs[-1])
-            continue
-        log.info('outputs: %r\n', outputs)
-        log.info('%s processed and synchronized\n\n', domain)
+            error = 'failed to synchronize domain from back-end: %r' % exc
+        else:
+            if not outputs:
+                log.critical('synchronize domain %s failed with empty result\n' % domain)
+                error = 'synchronize domain failed with empty result'
+            elif not outputs[-1] or isinstance(outputs[-1], Exception):
+                log.critical('synchronize domain %s failed with result: %r\n', domain, outputs[-1])
+                error = 'synchronize domain failed with result: %r' % outputs[-1]
+            else:
+                log.info('outputs: %r\n', outputs)
+                log.info('%s processed and synchronized\n\n', domain)
+        results.append((domain, error, ))
+    return results
+
+
+def _synchronize_domains_in_thread(domains, log):
+    close_old_connections()
+    try:
+        return _synchronize_domains(domains, log)
+    finally:
+        connection.close()
+
+
+def _synchronize_groups(groups, workers, log):
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(itertools.chain(*executor.map(_synchronize_domains_in_thread, groups, [log] * len(groups))))
+    return list(itertools.chain(*[_synchronize_domains(domains, log) for domains in groups]))
+
+
+def csv_row_content_hash(csv_row, headers):
+    """
+    Returns tuple (domain_name, content_hash) for given CSV row.
+    Hash is stable and covers registrar, status, dates, auth key, all contacts and nameservers of the domain.
+    Hash is None if the row can not be decoded, such row is always considered as changed.
+    """
+    csv_record = csv_columns(headers).record(csv_row)
+    domain = csv_record.get('name_4', '')
+    try:
+        csv_info = get_csv_domain_info(csv_row, headers)
+    except Exception:
+        return domain, None
+    content = [
+        csv_record.get('client_id_0'),
+        csv_record.get('roid_0'),
+        csv_record.get('eppstatus_7'),
+        csv_record.get('auth_info_password_3'),
+        csv_info['create_date'].isoformat(),
+        csv_info['expiry_date'].isoformat(),
+        csv_record.get('registrant_contact_id_21'),
+        csv_record.get('admin_contact_id_55'),
+        csv_record.get('tech_contact_id_72'),
+        csv_record.get('billing_contact_id_38'),
+        csv_info['registrant'],
+        csv_info['admin'],
+        csv_info['tech'],
+        csv_info['billing'],
+        csv_info['nameservers'],
+    ]
+    return domain, hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def snapshot_diff(filename):
+    """
+    Hashes all rows of the CSV export and compares them with snapshots stored during previous import.
+    Returns dictionary with sets of "added", "changed" and "removed" domain names, number of "unchanged" domains
+    and "hashes" of all rows of the current export.
+    """
+    from back.models.domain_snapshot import DomainSnapshot
+    hashes = {}
+    with open(filename, newline='') as csv_file:
+        epp_domains = csv.reader(csv_file)
+        columns = csv_columns(next(epp_domains))
+        for row in epp_domains:
+            domain, content_hash = csv_row_content_hash(row, columns)
+            hashes[domain] = content_hash
+    known = dict(DomainSnapshot.snapshots.values_list('name', 'content_hash').iterator())
+    diff = {
+        'added': set(),
+        'changed': set(),
+        'removed': set(known) - set(hashes),
+        'unchanged': 0,
+        'hashes': hashes,
+    }
+    for domain, content_hash in hashes.items():
+        if domain not in known:
+            diff['added'].add(domain)
+        elif content_hash is None or known[domain] != content_hash:
+            diff['changed'].add(domain)
+        else:
+            diff['unchanged'] += 1
+    return diff
+
+
+def diff_summary(diff):
+    return '%d added, %d changed, %d removed, %d unchanged' % (
+        len(diff['added']), len(diff['changed']), len(diff['removed']), diff['unchanged'], )
+
+
+def store_snapshots(hashes):
+    """
+    Saves content hashes of successfully reconciled domains, `hashes` is a dictionary {domain_name: content_hash}.
+    """
+    from back.models.domain_snapshot import DomainSnapshot
+    hashes = {domain: content_hash for domain, content_hash in hashes.items() if domain and content_hash}
+    if not hashes:
+        return 0
+    with transaction.atomic():
+        DomainSnapshot.snapshots.filter(name__in=list(hashes.keys())).delete()
+        DomainSnapshot.snapshots.bulk_create([
+            DomainSnapshot(name=domain, content_hash=content_hash) for domain, content_hash in hashes.items()
+        ])
+    return len(hashes)
+
+
+def drop_snapshots(domains):
+    from back.models.domain_snapshot import DomainSnapshot
+    return DomainSnapshot.snapshots.filter(name__in=list(domains)).delete()[0]
+
+
+def load_from_csv(filename, dry_run=True, registrar_epp_id=None, sync_after=False, log=None,
+                  batch_size=100, workers=1, start_position=0, progress_callback=None, changed_only=False):
+    """
+    Imports domains from the registry CSV export in three stages:
+        1. rows are streamed from the file, nothing is loaded in memory completely
+        2. every batch of `batch_size` rows is reconciled with the DB in a single transaction
+        3. reconciled domains of the batch are synchronized from the back-end by `workers` parallel threads,
+           domains of the same registrant are always synchronized one by one within the same thread
+    Failing rows do not stop the import, errors are collected and passed to `progress_callback`
+    together with the position of the latest completely processed row.
+    Rows up to `start_position` are skipped, so the import can be continued after a crash.
+    Content hash of every successfully imported domain is stored, with `changed_only=True` the export
+    is compared with stored hashes first and only added, changed and removed domains are processed.
+    Returns number of processed rows.
+    """
+    if log is None:
+        log = logger
+    from back.models.registrar import Registrar
+    if not registrar_epp_id:
+        wanted_registrar = Registrar.registrars.first()
+        if wanted_registrar:
+            registrar_epp_id = wanted_registrar.epp_id
+    if not registrar_epp_id:
+        registrar_epp_id = 'zenaida_ai'
+    started = time.time()
+    writes_before = dirty_fields.counters()
+    count = 0
+    last_position = start_position
+    diff = None
+    if changed_only:
+        diff = snapshot_diff(filename)
+        log.info('snapshot diff: %s\n', diff_summary(diff))
+    with open(filename, newline='') as csv_file:
+        epp_domains = csv.reader(csv_file)
+        headers = next(epp_domains)
+        columns = csv_columns(headers)
+        rows = enumerate(epp_domains, start=1)
+        if start_position:
+            rows = itertools.islice(rows, start_position, None)
+        if diff is not None:
+            wanted_domains = diff['added'] | diff['changed']
+            rows = ((position, row) for position, row in rows if columns.record(row).get('name_4', '') in wanted_domains)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            failures = []
+            to_be_synchronized = {}
+            reconciled = {}
+            #--- reconcile stage
+            with transaction.atomic():
+                for position, row in batch:
+                    domain = row[4] if len(row) > 4 else ''
+                    errors = _reconcile_row(row, columns, registrar_epp_id, dry_run, log)
+                    if errors:
+                        log.error('%s errors:\n    %s\n', domain, ';'.join(errors))
+                        failures.append({'position': position, 'domain': domain, 'errors': errors, })
+                        continue
+                    if not dry_run:
+                        snapshot_domain, content_hash = csv_row_content_hash(row, columns)
+                        reconciled[snapshot_domain] = content_hash
+                    if not sync_after:
+                        log.info('%s processed\n\n', domain)
+                        continue
+                    registrant_email = columns.record(row).get('registrant_email_25', '').lower() or domain
+                    to_be_synchronized.setdefault(registrant_email, []).append(domain)
+            #--- synchronize stage
+            synchronized = 0
+            if to_be_synchronized:
+                positions = {row[4]: position for position, row in batch if len(row) > 4}
+                for domain, error in _synchronize_groups(list(to_be_synchronized.values()), workers, log):
+                    if error:
+                        failures.append({'position': positions.get(domain), 'domain': domain, 'errors': [error, ], })
+                        reconciled.pop(domain.strip(), None)
+                    else:
+                        synchronized += 1
+            store_snapshots(reconciled)
+            count += len(batch)
+            last_position = batch[-1][0]
+            if progress_callback:
+                progress_callback(
+                    position=last_position,
+                    processed=len(batch),
+                    synchronized=synchronized,
+                    failures=failures,
+                    speed=count / (time.time() - started or 1.0),
+                )
+    if diff is not None and diff['removed'] and sync_after and not dry_run:
+        #--- domains which are not present in the export anymore, snapshots are kept until they were synchronized
+        failures = []
+        synchronized = set()
+        for domain, error in _synchronize_groups([[domain, ] for domain in sorted(diff['removed'])], workers, log):
+            if error:
+                failures.append({'position': None, 'domain': domain, 'errors': [error, ], })
+            else:
+                synchronized.add(domain)
+        drop_snapshots(synchronized)
+        log.info('%d removed domains processed\n', len(diff['removed']))
+        if progress_callback:
+            progress_callback(
+                position=last_position,
+                processed=0,
+                synchronized=len(synchronized),
+                failures=failures,
+                speed=count / (time.time() - started or 1.0),
+            )
+    log.info('%d rows processed in %.3f seconds\n', count, time.time() - started)
+    writes = dirty_fields.counters_difference(writes_before)
+    log.info('%d domain/contact writes made, %d writes and %d column updates avoided\n',
+             writes['saved'], writes['skipped'], writes['columns_avoided'])
     return count
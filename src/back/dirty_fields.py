@@ -0,0 +1,104 @@
+import copy
+import threading
+
+
+_counters_lock = threading.Lock()
+_counters = {
+    'saved': 0,
+    'skipped': 0,
+    'columns_avoided': 0,
+}
+
+
+def counters():
+    """
+    Returns copy of the global counters of all saves made by models with dirty fields tracking.
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def counters_difference(before, after=None):
+    """
+    Returns counters collected since `before` snapshot was taken with `counters()`.
+    """
+    if after is None:
+        after = counters()
+    return {key: after[key] - before.get(key, 0) for key in after}
+
+
+def _count(**kwargs):
+    with _counters_lock:
+        for key, value in kwargs.items():
+            _counters[key] += value
+
+
+class DirtyFieldsMixin(object):
+    """
+    Remembers field values loaded from DB, so `save()` of an existing object writes only modified columns
+    using `update_fields` and is skipped completely when nothing was changed.
+    Explicitly given `update_fields` and inserts of new objects are passed as is.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DirtyFieldsMixin, self).__init__(*args, **kwargs)
+        self._reset_original_state()
+
+    def _reset_original_state(self, attnames=None):
+        if attnames is None or not hasattr(self, '_original_state'):
+            self._original_state = {}
+            attnames = [field.attname for field in self._meta.concrete_fields]
+        for attname in attnames:
+            if attname not in self.__dict__:
+                # deferred fields are not loaded yet, they will be remembered when loaded with refresh_from_db()
+                continue
+            value = self.__dict__[attname]
+            self._original_state[attname] = copy.deepcopy(value) if isinstance(value, (dict, list, )) else value
+
+    def get_dirty_fields(self):
+        """
+        Returns list of names of fields which were modified since the object was loaded or saved.
+        """
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in self._original_state or self._original_state[field.attname] != self.__dict__[field.attname]:
+                dirty.append(field.name)
+        return dirty
+
+    def is_dirty(self):
+        return bool(self.get_dirty_fields())
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super(DirtyFieldsMixin, self).refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._reset_original_state()
+        else:
+            self._reset_original_state(attnames=[self._meta.get_field(name).attname for name in fields])
+
+    def save(self, *args, **kwargs):
+        if args or self._state.adding or self.pk is None or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+            # read it before saving, because Django resets "adding" flag when the object was inserted
+            partial = not args and not self._state.adding and self.pk is not None and not kwargs.get('force_insert')
+            result = super(DirtyFieldsMixin, self).save(*args, **kwargs)
+            _count(saved=1)
+            if partial and kwargs.get('update_fields') is not None:
+                # other modified fields were not written yet, so they must stay dirty
+                self._reset_original_state(attnames=[self._meta.get_field(name).attname for name in kwargs['update_fields']])
+            else:
+                self._reset_original_state()
+            return result
+        columns_total = len(self._meta.concrete_fields) - 1
+        dirty = self.get_dirty_fields()
+        if not dirty:
+            _count(skipped=1, columns_avoided=columns_total)
+            return None
+        update_fields = dirty + [
+            field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False) and field.name not in dirty
+        ]
+        kwargs['update_fields'] = update_fields
+        result = super(DirtyFieldsMixin, self).save(*args, **kwargs)
+        _count(saved=1, columns_avoided=columns_total - len(update_fields))
+        self._reset_original_state()
+        return result
@@ -7,6 +7,8 @@ from accounts import tasks as account_tasks
 from back import tasks as back_tasks
 from zen import zdomains
 from billing import tasks as billing_tasks
+from billing import documents as billing_documents
+from logs import rollups as logs_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -29,39 +31,15 @@ class Command(BaseCommand):
 
             back_tasks.sync_expired_domains(dry_run=dry_run)
 
-            account_tasks.check_notify_domain_expiring(
+            account_tasks.check_notify_domains_expiring(
                 dry_run=dry_run,
-                min_days_before_expire=0,
-                max_days_before_expire=2,
-                subject='domain_expire_in_1_day',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=2,
-                max_days_before_expire=5,
-                subject='domain_expire_in_3_days',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=4,
-                max_days_before_expire=7,
-                subject='domain_expire_in_5_days',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=7,
-                max_days_before_expire=30,
-                subject='domain_expire_soon',
-            )
-
-            account_tasks.check_notify_domain_expiring(
-                dry_run=dry_run,
-                min_days_before_expire=31,
-                max_days_before_expire=60,
-                subject='domain_expiring',
+                windows=[
+                    (0, 2, 'domain_expire_in_1_day', ),
+                    (2, 5, 'domain_expire_in_3_days', ),
+                    (4, 7, 'domain_expire_in_5_days', ),
+                    (7, 30, 'domain_expire_soon', ),
+                    (31, 60, 'domain_expiring', ),
+                ],
             )
 
             back_tasks.auto_renew_expiring_domains(
@@ -87,6 +65,12 @@ class Command(BaseCommand):
             # Remove started but not completed payments after 60 days
             billing_tasks.remove_unfinished_payments()
 
+            # Remove expired PDF documents of receipts and invoices
+            billing_documents.cache_cleanup()
+
+            # Add new request logs to the per-route latency histograms
+            logs_rollups.rollup_new_records()
+
             # TODO: other background periodical jobs to be placed here
 
             time.sleep(delay)
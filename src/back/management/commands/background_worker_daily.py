@@ -1,7 +1,12 @@
 import logging
+import datetime
 
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 
+from back.models.poll_message import PollMessage
+
+from logs import rollups as logs_rollups
 from logs.models import RequestLog
 
 from zen import zdomains, zmaster
@@ -18,6 +23,8 @@ class Command(BaseCommand):
         sync_to_be_deleted_domains_from_backend()
         # Need to clean up request logs
         cleanup_old_request_logs()
+        # Processed EPP poll messages are not needed anymore
+        cleanup_old_poll_messages()
 
 
 def sync_to_be_deleted_domains_from_backend():
@@ -44,3 +51,13 @@ def sync_to_be_deleted_domains_from_backend():
 def cleanup_old_request_logs():
     deleted = RequestLog.erase_old_records(num_records=100000)
     logger.info(f'Cleanup request logs: {deleted[0]}')
+    deleted_rollups = logs_rollups.cleanup(days=30)
+    logger.info(f'Cleanup request latency rollups: {deleted_rollups}')
+
+
+def cleanup_old_poll_messages(days=90):
+    deleted = PollMessage.messages.filter(
+        status='processed',
+        created__lt=timezone.now() - datetime.timedelta(days=days),
+    ).delete()
+    logger.info(f'Cleanup poll messages: {deleted[0]}')
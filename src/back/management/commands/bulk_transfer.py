@@ -0,0 +1,35 @@
+import time
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from board import bulk_transfers
+from board.models.bulk_transfer import BulkTransfer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = 'Executes bulk domain transfer job started from the board, interrupted job is continued from the first unfinished domain'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--record_id', type=int)
+        parser.add_argument('--workers', type=int, default=settings.ZENAIDA_BULK_TRANSFER_WORKERS)
+
+    def handle(self, record_id, workers, *args, **options):
+        started = time.time()
+        bulk_transfer = BulkTransfer.transfers.filter(id=record_id).first()
+        if not bulk_transfer:
+            raise CommandError('Record not found "%s"' % record_id)
+        try:
+            bulk_transfer = bulk_transfers.run_bulk_transfer(bulk_transfer, workers=workers)
+        except Exception as exc:
+            logger.exception('bulk transfer failed')
+            BulkTransfer.transfers.filter(id=record_id).update(status='failed')
+            self.stdout.write(self.style.ERROR('FAILED: %r' % exc))
+            return
+        self.stdout.write('bulk transfer results: {} succeeded, {} failed\n'.format(
+            bulk_transfer.succeeded_count, bulk_transfer.failed_count))
+        self.stdout.write(self.style.SUCCESS('Done in %.3f seconds' % (time.time() - started)))
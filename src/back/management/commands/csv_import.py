@@ -4,9 +4,11 @@ import logging
 
 from io import StringIO
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
 
-from back.csv_import import load_from_csv
+from back.csv_import import load_from_csv, snapshot_diff, diff_summary
 from board.models.csv_file_sync import CSVFileSync
 
 
@@ -18,10 +20,16 @@ class Command(BaseCommand):
         parser.add_argument('--record_id', type=int, default=-1)
         parser.add_argument('--filename', type=str, default='')
         parser.add_argument('--dry_run', action='store_true', dest='dry_run')
+        parser.add_argument('--workers', type=int, default=settings.ZENAIDA_CSV_IMPORT_WORKERS)
+        parser.add_argument('--batch_size', type=int, default=settings.ZENAIDA_CSV_IMPORT_BATCH_SIZE)
+        parser.add_argument('--start_position', type=int, default=0)
+        parser.add_argument('--changed_only', action='store_true', dest='changed_only')
+        parser.add_argument('--diff_only', action='store_true', dest='diff_only')
 
-    def handle(self, record_id, filename, dry_run, *args, **options):
+    def handle(self, record_id, filename, dry_run, workers, batch_size, start_position, changed_only, diff_only, *args, **options):
         started = time.time()
         log_stream = None
+        progress_callback = None
         if record_id >= 0:
             csv_sync_record = CSVFileSync.executions.filter(id=record_id).first()
             if not csv_sync_record:
@@ -37,6 +45,26 @@ class Command(BaseCommand):
             for one_logger in loggers:
                 one_logger.addHandler(string_handler)
 
+            # continue from the latest committed row if the previous execution was interrupted
+            start_position = max(start_position, csv_sync_record.position)
+
+            # only first failures are stored in the record, all of them are counted and present in the log
+            stored_failures = list(csv_sync_record.failures or [])
+
+            def progress_callback(position, processed, synchronized, failures, speed):
+                new_failures = failures[:max(0, settings.ZENAIDA_CSV_IMPORT_MAX_STORED_FAILURES - len(stored_failures))]
+                stored_failures.extend(new_failures)
+                changes = dict(
+                    position=position,
+                    processed_count=F('processed_count') + processed,
+                    synced_count=F('synced_count') + synchronized,
+                    failed_count=F('failed_count') + len(failures),
+                    speed=speed,
+                )
+                if new_failures:
+                    changes['failures'] = stored_failures
+                CSVFileSync.executions.filter(id=record_id).update(**changes)
+
         filename = os.path.expanduser(filename)
         if not os.path.isfile(filename):
             if record_id >= 0:
@@ -46,17 +74,40 @@ class Command(BaseCommand):
                 csv_sync_record.save()
             raise CommandError('File not found "%s"' % filename)
 
-        import_results = load_from_csv(filename, dry_run=dry_run, sync_after=True)
+        if diff_only:
+            diff = snapshot_diff(filename)
+            self.stdout.write('snapshot diff: {}\n'.format(diff_summary(diff)))
+            for label in ('added', 'changed', 'removed', ):
+                for domain in sorted(diff[label]):
+                    self.stdout.write('    {} {}\n'.format(label, domain))
+            return
+
+        try:
+            import_results = load_from_csv(
+                filename,
+                dry_run=dry_run,
+                sync_after=True,
+                batch_size=batch_size,
+                workers=workers,
+                start_position=start_position,
+                progress_callback=progress_callback,
+                changed_only=changed_only,
+            )
+        except Exception:
+            logging.getLogger(__name__).exception('csv import failed')
+            import_results = -1
 
         if record_id >= 0:
             csv_sync_record = CSVFileSync.executions.get(id=record_id)
             if import_results >= 0:
                 csv_sync_record.status = 'finished'
-                csv_sync_record.output_log = log_stream.getvalue()
-                csv_sync_record.processed_count = import_results
             else:
                 csv_sync_record.status = 'failed'
-                csv_sync_record.output_log = log_stream.getvalue()
+            # output log is stored only once when import is finished, very long log is truncated from the beginning
+            output_log = log_stream.getvalue()
+            if len(output_log) > settings.ZENAIDA_CSV_IMPORT_MAX_LOG_SIZE:
+                output_log = '...\n' + output_log[-settings.ZENAIDA_CSV_IMPORT_MAX_LOG_SIZE:]
+            csv_sync_record.output_log = output_log
             csv_sync_record.save()
 
         if import_results < 0:
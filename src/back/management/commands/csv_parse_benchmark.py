@@ -0,0 +1,86 @@
+import re
+import time
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import make_aware
+
+from back import csv_import
+
+
+CONTACT_FIELDS = [
+    'contact_id', 'civil_type', 'national_id', 'name', 'email', 'organisation', 'Phone', 'Phone_ext', 'fax', 'fax_ext',
+    'address_1', 'address_2', 'address_3', 'city', 'state_province', 'postalcode', 'countrycode',
+]
+
+SAMPLE_HEADERS = [
+    'client_id', 'client_name', 'client_email', 'client_phone', 'name', 'create_date', 'expiry_date', 'eppstatus', 'ds_rdata',
+] + ['NameServer_%d' % i for i in range(1, 13)] + [
+    '%s_%s' % (prefix, field) for prefix in ('registrant', 'billing', 'admin', 'technical', ) for field in CONTACT_FIELDS
+]
+
+
+def sample_row(i):
+    contact = [
+        'epp%dc' % i, '', '', 'Person %d' % i, 'person%d@example.com' % (i % 1000), 'Org%d' % i, '+1 (264) 111-%04d' % (i % 10000), '',
+        '+1.264.222.%04d' % (i % 10000), '', 'Somelaan %d' % i, '', '', 'Nie-Holland', 'Noord-Holland', '2121JE', 'NL',
+    ]
+    return [
+        'zenaida_ai', 'Zenaida.cate.ai', 'owner@example.com', '+1 264 111 2233', 'benchmark%d.ai' % i,
+        '20%02d-%02d-%02d' % (10 + i % 10, 1 + i % 12, 1 + i % 28), '2030-%02d-%02d' % (1 + i % 12, 1 + i % 28), ' Ok', '',
+    ] + ['ns%d.example.com' % n for n in range(1, 5)] + [''] * 8 + contact * 4
+
+
+def legacy_decode(csv_row, headers):
+    """
+    Previous implementation: dictionary built for every row, phone numbers cleaned with regular expression
+    and dates parsed with `strptime()`.
+    """
+    csv_record = csv_import.split_csv_row(csv_row, headers)
+    info = dict(
+        create_date=make_aware(datetime.datetime.strptime(csv_record.get('create_date_5'), '%Y-%m-%d', )),
+        expiry_date=make_aware(datetime.datetime.strptime(csv_record.get('expiry_date_6'), '%Y-%m-%d', )),
+        name=csv_record.get('name_4', ''),
+    )
+    for prefix, contact_prefix, start in (('registrant', 'registrant', 21), ('admin', 'admin', 55), ('tech', 'technical', 72), ('billing', 'billing', 38), ):
+        info[prefix] = dict(
+            person_name=csv_record.get('%s_name_%d' % (contact_prefix, start + 3), ''),
+            organization_name=csv_record.get('%s_organisation_%d' % (contact_prefix, start + 5), ''),
+            address_street=csv_record.get('%s_address_1_%d' % (contact_prefix, start + 10), ''),
+            address_city=csv_record.get('%s_city_%d' % (contact_prefix, start + 13), ''),
+            address_province=csv_record.get('%s_state_province_%d' % (contact_prefix, start + 14), ''),
+            address_postal_code=csv_record.get('%s_postalcode_%d' % (contact_prefix, start + 15), ''),
+            address_country=csv_record.get('%s_countrycode_%d' % (contact_prefix, start + 16), ''),
+            contact_voice=re.sub(r'[^\d^\+^\.]', '', csv_record.get('%s_phone_%d' % (contact_prefix, start + 6), ''))[:17],
+            contact_fax=re.sub(r'[^\d^\+^\.]', '', csv_record.get('%s_fax_%d' % (contact_prefix, start + 8), ''))[:17],
+            contact_email=csv_record.get('%s_email_%d' % (contact_prefix, start + 4), '').lower(),
+        )
+    info['registrant']['person_name'] = ''
+    info['nameservers'] = [csv_record.get('nameserver_%d_%d' % (n, n + 8), '') for n in range(1, 5)]
+    return info
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py csv_parse_benchmark --rows=100000
+
+    Synthetic registry export is generated in memory, no DB queries are executed.
+    """
+
+    help = 'Compares parsing rate of the registry CSV export rows with previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, dest='rows')
+
+    def handle(self, rows, *args, **options):
+        headers = list(SAMPLE_HEADERS)
+        csv_rows = [sample_row(i) for i in range(rows)]
+        for label, decode in (('legacy', legacy_decode, ), ('current', csv_import.get_csv_domain_info, ), ):
+            started = time.perf_counter()
+            for csv_row in csv_rows:
+                decode(csv_row, headers)
+            duration = time.perf_counter() - started
+            self.stdout.write('%s: %d rows in %.3f sec, %.0f rows per second\n' % (
+                label, rows, duration, rows / duration if duration else 0, ))
@@ -0,0 +1,35 @@
+import time
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from zen import zmaster
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = 'Background process to synchronize from back-end domains added to the refresh queue by a pool of threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', type=int, default=settings.ZENAIDA_DOMAINS_REFRESH_RATE_PER_MINUTE, dest='rate')
+        parser.add_argument('--delay', type=int, default=5, dest='delay')
+
+    def handle(self, rate, delay, *args, **options):
+        min_interval = 60.0 / max(1, rate)
+        latest_cleanup = 0
+        while True:
+            if time.time() - latest_cleanup > 60 * 10:
+                latest_cleanup = time.time()
+                zmaster.domains_refresh_cleanup()
+            started = time.time()
+            # domains are synchronized concurrently by the shared pool, requests not finished before the deadline
+            # keep running in the background and only free threads of the pool are used on the next iteration
+            result = zmaster.domains_refresh_process_batch()
+            count = len(result['synchronized']) + len(result['failed']) + len(result['deferred'])
+            if not count:
+                time.sleep(delay)
+                continue
+            time.sleep(max(0, min_interval * count - (time.time() - started)))
@@ -1,16 +1,13 @@
-import time
 import json
+import hashlib
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
 from django.core.management.base import BaseCommand, CommandError
 
-from django.template.loader import render_to_string
-
-from django.utils.html import strip_tags
-
 from accounts.models.account import Account
 
+from back import announcements
+
 
 class Command(BaseCommand):
     """
@@ -19,6 +16,10 @@ class Command(BaseCommand):
         ./venv/bin/python src/manage.py email_announcement --from=admin@from-address.com --select=all --template=email/maintenance.html --data={"subject": "system maintenance down-time"}
         ./venv/bin/python src/manage.py email_announcement --select=/tmp/emails_list.txt --template=email/migration.html --data={"subject": "Migration", "date": "20.05.2020"}
 
+    Delivery state of every recipient is stored in AnnouncementDelivery table.
+    When the command was interrupted, run it again with the same arguments (or the same --name) and
+    only recipients which did not receive the message yet will be processed.
+    Use --retry_failed to also send again to recipients where sending failed before.
     """
 
     help = 'Sending a email to multiple customers'
@@ -28,9 +29,13 @@ class Command(BaseCommand):
         parser.add_argument('-s', '--select', dest='select', default=None)
         parser.add_argument('-t', '--template', dest='template', default=None)
         parser.add_argument('-d', '--data', dest='data', default=None)
-        parser.add_argument('-i', '--interval', dest='interval', default=0.2)
+        parser.add_argument('-i', '--interval', dest='interval', type=float, default=0.2)
+        parser.add_argument('-n', '--name', dest='name', default=None)
+        parser.add_argument('-w', '--workers', dest='workers', type=int, default=1)
+        parser.add_argument('-b', '--batch_size', dest='batch_size', type=int, default=50)
+        parser.add_argument('--retry_failed', action='store_true', dest='retry_failed', default=False)
 
-    def handle(self, from_email, select, template, data, interval, *args, **options):
+    def handle(self, from_email, select, template, data, interval, name, workers, batch_size, retry_failed, *args, **options):
         if select is None:
             raise CommandError('Must select target customers: --select=all or --select=/tmp/emails_list.txt')
         if template is None:
@@ -43,7 +48,7 @@ class Command(BaseCommand):
                 # profile__email_notifications_enabled=True,
             ).exclude(
                 is_staff=True,
-            ):
+            ).select_related('profile'):
                 selected_users.append({
                     'email': user.email,
                     'person_name': (user.profile.person_name if hasattr(user, 'profile') else '') or 'dear Customer',
@@ -53,27 +58,25 @@ class Command(BaseCommand):
                 selected_users.append({
                     'email': user_email,
                 })
-        for to_user in selected_users:
-            context = json.loads(data)
-            to_email = to_user['email']
-            context['email'] = to_email
-            context['person_name'] = to_user.get('person_name', 'dear Customer')
-            try:
-                html_content = render_to_string(template, context=context, request=None)
-            except Exception as e:
-                raise CommandError('Failed rendering message body: %r' % e)
-            text_content = strip_tags(html_content)
-            msg = EmailMultiAlternatives(
-                subject=context.get('subject', 'Subject'),
-                body=text_content,
-                from_email=from_email,
-                to=[to_email, ],
-                bcc=[to_email, ],
-                cc=[to_email, ],
-            )
-            msg.attach_alternative(html_content, 'text/html')
-            if msg.send():
-                self.stdout.write(self.style.SUCCESS('message sent to %r' % to_email))
-            else:
-                self.stdout.write(self.style.ERROR('failed sending message to %r' % to_email))
-            time.sleep(interval)
+        context = json.loads(data or '{}')
+        try:
+            announcements.AnnouncementRenderer(template, context).render('test@example.com', None)
+        except Exception as e:
+            raise CommandError('Failed rendering message body: %r' % e)
+        if not name:
+            name = '%s:%s' % (template, hashlib.sha1((data or '').encode()).hexdigest()[:12], )
+        if retry_failed:
+            self.stdout.write('%d failed recipients will be processed again\n' % announcements.retry_failed(name))
+        report = announcements.send_announcement(
+            announcement=name,
+            template_name=template,
+            data=context,
+            from_email=from_email,
+            recipients=selected_users,
+            workers=workers,
+            batch_size=batch_size,
+            max_per_second=(1.0 / interval) if interval else None,
+        )
+        self.stdout.write(self.style.SUCCESS('announcement %r: %d sent, %d failed in %.3f seconds (%.2f per second)' % (
+            name, report['sent'], report['failed'], report['duration'], report['per_second'], )))
+        self.stdout.write('%r\n' % announcements.delivery_stats(name))
@@ -7,5 +7,16 @@ class Command(BaseCommand):
 
     help = 'Starts background process to "listen" EPP notifications from the back-end'
 
-    def handle(self, *args, **options):
-        zpoll.main()
+    def add_arguments(self, parser):
+        parser.add_argument('--no_drain', action='store_true', dest='no_drain')
+        parser.add_argument('--workers', type=int, default=None, dest='workers')
+        parser.add_argument('--queue_size', type=int, default=None, dest='queue_size')
+        parser.add_argument('--coalesce_window', type=int, default=None, dest='coalesce_window')
+
+    def handle(self, no_drain, workers, queue_size, coalesce_window, *args, **options):
+        zpoll.main(
+            drain=False if no_drain else None,
+            workers=workers,
+            queue_size=queue_size,
+            coalesce_window=coalesce_window,
+        )
@@ -0,0 +1,73 @@
+import time
+import json
+
+from django.core.management.base import BaseCommand
+
+from back.models.poll_message import PollMessage
+
+from lib import xml2json
+
+from zen import zpoll
+
+
+SAMPLE_MESSAGES = [
+    'Delete Completed: sample.ai',
+    'Restore Requested: sample.ai',
+    'Low balance alert: your account balance is below threshold',
+    '<offlineUpdate><domain><name>sample.ai</name><change>RENEWAL</change><details>Domain renewed</details></domain></offlineUpdate>',
+    '<offlineUpdate><domain><name>sample.ai</name><change>STATE_CHANGE</change><details>Domain status updated</details></domain></offlineUpdate>',
+    '<offlineUpdate><domain><name>sample.ai</name><change>NAMESERVERS_CHANGED</change><details>Nameservers updated</details></domain></offlineUpdate>',
+    '<offlineUpdate><domain><name>sample.ai</name><change>UNKNOWN</change><details/></domain></offlineUpdate>',
+]
+
+
+class XML2JsonOptions(object):
+    pretty = True
+
+
+def legacy_parse(msg_text):
+    try:
+        return json.loads(xml2json.xml2json(msg_text, XML2JsonOptions(), strip_ns=1, strip=1))
+    except:
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py epp_poll_benchmark --iterations=10000 --from_journal
+
+    """
+
+    help = 'Measures the cost of recognizing EPP poll messages, no handlers are executed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10000, dest='iterations')
+        parser.add_argument('--from_journal', action='store_true', dest='from_journal')
+        parser.add_argument('--journal_limit', type=int, default=1000, dest='journal_limit')
+
+    def handle(self, iterations, from_journal, journal_limit, *args, **options):
+        messages = list(SAMPLE_MESSAGES)
+        if from_journal:
+            messages = []
+            for payload in PollMessage.messages.order_by('-id').values_list('payload', flat=True)[:journal_limit]:
+                try:
+                    msg_element = payload['epp']['response']['msgQ']['msg']
+                except:
+                    continue
+                msg_text = msg_element.get('#text') if isinstance(msg_element, dict) else str(msg_element)
+                if msg_text:
+                    messages.append(msg_text)
+        if not messages:
+            self.stdout.write(self.style.ERROR('no poll messages found'))
+            return
+        for label, func in (('match_queue_message', zpoll.match_queue_message), ('legacy xml2json parse', legacy_parse), ):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for msg_text in messages:
+                    func(msg_text)
+            duration = time.perf_counter() - started
+            total = iterations * len(messages)
+            self.stdout.write('%s: %d messages in %.3f sec, %.2f usec per message\n' % (
+                label, total, duration, duration * 1000000.0 / total, ))
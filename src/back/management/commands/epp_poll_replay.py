@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from zen import zpoll
+from zen import zerrors
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py epp_poll_replay --status=failed --limit=1000
+
+    """
+
+    help = 'Process again EPP poll messages stored in the journal which were not processed or failed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='append', dest='statuses', choices=['received', 'deferred', 'failed', ])
+        parser.add_argument('--limit', type=int, default=None, dest='limit')
+        parser.add_argument('--dry_run', action='store_true', dest='dry_run')
+
+    def handle(self, statuses, limit, dry_run, *args, **options):
+        try:
+            report = zpoll.replay_poll_messages(
+                statuses=statuses or ('received', 'deferred', 'failed', ),
+                limit=limit,
+                dry_run=dry_run,
+            )
+        except zerrors.CommandInvalid as exc:
+            raise CommandError(str(exc))
+        for poll_message, result in report:
+            self.stdout.write('%r : %r\n' % (poll_message, result, ))
+        self.stdout.write(self.style.SUCCESS('Done, %d poll messages' % len(report)))
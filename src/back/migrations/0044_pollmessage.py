@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:12
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0043_blockedtransfer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('msg_id', models.CharField(max_length=64, unique=True)),
+                ('domain_name', models.CharField(blank=True, db_index=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('received', 'Received'), ('processed', 'Processed'), ('failed', 'Failed')], db_index=True, default='received', max_length=16)),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+            ],
+            options={
+                'base_manager_name': 'messages',
+                'default_manager_name': 'messages',
+            },
+            managers=[
+                ('messages', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
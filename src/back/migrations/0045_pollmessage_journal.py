@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0044_pollmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pollmessage',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pollmessage',
+            name='duration',
+            field=models.FloatField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='pollmessage',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='pollmessage',
+            name='processed',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pollmessage',
+            name='status',
+            field=models.CharField(choices=[('received', 'Received'), ('deferred', 'Deferred'), ('processed', 'Processed'), ('failed', 'Failed')], db_index=True, default='received', max_length=16),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('back', '0045_pollmessage_journal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DomainRefreshRequest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('domain_name', models.CharField(db_index=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('started', models.DateTimeField(blank=True, default=None, null=True)),
+                ('finished', models.DateTimeField(blank=True, default=None, null=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='domain_refresh_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'base_manager_name': 'refresh_requests',
+                'default_manager_name': 'refresh_requests',
+            },
+            managers=[
+                ('refresh_requests', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
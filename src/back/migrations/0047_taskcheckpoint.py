@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:20
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0046_domainrefreshrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('position', models.IntegerField(default=0)),
+                ('window_started', models.DateTimeField(blank=True, default=None, null=True)),
+                ('started', models.DateTimeField(blank=True, default=None, null=True)),
+                ('finished', models.DateTimeField(blank=True, default=None, null=True)),
+                ('duration', models.FloatField(blank=True, default=None, null=True)),
+                ('processed', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+            ],
+            options={
+                'base_manager_name': 'checkpoints',
+                'default_manager_name': 'checkpoints',
+            },
+            managers=[
+                ('checkpoints', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:05
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0047_taskcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnouncementDelivery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('announcement', models.CharField(db_index=True, max_length=128)),
+                ('email', models.CharField(max_length=255)),
+                ('person_name', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('sent', models.DateTimeField(blank=True, default=None, null=True)),
+                ('error', models.TextField(blank=True, default=None, null=True)),
+            ],
+            options={
+                'base_manager_name': 'deliveries',
+                'default_manager_name': 'deliveries',
+                'unique_together': {('announcement', 'email')},
+            },
+            managers=[
+                ('deliveries', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
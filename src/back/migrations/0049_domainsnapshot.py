@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:20
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0048_announcementdelivery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DomainSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'base_manager_name': 'snapshots',
+                'default_manager_name': 'snapshots',
+            },
+            managers=[
+                ('snapshots', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0049_domainsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcementdelivery',
+            name='claimed',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='announcementdelivery',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+def fail_duplicated_requests(apps, schema_editor):
+    DomainRefreshRequest = apps.get_model('back', 'DomainRefreshRequest')
+    seen = set()
+    duplicated_ids = []
+    for refresh_request in DomainRefreshRequest.objects.filter(
+        status__in=['pending', 'in_progress', ],
+    ).order_by('id').only('id', 'domain_name', 'owner_id'):
+        key = (refresh_request.domain_name, refresh_request.owner_id, )
+        if key in seen:
+            duplicated_ids.append(refresh_request.id)
+        else:
+            seen.add(key)
+    if duplicated_ids:
+        DomainRefreshRequest.objects.filter(id__in=duplicated_ids).update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0050_announcementdelivery_claimed'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicated_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='domainrefreshrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'in_progress'])), fields=('domain_name', 'owner'), name='unique_active_domain_refresh_request'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import models
+
+
+class AnnouncementDelivery(models.Model):
+
+    deliveries = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'deliveries'
+        default_manager_name = 'deliveries'
+        unique_together = (('announcement', 'email', ), )
+
+    # identifies one announcement, all recipients of the same announcement are sent only once
+    announcement = models.CharField(max_length=128, db_index=True)
+
+    email = models.CharField(max_length=255)
+
+    person_name = models.CharField(max_length=255, blank=True, default='')
+
+    status = models.CharField(
+        choices=(
+            ('pending', 'Pending', ),
+            ('sending', 'Sending', ),
+            ('sent', 'Sent', ),
+            ('failed', 'Failed', ),
+        ),
+        default='pending',
+        max_length=16,
+        db_index=True,
+    )
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    claimed = models.DateTimeField(null=True, blank=True, default=None)
+
+    sent = models.DateTimeField(null=True, blank=True, default=None)
+
+    error = models.TextField(null=True, blank=True, default=None)
+
+    def __str__(self):
+        return 'AnnouncementDelivery({} {} {})'.format(self.announcement, self.email, self.status)
+
+    def __repr__(self):
+        return 'AnnouncementDelivery({} {} {})'.format(self.announcement, self.email, self.status)
@@ -2,10 +2,11 @@ from django.core.validators import validate_email
 from django.db import models
 
 from accounts.models.account import Account
+from back.dirty_fields import DirtyFieldsMixin
 from back.validators import CountryField, phone_regex
 
 
-class Contact(models.Model):
+class Contact(DirtyFieldsMixin, models.Model):
 
     contacts = models.Manager()
 
@@ -66,7 +67,7 @@ class Contact(models.Model):
         return bool(self.admin_domains.first() or self.billing_domains.first() or self.tech_domains.first())
 
 
-class Registrant(models.Model):
+class Registrant(DirtyFieldsMixin, models.Model):
     
     registrants = models.Manager()
 
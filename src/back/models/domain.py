@@ -6,6 +6,7 @@ from django.utils import timezone
 
 from accounts.models.account import Account
 
+from back.dirty_fields import DirtyFieldsMixin
 from back.models.zone import Zone
 from back.models.contact import Contact, Registrant
 from back.models.registrar import Registrar
@@ -15,7 +16,7 @@ from zen.zdomains import validate_domain_name
 logger = logging.getLogger(__name__)
 
 
-class Domain(models.Model):
+class Domain(DirtyFieldsMixin, models.Model):
 
     domains = models.Manager()
 
@@ -0,0 +1,50 @@
+from django.db import models
+
+from accounts.models.account import Account
+
+
+class DomainRefreshRequest(models.Model):
+
+    refresh_requests = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'refresh_requests'
+        default_manager_name = 'refresh_requests'
+        constraints = [
+            # only one active request per domain and owner can be waiting in the queue
+            models.UniqueConstraint(
+                fields=['domain_name', 'owner', ],
+                condition=models.Q(status__in=['pending', 'in_progress', ]),
+                name='unique_active_domain_refresh_request',
+            ),
+        ]
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    domain_name = models.CharField(max_length=255, db_index=True)
+
+    owner = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name='domain_refresh_requests', null=True, blank=True)
+
+    status = models.CharField(
+        choices=(
+            ('pending', 'Pending', ),
+            ('in_progress', 'In Progress', ),
+            ('done', 'Done', ),
+            ('failed', 'Failed', ),
+        ),
+        default='pending',
+        max_length=16,
+        db_index=True,
+    )
+
+    started = models.DateTimeField(null=True, blank=True, default=None)
+
+    finished = models.DateTimeField(null=True, blank=True, default=None)
+
+    def __str__(self):
+        return 'DomainRefreshRequest({} {})'.format(self.domain_name, self.status)
+
+    def __repr__(self):
+        return 'DomainRefreshRequest({} {})'.format(self.domain_name, self.status)
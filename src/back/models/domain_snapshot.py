@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class DomainSnapshot(models.Model):
+    """
+    Content hash of the domain record from the latest reconciled registry CSV export.
+    """
+
+    snapshots = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'snapshots'
+        default_manager_name = 'snapshots'
+
+    name = models.CharField(max_length=255, unique=True)
+
+    content_hash = models.CharField(max_length=64)
+
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return 'DomainSnapshot({} {})'.format(self.name, self.content_hash)
+
+    def __repr__(self):
+        return 'DomainSnapshot({} {})'.format(self.name, self.content_hash)
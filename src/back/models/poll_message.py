@@ -0,0 +1,47 @@
+from django.db import models
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class PollMessage(models.Model):
+
+    messages = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'messages'
+        default_manager_name = 'messages'
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    msg_id = models.CharField(max_length=64, unique=True)
+
+    domain_name = models.CharField(max_length=255, blank=True, default='', db_index=True)
+
+    status = models.CharField(
+        choices=(
+            ('received', 'Received', ),
+            ('deferred', 'Deferred', ),
+            ('processed', 'Processed', ),
+            ('failed', 'Failed', ),
+        ),
+        default='received',
+        max_length=16,
+        db_index=True,
+    )
+
+    payload = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+
+    processed = models.DateTimeField(null=True, blank=True, default=None)
+
+    duration = models.FloatField(null=True, blank=True, default=None)
+
+    attempts = models.IntegerField(default=0)
+
+    error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return 'PollMessage({} {} {})'.format(self.msg_id, self.domain_name or '?', self.status)
+
+    def __repr__(self):
+        return 'PollMessage({} {} {})'.format(self.msg_id, self.domain_name or '?', self.status)
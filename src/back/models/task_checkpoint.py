@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class TaskCheckpoint(models.Model):
+
+    checkpoints = models.Manager()
+
+    class Meta:
+        app_label = 'back'
+        base_manager_name = 'checkpoints'
+        default_manager_name = 'checkpoints'
+
+    name = models.CharField(max_length=64, unique=True)
+
+    # ID of the latest processed object, next iteration will continue from here
+    position = models.IntegerField(default=0)
+
+    window_started = models.DateTimeField(null=True, blank=True, default=None)
+
+    started = models.DateTimeField(null=True, blank=True, default=None)
+
+    finished = models.DateTimeField(null=True, blank=True, default=None)
+
+    duration = models.FloatField(null=True, blank=True, default=None)
+
+    processed = models.IntegerField(default=0)
+
+    skipped = models.IntegerField(default=0)
+
+    failed = models.IntegerField(default=0)
+
+    def __str__(self):
+        return 'TaskCheckpoint({} {})'.format(self.name, self.position)
+
+    def __repr__(self):
+        return 'TaskCheckpoint({} {})'.format(self.name, self.position)
@@ -1,10 +1,15 @@
+import time
 import logging
 import datetime
 
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
+from django.db import close_old_connections, connection
 from django.utils import timezone
 
 from back.models.domain import Domain
+from back.models.task_checkpoint import TaskCheckpoint
 from back.models.back_end_renew import BackEndRenew
 
 from accounts import notifications
@@ -16,11 +21,33 @@ from epp import rpc_error
 
 from zen import zmaster
 from zen import zusers
+from zen import zcache
 
 logger = logging.getLogger(__name__)
 
 
-def sync_expired_domains(dry_run=True):
+def _sync_expired_domain(domain_name):
+    try:
+        return zmaster.domain_synchronize_from_backend(
+            domain_name=domain_name,
+            create_new_owner_allowed=False,
+            domain_transferred_away=True,
+            soft_delete=True,
+        )
+    except Exception as exc:
+        logger.exception('failed to synchronize expired domain %r' % domain_name)
+        return [exc, ]
+
+
+def _sync_expired_domain_in_thread(domain_name):
+    close_old_connections()
+    try:
+        return _sync_expired_domain(domain_name)
+    finally:
+        connection.close()
+
+
+def sync_expired_domains(dry_run=True, batch_size=None, workers=None, window_minutes=None):
     """
     When domain is expired COCCA back-end suppose to suspend it and send polling notification to Zenaida.
     But it is also possible that COCCA move it to another registrar - for example to put it on auction.
@@ -28,27 +55,74 @@ def sync_expired_domains(dry_run=True):
     To workaround that we can keep track of all domains that are just expired few minutes ago and fetch the actual
     info from COCCA back-end for those. This way Zenaida will recognize the latest status of the domain and take
     required actions: remove domain from Zenaida DB.
+    Domains are processed in batches ordered by ID, after every batch the position is stored in `TaskCheckpoint`,
+    so the next call continues from there if previous iteration was interrupted.
+    Domains already synchronized during the current window of `window_minutes` are skipped.
     """
+    if batch_size is None:
+        batch_size = settings.ZENAIDA_SYNC_EXPIRED_DOMAINS_BATCH_SIZE
+    if workers is None:
+        workers = settings.ZENAIDA_SYNC_EXPIRED_DOMAINS_WORKERS
+    if window_minutes is None:
+        window_minutes = settings.ZENAIDA_SYNC_EXPIRED_DOMAINS_WINDOW_MINUTES
+    started = time.time()
     moment_now = timezone.now()
+    if dry_run:
+        # nothing is written to the DB in dry run mode, a copy of the checkpoint is used only to read the position
+        checkpoint = TaskCheckpoint.checkpoints.filter(name='sync_expired_domains').first() or TaskCheckpoint(name='sync_expired_domains')
+    else:
+        checkpoint, _ = TaskCheckpoint.checkpoints.get_or_create(name='sync_expired_domains')
+    if not checkpoint.window_started or checkpoint.window_started < moment_now - datetime.timedelta(minutes=window_minutes):
+        checkpoint.window_started = moment_now
+        checkpoint.position = 0
+    elif checkpoint.position:
+        logger.info('continue synchronizing expired domains after ID %d', checkpoint.position)
+    checkpoint.started = moment_now
+    checkpoint.processed = 0
+    checkpoint.skipped = 0
+    checkpoint.failed = 0
     expired_active_domains = Domain.domains.filter(
         expiry_date__lte=moment_now,
         status__in=['active', 'suspended', ],
     ).exclude(
         epp_id=None,
-    )
+    ).order_by('id')
     report = []
-    for expired_domain in expired_active_domains:
-        logger.info('domain %r is expired, going to synchronize from back-end', expired_domain)
+    while True:
+        batch = list(expired_active_domains.filter(id__gt=checkpoint.position)[:batch_size])
+        if not batch:
+            break
+        to_be_synchronized = []
+        for expired_domain in batch:
+            if expired_domain.latest_sync_date and expired_domain.latest_sync_date >= checkpoint.window_started:
+                checkpoint.skipped += 1
+                continue
+            logger.info('domain %r is expired, going to synchronize from back-end', expired_domain)
+            to_be_synchronized.append(expired_domain)
         if dry_run:
-            result = []
+            results = [[] for _ in range(len(to_be_synchronized))]
+        elif workers > 1 and len(to_be_synchronized) > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync-expired-domains') as executor:
+                results = list(executor.map(_sync_expired_domain_in_thread, [d.name for d in to_be_synchronized]))
         else:
-            result = zmaster.domain_synchronize_from_backend(
-                domain_name=expired_domain.name,
-                create_new_owner_allowed=False,
-                domain_transferred_away=True,
-                soft_delete=True,
-            )
-        report.append((expired_domain, result, ))
+            results = [_sync_expired_domain(d.name) for d in to_be_synchronized]
+        for expired_domain, result in zip(to_be_synchronized, results):
+            if dry_run or (result and result[-1] and not isinstance(result[-1], Exception)):
+                checkpoint.processed += 1
+            else:
+                checkpoint.failed += 1
+            report.append((expired_domain, result, ))
+        checkpoint.position = batch[-1].id
+        if not dry_run:
+            checkpoint.save()
+    # full pass is finished, next iteration will start from the beginning and skip already synchronized domains
+    checkpoint.position = 0
+    checkpoint.finished = timezone.now()
+    checkpoint.duration = time.time() - started
+    if not dry_run:
+        checkpoint.save()
+    logger.info('sync_expired_domains finished in %.3f seconds: %d processed, %d skipped, %d failed',
+                checkpoint.duration, checkpoint.processed, checkpoint.skipped, checkpoint.failed)
     return report
 
 
@@ -331,6 +405,7 @@ def complete_back_end_auto_renewals(critical_days_before_delete=15, dry_run=Fals
                     domain=renewal.domain.name,
                     remove_statuses_list=[{'name': 'clientUpdateProhibited', }],
                 )
+                zcache.invalidate_domain_info(renewal.domain.name)
             except rpc_error.EPPError as exc:
                 logger.exception('domain %s failed to remove clientUpdateProhibited status: %r' % (renewal.domain, exc, ))
                 report.append(('delete_failed', renewal.domain.name, renewal.owner.email, renewal.previous_expiry_date, ))
@@ -341,12 +416,14 @@ def complete_back_end_auto_renewals(critical_days_before_delete=15, dry_run=Fals
                     domain=renewal.domain.name,
                     remove_statuses_list=[{'name': 'clientDeleteProhibited', }],
                 )
+                zcache.invalidate_domain_info(renewal.domain.name)
             except rpc_error.EPPError as exc:
                 logger.exception('domain %s failed to remove clientDeleteProhibited status: %r' % (renewal.domain, exc, ))
                 report.append(('delete_failed', renewal.domain.name, renewal.owner.email, renewal.previous_expiry_date, ))
                 continue
         try:
             rpc_client.cmd_domain_delete(renewal.domain.name)
+            zcache.invalidate_domain_info(renewal.domain.name)
         except rpc_error.EPPError as exc:
             logger.exception('domain %s delete request failed: %r' % (renewal.domain, exc, ))
             report.append(('delete_failed', renewal.domain.name, renewal.owner.email, renewal.previous_expiry_date, ))
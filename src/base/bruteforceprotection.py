@@ -9,6 +9,11 @@ logger = logging.getLogger(__name__)
 
 
 class BruteForceProtection(object):
+    """
+    Counts attempts made with given key within `timeout` seconds since the first attempt.
+    Counter is changed with atomic `incr()` and `add()` cache operations, so parallel requests served by
+    different processes are all counted and in most cases only one round trip to the cache server is needed.
+    """
 
     def __init__(self, cache_key_prefix, key, max_attempts, timeout):
         self.cache_key = f"{cache_key_prefix}_{key}"
@@ -22,16 +27,30 @@ class BruteForceProtection(object):
         return self._local_value if self._local_value else 0
 
     def increase_total_attempts(self):
-        self.read_total_attempts()
-        if not self._local_value:
-            self._local_value = 0
-        self._local_value += 1
-        cache.set(self.cache_key, self._local_value, timeout=self.timeout)
+        try:
+            self._local_value = cache.incr(self.cache_key)
+        except ValueError:
+            # this is the first attempt or the counter already expired
+            if cache.add(self.cache_key, 1, timeout=self.timeout):
+                self._local_value = 1
+            else:
+                try:
+                    # counter was just created by another process
+                    self._local_value = cache.incr(self.cache_key)
+                except ValueError:
+                    # cache server is not reachable or the counter expired right now, fall back to non-atomic update
+                    self._local_value = self.read_total_attempts() + 1
+                    cache.set(self.cache_key, self._local_value, timeout=self.timeout)
         logger.debug('bruteforceprotection.increase_total_attempts key=%r %r', self.cache_key, self._local_value)
         return self._local_value
 
+    def is_blocked(self):
+        """
+        Only checks the counter without registering a new attempt.
+        """
+        return self.read_total_attempts() >= self.max_attempts
+
     def register_attempt(self):
-        total_attempts = self.read_total_attempts()
-        if total_attempts >= self.max_attempts:
+        total_attempts = self.increase_total_attempts()
+        if total_attempts > self.max_attempts:
             raise ExceededMaxAttemptsException
-        self.increase_total_attempts()
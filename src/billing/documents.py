@@ -0,0 +1,105 @@
+import os
+import time
+import logging
+import hashlib
+import tempfile
+
+import pdfkit  # @UnresolvedImport
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def render_pdf(rendered_html):
+    """
+    Converts HTML to PDF and returns raw bytes, the document is kept in memory and no temporary files are shared.
+    """
+    return pdfkit.from_string(rendered_html, False)
+
+
+def cache_key(*parts):
+    return hashlib.sha1(':'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+def profile_fingerprint(profile):
+    """
+    Returns short hash of all stored fields of the user profile, so cached documents are rendered again
+    when name or address of the customer was changed.
+    """
+    if not profile:
+        return None
+    return cache_key(*[getattr(profile, field.attname) for field in profile._meta.concrete_fields])
+
+
+def _cache_path(key):
+    return os.path.join(settings.ZENAIDA_BILLING_PDF_CACHE_DIR, key[:2], key + '.pdf')
+
+
+def cache_read(key):
+    """
+    Returns previously stored PDF document or None if it was not found or already expired.
+    """
+    if not settings.ZENAIDA_BILLING_PDF_CACHE_DIR:
+        return None
+    file_path = _cache_path(key)
+    try:
+        if time.time() - os.path.getmtime(file_path) > settings.ZENAIDA_BILLING_PDF_CACHE_TTL_SECONDS:
+            return None
+        with open(file_path, 'rb') as pdf_file:
+            return pdf_file.read()
+    except (IOError, OSError):
+        return None
+
+
+def cache_write(key, pdf_raw):
+    if not settings.ZENAIDA_BILLING_PDF_CACHE_DIR:
+        return False
+    file_path = _cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # file is written under unique name first and then renamed, so parallel readers never see a partial document
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(pdf_raw)
+        os.replace(tmp_path, file_path)
+    except (IOError, OSError):
+        logger.exception('failed to write PDF document to cache')
+        return False
+    return True
+
+
+def build_pdf(key, render_html):
+    """
+    Returns cached PDF document for given key, or renders new one with `render_html()` callback and stores it.
+    """
+    pdf_raw = cache_read(key)
+    if pdf_raw is not None:
+        return pdf_raw
+    pdf_raw = render_pdf(render_html())
+    cache_write(key, pdf_raw)
+    return pdf_raw
+
+
+def cache_cleanup():
+    """
+    Removes expired documents and temporary files left by interrupted writes from the cache folder.
+    Returns number of removed files.
+    """
+    if not settings.ZENAIDA_BILLING_PDF_CACHE_DIR or not os.path.isdir(settings.ZENAIDA_BILLING_PDF_CACHE_DIR):
+        return 0
+    removed = 0
+    expire_before = time.time() - settings.ZENAIDA_BILLING_PDF_CACHE_TTL_SECONDS
+    for dir_path, _, file_names in os.walk(settings.ZENAIDA_BILLING_PDF_CACHE_DIR):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            try:
+                if os.path.getmtime(file_path) < expire_before:
+                    os.remove(file_path)
+                    removed += 1
+            except (IOError, OSError):
+                logger.exception('failed to remove cached PDF document %r', file_path)
+    if removed:
+        logger.info('removed %d expired PDF documents from cache', removed)
+    return removed
@@ -0,0 +1,72 @@
+import time
+import tempfile
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models.account import Account
+
+from billing import orders
+from billing.models.order import Order
+from billing.models.order_item import OrderItem
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py billing_receipt_benchmark --email=tester@zenaida.ai --orders=2000
+
+    Temporary orders are created for the account within the previous year, 12-months receipt is built
+    first with empty PDF cache and then again from the cache. All created records are rolled back at the end.
+    """
+
+    help = 'Measures building time of 12-months PDF receipt for a large account'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', type=str, dest='email')
+        parser.add_argument('--orders', type=int, default=2000, dest='orders_count')
+        parser.add_argument('--items', type=int, default=2, dest='items')
+
+    def handle(self, email, orders_count, items, *args, **options):
+        owner = Account.users.filter(email=email).first()
+        if not owner:
+            raise CommandError('Account %r not found' % email)
+        year = timezone.now().year - 1
+        with transaction.atomic():
+            self.prepare_orders(owner, year, orders_count, items)
+            with override_settings(ZENAIDA_BILLING_PDF_CACHE_DIR=tempfile.mkdtemp(prefix='receipt_benchmark_')):
+                for label in ('cold', 'cached', ):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        pdf_info = orders.build_receipt(owner=owner, year=year)
+                        duration = time.perf_counter() - started
+                    self.stdout.write('%s: %d orders, %d bytes, %d SQL queries, %.3f sec\n' % (
+                        label, orders_count, len(pdf_info['body']), len(queries), duration, ))
+            transaction.set_rollback(True)
+
+    def prepare_orders(self, owner, year, orders_count, items_count):
+        order_objects = []
+        for i in range(orders_count):
+            finished_at = timezone.make_aware(datetime.datetime(year, 1 + i % 12, 1 + i % 28, 12, 0, 0))
+            order_objects.append(Order(
+                owner=owner,
+                started_at=finished_at,
+                finished_at=finished_at,
+                status='processed',
+                description='benchmark',
+            ))
+        order_objects = Order.orders.bulk_create(order_objects)
+        if not order_objects or order_objects[0].id is None:
+            order_objects = list(Order.orders.filter(owner=owner, description='benchmark'))
+        OrderItem.order_items.bulk_create([OrderItem(
+            order=order,
+            price=100.0,
+            type='domain_renew',
+            name='benchmark%d-%d.ai' % (order.id, j, ),
+            status='processed',
+        ) for order in order_objects for j in range(items_count)])
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:10
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0021_alter_orderitem_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('orders_count', models.IntegerField(default=0)),
+                ('items_count', models.IntegerField(default=0)),
+                ('total_payment', models.FloatField(default=0.0)),
+                ('totals_by_type', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('new_users', models.IntegerField(default=0)),
+                ('updated', models.DateTimeField()),
+            ],
+            options={
+                'base_manager_name': 'summaries',
+                'default_manager_name': 'summaries',
+            },
+            managers=[
+                ('summaries', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
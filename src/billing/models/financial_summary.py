@@ -0,0 +1,34 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class FinancialSummary(models.Model):
+
+    summaries = models.Manager()
+
+    class Meta:
+        app_label = 'billing'
+        base_manager_name = 'summaries'
+        default_manager_name = 'summaries'
+
+    # first day of the month
+    month = models.DateField(unique=True)
+
+    orders_count = models.IntegerField(default=0)
+
+    items_count = models.IntegerField(default=0)
+
+    total_payment = models.FloatField(default=0.0)
+
+    # item type -> {"count": ..., "amount": ...}
+    totals_by_type = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    new_users = models.IntegerField(default=0)
+
+    updated = models.DateTimeField()
+
+    def __str__(self):
+        return 'FinancialSummary({} {} items ${})'.format(self.month.strftime('%Y-%m'), self.items_count, self.total_payment)
+
+    def __repr__(self):
+        return 'FinancialSummary({} {} items ${})'.format(self.month.strftime('%Y-%m'), self.items_count, self.total_payment)
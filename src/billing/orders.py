@@ -1,18 +1,17 @@
 import logging
-import os
 import calendar
 from datetime import timedelta
 
-import pdfkit  # @UnresolvedImport
-
 from django import shortcuts
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Max, Min, Q
 from django.utils import timezone
 from django.core.exceptions import SuspiciousOperation
 from django.template.loader import get_template
 
+from billing import documents
 from billing import exceptions
+from billing import summaries
 from billing.models.order import Order
 from billing.models.order_item import OrderItem
 
@@ -106,6 +105,13 @@ def list_processed_orders_by_date_for_specific_user(owner, year, month=None):
     """
     List only processed orders by date for given user.
     """
+    return list(processed_orders_by_date_for_specific_user(owner, year, month=month).all())
+
+
+def processed_orders_by_date_for_specific_user(owner, year, month=None):
+    """
+    Same as `list_processed_orders_by_date_for_specific_user()`, but returns not evaluated QuerySet.
+    """
     if year and month:
         orders = Order.orders.filter(
             owner=owner,
@@ -124,7 +130,7 @@ def list_processed_orders_by_date_for_specific_user(owner, year, month=None):
             owner=owner,
             status='processed',
         ).order_by('-finished_at')
-    return list(orders.all())
+    return orders
 
 
 def list_all_processed_orders_by_date(year, month=None):
@@ -579,6 +585,11 @@ def execute_order(order_object, already_processed=False):
             new_status = 'incomplete'
     order_object.status = new_status
     order_object.save()
+    if new_status == 'processed':
+        try:
+            summaries.order_finished(order_object)
+        except:
+            logger.exception('failed to update financial summary for %r' % order_object)
     logger.info('updated status for %r : "%s" -> "%s"' % (order_object, current_status, new_status))
     return new_status
 
@@ -615,6 +626,11 @@ def refresh_order(order_object):
             new_status = 'incomplete'
     order_object.status = new_status
     order_object.save()
+    if new_status == 'processed' and current_status != 'processed':
+        try:
+            summaries.order_finished(order_object)
+        except:
+            logger.exception('failed to update financial summary for %r' % order_object)
     logger.debug('refreshed status for %r from "%s" to "%s"' % (order_object, current_status, new_status))
     return new_status
 
@@ -634,19 +650,27 @@ def build_receipt(owner, year=None, month=None, order_id=None):
     """
     Creates detailed report in PDF format about all orders for given user.
     Optionally selects orders for given period.
+    Finished documents are cached: the key includes number of orders, the latest `finished_at` moment
+    and all fields of the user profile, so receipts of already closed periods are never rendered again.
     """
-    order_objects = []
     if order_id:
         order_object = by_id(order_id)
         if not order_object:
             return None
         if not order_object.finished_at:
             return None
-        order_objects.append(order_object)
+        orders_query = Order.orders.filter(id=order_object.id)
         receipt_period = order_object.finished_at.strftime('%B %Y')
+        key = documents.cache_key('receipt', owner.id, 'order', order_object.id, order_object.finished_at.isoformat(),
+                                  documents.profile_fingerprint(getattr(owner, 'profile', None)))
     else:
-        order_objects = list_processed_orders_by_date_for_specific_user(owner=owner, year=year, month=month)
-        if not order_objects:
+        orders_query = processed_orders_by_date_for_specific_user(owner=owner, year=year, month=month)
+        summary = orders_query.aggregate(
+            orders_count=Count('id'),
+            first_finished_at=Min('finished_at'),
+            last_finished_at=Max('finished_at'),
+        )
+        if not summary['orders_count']:
             return None
         if year and month:
             month_label = calendar.month_name[int(month)]
@@ -654,35 +678,32 @@ def build_receipt(owner, year=None, month=None, order_id=None):
         elif year:
             receipt_period = f'{year}'
         else:
-            receipt_period = order_objects[-1].finished_at.strftime('%B %Y')
-
-    domain_orders = []
-    total_price = 0
-    for order in order_objects:
-        for order_item in order.items.all():
-            domain_orders.append({
-                'domain_name': order_item.name,
-                'transaction_date': order.finished_at.strftime('%d %B %Y'),
-                'transaction_type': order_item.get_type_display().replace('Domain ', ''),
-                'price': int(order_item.price)
-            })
-            total_price += int(order_item.price)
-
-    # Fill html template with the domain orders and user profile info
-    html_template = get_template('billing/billing_receipt.html')
-    rendered_html = html_template.render({
-        'domain_orders': domain_orders,
-        'user_profile': owner.profile,
-        'total_price': total_price,
-        'receipt_period': receipt_period
-    })
-
-    # Create pdf file from a html file
-    pdfkit.from_string(rendered_html, '/tmp/out.pdf')
-    with open("/tmp/out.pdf", "rb") as pdf_file:
-        pdf_raw = pdf_file.read()
-    os.remove("/tmp/out.pdf")
+            receipt_period = summary['first_finished_at'].strftime('%B %Y')
+        key = documents.cache_key('receipt', owner.id, year, month, summary['orders_count'], summary['last_finished_at'].isoformat(),
+                                  documents.profile_fingerprint(getattr(owner, 'profile', None)))
+
+    def _render_html():
+        domain_orders = []
+        total_price = 0
+        for order in orders_query.prefetch_related('items'):
+            for order_item in order.items.all():
+                domain_orders.append({
+                    'domain_name': order_item.name,
+                    'transaction_date': order.finished_at.strftime('%d %B %Y'),
+                    'transaction_type': order_item.get_type_display().replace('Domain ', ''),
+                    'price': int(order_item.price)
+                })
+                total_price += int(order_item.price)
+        # Fill html template with the domain orders and user profile info
+        html_template = get_template('billing/billing_receipt.html')
+        return html_template.render({
+            'domain_orders': domain_orders,
+            'user_profile': owner.profile,
+            'total_price': total_price,
+            'receipt_period': receipt_period
+        })
+
     return {
-        'body': pdf_raw,
+        'body': documents.build_pdf(key, _render_html),
         'filename': '{}_receipt.pdf'.format(receipt_period.replace(' ', '_')),
     }
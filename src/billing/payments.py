@@ -1,13 +1,11 @@
-import os
 import string
 import random
 
-import pdfkit  # @UnresolvedImport
-
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
 from django.template.loader import get_template
 
+from billing import documents
 from billing.models.payment import Payment
 
 
@@ -115,19 +113,23 @@ def finish_payment(transaction_id, status, merchant_reference=None, notes=None):
 def build_invoice(payment_object):
     """
     Generates PDF document with invoice representing single payment record.
+    Finished document is cached until the payment or the user profile is changed.
     """
-    # Fill html template with the domain orders and user profile info
-    html_template = get_template('billing/billing_invoice.html')
-    rendered_html = html_template.render({
-        'payment': payment_object,
-        'user_profile': payment_object.owner.profile,
-    })
-    # Create pdf file from a html file
-    pdfkit.from_string(rendered_html, '/tmp/out.pdf')
-    with open("/tmp/out.pdf", "rb") as pdf_file:
-        pdf_raw = pdf_file.read()
-    os.remove("/tmp/out.pdf")
+    key = documents.cache_key(
+        'invoice', payment_object.owner_id, payment_object.id, payment_object.status,
+        payment_object.amount, payment_object.finished_at.isoformat() if payment_object.finished_at else None,
+        documents.profile_fingerprint(getattr(payment_object.owner, 'profile', None)),
+    )
+
+    def _render_html():
+        # Fill html template with the domain orders and user profile info
+        html_template = get_template('billing/billing_invoice.html')
+        return html_template.render({
+            'payment': payment_object,
+            'user_profile': payment_object.owner.profile,
+        })
+
     return {
-        'body': pdf_raw,
+        'body': documents.build_pdf(key, _render_html),
         'filename': 'invoice_{}.pdf'.format(payment_object.transaction_id),
     }
@@ -0,0 +1,135 @@
+import logging
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from accounts.models.account import Account
+
+from billing.models.financial_summary import FinancialSummary
+from billing.models.order import Order
+from billing.models.order_item import OrderItem
+
+
+logger = logging.getLogger(__name__)
+
+
+def month_end(year, month):
+    if month == 12:
+        return timezone.make_aware(datetime.datetime(year + 1, 1, 1))
+    return timezone.make_aware(datetime.datetime(year, month + 1, 1))
+
+
+def processed_order_items(year, month=None):
+    """
+    Returns QuerySet of all items of processed orders finished within given year or month.
+    """
+    order_items = OrderItem.order_items.filter(
+        order__status='processed',
+        order__finished_at__year=year,
+    )
+    if month:
+        order_items = order_items.filter(order__finished_at__month=month)
+    return order_items
+
+
+def calculate_month(year, month):
+    """
+    Aggregates processed orders and new users of given month on the DB side and stores result in FinancialSummary.
+    """
+    totals_by_type = {}
+    items_count = 0
+    total_payment = 0.0
+    for item_type, count, amount in processed_order_items(year, month).values_list('type').annotate(
+        count=Count('id'),
+        amount=Sum('price'),
+    ).order_by('type'):
+        totals_by_type[item_type] = {'count': count, 'amount': amount or 0.0, }
+        items_count += count
+        total_payment += amount or 0.0
+    summary, _ = FinancialSummary.summaries.update_or_create(
+        month=datetime.date(year, month, 1),
+        defaults=dict(
+            orders_count=Order.orders.filter(
+                status='processed',
+                finished_at__year=year,
+                finished_at__month=month,
+            ).count(),
+            items_count=items_count,
+            total_payment=total_payment,
+            totals_by_type=totals_by_type,
+            new_users=Account.users.filter(date_joined__year=year, date_joined__month=month).count(),
+            updated=timezone.now(),
+        ),
+    )
+    logger.debug('calculated %r', summary)
+    return summary
+
+
+def month_summary(year, month):
+    """
+    Returns FinancialSummary of given month.
+    Summary calculated after the month was finished is never changed and returned right away,
+    summary of the current month is calculated again.
+    """
+    year, month = int(year), int(month)
+    summary = FinancialSummary.summaries.filter(month=datetime.date(year, month, 1)).first()
+    if summary and summary.updated >= month_end(year, month):
+        return summary
+    return calculate_month(year, month)
+
+
+def period_summary(year, month=None):
+    """
+    Returns dictionary with totals of the whole year or a single month.
+    """
+    months = [int(month), ] if month else range(1, 13)
+    result = {
+        'orders_count': 0,
+        'items_count': 0,
+        'total_payment': 0.0,
+        'totals_by_type': {},
+        'new_users': 0,
+    }
+    today = timezone.now().date()
+    for m in months:
+        if datetime.date(int(year), m, 1) > today:
+            continue
+        summary = month_summary(year, m)
+        result['orders_count'] += summary.orders_count
+        result['items_count'] += summary.items_count
+        result['total_payment'] += summary.total_payment
+        result['new_users'] += summary.new_users
+        for item_type, totals in summary.totals_by_type.items():
+            type_totals = result['totals_by_type'].setdefault(item_type, {'count': 0, 'amount': 0.0, })
+            type_totals['count'] += totals['count']
+            type_totals['amount'] += totals['amount']
+    return result
+
+
+def order_finished(order_object):
+    """
+    Must be called when order was processed to keep summary of that month up to date.
+    Items of the order are added to already existing summary of that month, the whole month is not calculated again.
+    When summary does not exist yet it will be calculated on the first read by `month_summary()`.
+    """
+    if order_object.status != 'processed' or not order_object.finished_at:
+        return None
+    finished_at = timezone.localtime(order_object.finished_at) if timezone.is_aware(order_object.finished_at) else order_object.finished_at
+    with transaction.atomic():
+        summary = FinancialSummary.summaries.select_for_update().filter(
+            month=datetime.date(finished_at.year, finished_at.month, 1),
+        ).first()
+        if not summary:
+            return None
+        for item_type, price in order_object.items.values_list('type', 'price'):
+            type_totals = summary.totals_by_type.setdefault(item_type, {'count': 0, 'amount': 0.0, })
+            type_totals['count'] += 1
+            type_totals['amount'] += price or 0.0
+            summary.items_count += 1
+            summary.total_payment += price or 0.0
+        summary.orders_count += 1
+        summary.save()
+    logger.debug('added %r to %r', order_object, summary)
+    return summary
@@ -3,10 +3,25 @@ from django.contrib import admin
 from nested_admin import NestedModelAdmin  # @UnresolvedImport
 
 from board.models.csv_file_sync import CSVFileSync
+from board.models.bulk_transfer import BulkTransfer, BulkTransferItem
 
 
 class CSVFileSyncAdmin(NestedModelAdmin):
     pass
 
 
+class BulkTransferAdmin(NestedModelAdmin):
+
+    list_display = ('created_at', 'new_owner', 'status', 'total_count', 'processed_count', 'succeeded_count', 'failed_count', )
+
+
+class BulkTransferItemAdmin(NestedModelAdmin):
+
+    list_display = ('bulk_transfer', 'position', 'domain_name', 'status', 'price', 'finished_at', )
+    list_filter = ('status', )
+    search_fields = ('domain_name', )
+
+
 admin.site.register(CSVFileSync, CSVFileSyncAdmin)
+admin.site.register(BulkTransfer, BulkTransferAdmin)
+admin.site.register(BulkTransferItem, BulkTransferItemAdmin)
@@ -0,0 +1,329 @@
+import logging
+import datetime
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models.account import Account
+
+from billing import orders
+from billing.models.order_item import OrderItem
+
+from board.models.bulk_transfer import BulkTransfer, BulkTransferItem
+
+from epp import rpc_error
+
+from zen import zmaster, zdomains
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_line(line):
+    """
+    Returns tuple (domain_name, auth_code) from a single input line, or None if the line is not valid.
+    """
+    line = line.strip()
+    for separator in (',', ';', '|', ' ', ):
+        if line.count(separator):
+            parts = [p.strip() for p in line.split(separator, 1)]
+            if parts[0] and parts[1]:
+                return parts[0], parts[1]
+            return None
+    return None
+
+
+def start_bulk_transfer(new_owner, body):
+    """
+    Creates BulkTransfer record with an item for every non-empty input line, the job is executed by `run_bulk_transfer()`.
+    """
+    bulk_transfer = BulkTransfer.transfers.create(new_owner=new_owner)
+    items = []
+    for position, line in enumerate(body.split('\n'), start=1):
+        if not line.strip():
+            continue
+        parsed = parse_line(line)
+        if not parsed:
+            items.append(BulkTransferItem(
+                bulk_transfer=bulk_transfer,
+                position=position,
+                status='failed',
+                result='invalid input line',
+                finished_at=timezone.now(),
+            ))
+            continue
+        items.append(BulkTransferItem(
+            bulk_transfer=bulk_transfer,
+            position=position,
+            domain_name=parsed[0],
+            auth_code=parsed[1][:64],
+        ))
+    BulkTransferItem.items.bulk_create(items)
+    failed_count = len([i for i in items if i.status == 'failed'])
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(
+        total_count=len(items),
+        processed_count=failed_count,
+        failed_count=failed_count,
+    )
+    bulk_transfer.refresh_from_db()
+    return bulk_transfer
+
+
+def finish_item(item, status, result):
+    """
+    Stores result of a single domain right away and updates counters of the whole job.
+    """
+    item.status = status
+    item.result = result
+    item.finished_at = timezone.now()
+    item.save(update_fields=['status', 'result', 'finished_at', ])
+    BulkTransfer.transfers.filter(pk=item.bulk_transfer_id).update(
+        processed_count=F('processed_count') + 1,
+        succeeded_count=F('succeeded_count') + (1 if status == 'succeeded' else 0),
+        failed_count=F('failed_count') + (1 if status == 'failed' else 0),
+        updated_at=timezone.now(),
+    )
+    logger.info('bulk transfer of %s finished with %s: %s', item.domain_name, status, result)
+
+
+def mark_item(item, status):
+    """
+    Changes status of a single domain which is not finished yet, also shows that the job is still alive.
+    """
+    item.status = status
+    item.save(update_fields=['status', ])
+    BulkTransfer.transfers.filter(pk=item.bulk_transfer_id).update(updated_at=timezone.now())
+
+
+def check_item(item, new_owner):
+    """
+    Reads domain info from the back-end and verifies that transfer is possible.
+    Returns error message, or None when the item was marked as "checked" with known price.
+    """
+    domain_name = item.domain_name
+    auth_code = item.auth_code
+    domain_obj = zdomains.domain_find(domain_name=domain_name)
+    if not domain_obj:
+        return 'domain does not exist'
+    if domain_obj.owner_id == new_owner.pk:
+        return 'domain is already owned by %r' % new_owner
+    outputs = zmaster.domain_read_info(
+        domain=domain_name,
+        auth_info=auth_code,
+        return_outputs=True,
+    )
+    if not outputs:
+        return 'domain name is not registered or transfer is not possible at the moment'
+    if isinstance(outputs[-1], rpc_error.EPPAuthorizationError):
+        if outputs[-1].message.lower().count('incorrect authcode provided'):
+            return 'incorrect authorization code provided'
+        return 'you are not authorized to transfer this domain'
+    if isinstance(outputs[-1], rpc_error.EPPAuthorizationInvalidError):
+        if outputs[-1].message.lower().count('invalid authorization information'):
+            return 'invalid authorization information provided'
+        return 'you are not authorized to transfer this domain'
+    if isinstance(outputs[-1], rpc_error.EPPObjectNotExist):
+        return 'domain name is not registered'
+    if isinstance(outputs[-1], rpc_error.EPPError):
+        return 'domain transfer failed due to unexpected error, please try again later'
+    if not outputs[-1].get(domain_name):
+        return 'domain name is not registered'
+    if len(outputs) < 2:
+        return 'domain name transfer is not possible at the moment, please try again later'
+    info = outputs[-2]
+    current_registrar = info['epp']['response']['resData']['infData']['clID']
+    current_statuses = info['epp']['response']['resData']['infData']['status']
+    current_statuses = [current_statuses, ] if not isinstance(current_statuses, list) else current_statuses
+    current_statuses = [s['@s'] for s in current_statuses]
+    pw = info['epp']['response']['resData']['infData']['authInfo']['pw']
+    if pw != 'Authinfo Correct' and pw != auth_code:
+        return 'given transfer code is not correct'
+    if 'clientTransferProhibited' in current_statuses or 'serverTransferProhibited' in current_statuses:
+        return 'transfer failed because domain was locked or auth code was wrong'
+    if len(orders.find_pending_domain_transfer_order_items(domain_name)):
+        return 'domain transfer is already in progress'
+    if current_registrar.lower() in [settings.ZENAIDA_AUCTION_REGISTRAR_ID.lower(), settings.ZENAIDA_REGISTRAR_ID.lower()]:
+        item.price = 0.0
+    else:
+        item.price = settings.ZENAIDA_DOMAIN_PRICE
+    item.internal = current_registrar.lower() == settings.ZENAIDA_REGISTRAR_ID.lower()
+    item.save(update_fields=['price', 'internal', ])
+    mark_item(item, 'checked')
+    return None
+
+
+def _check_item(item, new_owner):
+    try:
+        error = check_item(item, new_owner)
+    except Exception as exc:
+        logger.exception('bulk transfer check of %s failed', item.domain_name)
+        error = 'domain transfer failed due to unexpected error: %r' % exc
+    if error:
+        finish_item(item, 'failed', error)
+        return None
+    return item
+
+
+def _check_item_in_thread(item, new_owner):
+    close_old_connections()
+    try:
+        return _check_item(item, new_owner)
+    finally:
+        connection.close()
+
+
+def verify_balance(bulk_transfer, items):
+    """
+    Verifies account balance once for all checked items: items are accepted in the input order until the sum
+    of their prices exceeds current balance, others are marked as failed.
+    Funds are not held here, they are deducted later by execution of every transfer order, so if the balance
+    was spent in the meantime the order of that item fails and the item is marked as failed.
+    Returns list of accepted items.
+    """
+    new_owner = Account.users.get(pk=bulk_transfer.new_owner_id)
+    available = new_owner.balance
+    accepted = []
+    for item in items:
+        if item.price > available:
+            finish_item(item, 'failed', 'account %r does not have enough funds to complete domain transfer' % new_owner.email)
+            continue
+        available -= item.price
+        accepted.append(item)
+    return accepted
+
+
+def recover_interrupted_items(bulk_transfer):
+    """
+    Finds items which were interrupted during the transfer stage of the previous run.
+    If transfer order was already created for the item, the item is finished according to the order status,
+    otherwise it is returned back to "checked" status and will be transferred again.
+    """
+    for item in bulk_transfer.items.filter(status='transferring').order_by('position'):
+        order_item = OrderItem.order_items.filter(
+            type='domain_transfer',
+            name=item.domain_name,
+            order__owner_id=bulk_transfer.new_owner_id,
+            order__started_at__gte=bulk_transfer.created_at,
+        ).select_related('order').order_by('-id').first()
+        if not order_item:
+            mark_item(item, 'checked')
+            continue
+        finish_item(
+            item,
+            'succeeded' if order_item.order.status in ('processed', 'processing', ) else 'failed',
+            'found %r created before the job was interrupted, order status is %r' % (order_item.order, order_item.order.status, ),
+        )
+
+
+def transfer_items(items, new_owner_id):
+    """
+    Creates and executes transfer orders for given items one by one.
+    """
+    # every group of items is using own copy of the account object, because balance is modified during order execution
+    new_owner = Account.users.get(pk=new_owner_id)
+    for item in items:
+        # item is marked before the order is created, so the order will not be created again if the job is interrupted
+        mark_item(item, 'transferring')
+        try:
+            transfer_order = orders.order_single_item(
+                owner=new_owner,
+                item_type='domain_transfer',
+                item_price=item.price,
+                item_name=item.domain_name,
+                item_details={
+                    'transfer_code': item.auth_code,
+                    'rewrite_contacts': True,
+                    'internal': item.internal,
+                },
+            )
+            new_status = orders.execute_order(transfer_order)
+        except Exception as exc:
+            logger.exception('bulk transfer of %s failed', item.domain_name)
+            finish_item(item, 'failed', 'domain transfer failed due to unexpected error: %r' % exc)
+            continue
+        finish_item(
+            item,
+            'succeeded' if new_status in ('processed', 'processing', ) else 'failed',
+            'created and executed %r, order status is %r' % (transfer_order, new_status, ),
+        )
+
+
+def _transfer_items_in_thread(items, new_owner_id):
+    close_old_connections()
+    try:
+        return transfer_items(items, new_owner_id)
+    finally:
+        connection.close()
+
+
+def run_bulk_transfer(bulk_transfer, workers=None):
+    """
+    Executes the job in three stages:
+        1. domain info is read from the back-end for all items by `workers` parallel threads
+        2. account balance is verified once for all transferable domains
+        3. transfer orders are executed by `workers` parallel threads, internal transfers are executed one by one
+           in the same thread because they all modify contacts of the new owner
+    Result of every item is stored as soon as it is finished, so interrupted job can be started again
+    and continues with the items which were not finished yet.
+    """
+    if workers is None:
+        workers = settings.ZENAIDA_BULK_TRANSFER_WORKERS
+    new_owner = bulk_transfer.new_owner
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(status='started', updated_at=timezone.now())
+    recover_interrupted_items(bulk_transfer)
+    #--- check stage
+    pending_items = list(bulk_transfer.items.filter(status='pending').order_by('position'))
+    if workers > 1 and len(pending_items) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_check_item_in_thread, pending_items, [new_owner] * len(pending_items)))
+    else:
+        for item in pending_items:
+            _check_item(item, new_owner)
+    #--- balance stage
+    checked_items = list(bulk_transfer.items.filter(status='checked').order_by('position'))
+    accepted_items = verify_balance(bulk_transfer, checked_items)
+    #--- transfer stage
+    groups = [[item, ] for item in accepted_items if not item.internal]
+    internal_items = [item for item in accepted_items if item.internal]
+    if internal_items:
+        groups.insert(0, internal_items)
+    if workers > 1 and len(groups) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_transfer_items_in_thread, groups, [new_owner.pk] * len(groups)))
+    else:
+        for group in groups:
+            transfer_items(group, new_owner.pk)
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(status='finished', updated_at=timezone.now())
+    bulk_transfer.refresh_from_db()
+    logger.info('%r finished', bulk_transfer)
+    return bulk_transfer
+
+
+def fail_stale_transfers(stale_minutes=None):
+    """
+    Marks as failed started jobs which were not updated for too long, for example the process was killed.
+    Such job can be continued by `bulk_transfer` management command.
+    """
+    if stale_minutes is None:
+        stale_minutes = settings.ZENAIDA_BULK_TRANSFER_STALE_MINUTES
+    stale_count = BulkTransfer.transfers.filter(
+        status='started',
+        updated_at__lt=timezone.now() - datetime.timedelta(minutes=stale_minutes),
+    ).update(status='failed')
+    if stale_count:
+        logger.warning('%d bulk transfers were not updated for %d minutes and marked as failed', stale_count, stale_minutes)
+    return stale_count
+
+
+def build_report(bulk_transfer):
+    """
+    Returns text report with result of every item of the job.
+    """
+    lines = []
+    for item in bulk_transfer.items.all().order_by('position'):
+        lines.append(('[%s] %s' % (item.domain_name, item.result or item.status, )).strip())
+    return '\n'.join(lines) + '\n'
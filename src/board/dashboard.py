@@ -48,6 +48,11 @@ class CustomIndexDashboard(Dashboard):
                     'url': reverse('sending_single_email'),
                     'external': False,
                 },
+                {
+                    'title': _('Request latency report'),
+                    'url': reverse('request_latency_report'),
+                    'external': False,
+                },
                 {
                     'title': _('Bulk domain transfer'),
                     'url': reverse('bulk_transfer'),
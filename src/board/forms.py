@@ -15,6 +15,32 @@ class DomainSyncForm(forms.Form):
     domain_name = forms.fields.CharField(label='Domain Name')
 
 
+class RequestLatencyReportForm(forms.Form):
+    minutes = forms.fields.TypedChoiceField(
+        label='Window',
+        coerce=int,
+        initial=60,
+        choices=(
+            (15, 'last 15 minutes', ),
+            (60, 'last hour', ),
+            (60 * 6, 'last 6 hours', ),
+            (60 * 24, 'last day', ),
+            (60 * 24 * 7, 'last week', ),
+        ),
+    )
+    order_by = forms.fields.ChoiceField(
+        label='Order by',
+        initial='p95',
+        choices=(
+            ('p95', 'p95', ),
+            ('p99', 'p99', ),
+            ('p50', 'p50', ),
+            ('count', 'requests', ),
+            ('error_rate', 'error rate', ),
+        ),
+    )
+
+
 class CSVFileSyncForm(forms.Form):
     csv_file = forms.fields.FileField()
     dry_run = forms.fields.BooleanField(
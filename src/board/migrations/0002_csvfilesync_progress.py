@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='failed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='failures',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='position',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='speed',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='synced_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='csvfilesync',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('board', '0002_csvfilesync_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkTransfer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('started', 'STARTED'), ('finished', 'FINISHED'), ('failed', 'FAILED')], default='started', max_length=10)),
+                ('total_count', models.IntegerField(default=0)),
+                ('processed_count', models.IntegerField(default=0)),
+                ('succeeded_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('new_owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_transfers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'base_manager_name': 'transfers',
+                'default_manager_name': 'transfers',
+            },
+            managers=[
+                ('transfers', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BulkTransferItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField(default=0)),
+                ('domain_name', models.CharField(blank=True, default='', max_length=255)),
+                ('auth_code', models.CharField(blank=True, default='', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('checked', 'CHECKED'), ('succeeded', 'SUCCEEDED'), ('failed', 'FAILED')], db_index=True, default='pending', max_length=10)),
+                ('price', models.FloatField(blank=True, default=None, null=True)),
+                ('internal', models.BooleanField(default=False)),
+                ('result', models.TextField(blank=True, default='')),
+                ('finished_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('bulk_transfer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='board.bulktransfer')),
+            ],
+            options={
+                'ordering': ['position'],
+                'base_manager_name': 'items',
+                'default_manager_name': 'items',
+            },
+            managers=[
+                ('items', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0003_bulktransfer'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulktransferitem',
+            name='status',
+            field=models.CharField(choices=[('pending', 'PENDING'), ('checked', 'CHECKED'), ('transferring', 'TRANSFERRING'), ('succeeded', 'SUCCEEDED'), ('failed', 'FAILED')], db_index=True, default='pending', max_length=16),
+        ),
+    ]
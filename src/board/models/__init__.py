@@ -1 +1,2 @@
 from board.models.csv_file_sync import CSVFileSync
+from board.models.bulk_transfer import BulkTransfer, BulkTransferItem
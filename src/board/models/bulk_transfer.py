@@ -0,0 +1,99 @@
+from django.db import models
+
+from accounts.models.account import Account
+
+
+class BulkTransfer(models.Model):
+
+    transfers = models.Manager()
+
+    class Meta:
+        app_label = 'board'
+        base_manager_name = 'transfers'
+        default_manager_name = 'transfers'
+
+    # related fields:
+    # items -> board.models.bulk_transfer.BulkTransferItem
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    new_owner = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='bulk_transfers')
+
+    status = models.CharField(
+        max_length=10,
+        choices=(
+            ('started', 'STARTED', ),
+            ('finished', 'FINISHED', ),
+            ('failed', 'FAILED', ),
+        ),
+        default='started',
+    )
+
+    total_count = models.IntegerField(default=0)
+
+    processed_count = models.IntegerField(default=0)
+
+    succeeded_count = models.IntegerField(default=0)
+
+    failed_count = models.IntegerField(default=0)
+
+    @property
+    def progress(self):
+        if not self.total_count:
+            return 100
+        return int(100.0 * self.processed_count / self.total_count)
+
+    def __str__(self):
+        return 'BulkTransfer({} {}:{}/{})'.format(self.new_owner.email, self.status, self.processed_count, self.total_count)
+
+    def __repr__(self):
+        return 'BulkTransfer({} {}:{}/{})'.format(self.new_owner.email, self.status, self.processed_count, self.total_count)
+
+
+class BulkTransferItem(models.Model):
+
+    items = models.Manager()
+
+    class Meta:
+        app_label = 'board'
+        base_manager_name = 'items'
+        default_manager_name = 'items'
+        ordering = ['position']
+
+    bulk_transfer = models.ForeignKey(BulkTransfer, on_delete=models.CASCADE, related_name='items')
+
+    # line number in the input list
+    position = models.IntegerField(default=0)
+
+    domain_name = models.CharField(max_length=255, blank=True, default='')
+
+    auth_code = models.CharField(max_length=64, blank=True, default='')
+
+    status = models.CharField(
+        max_length=16,
+        choices=(
+            ('pending', 'PENDING', ),
+            ('checked', 'CHECKED', ),
+            ('transferring', 'TRANSFERRING', ),
+            ('succeeded', 'SUCCEEDED', ),
+            ('failed', 'FAILED', ),
+        ),
+        default='pending',
+        db_index=True,
+    )
+
+    price = models.FloatField(null=True, blank=True, default=None)
+
+    internal = models.BooleanField(default=False)
+
+    result = models.TextField(blank=True, default='')
+
+    finished_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    def __str__(self):
+        return 'BulkTransferItem({} {})'.format(self.domain_name, self.status)
+
+    def __repr__(self):
+        return 'BulkTransferItem({} {})'.format(self.domain_name, self.status)
@@ -32,6 +32,20 @@ class CSVFileSync(models.Model):
 
     processed_count = models.IntegerField(default=0)
 
+    # position of the latest CSV row which was completely processed, import is continued from the next row
+    position = models.IntegerField(default=0)
+
+    failed_count = models.IntegerField(default=0)
+
+    synced_count = models.IntegerField(default=0)
+
+    # rows per second
+    speed = models.FloatField(default=0.0)
+
+    failures = models.JSONField(default=list, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True, null=True)
+
     @property
     def filename(self):
         return os.path.basename(self.input_filename)
@@ -1,6 +1,6 @@
 import os
 import sys
-import time
+import csv
 import logging
 import tempfile
 import subprocess
@@ -9,7 +9,7 @@ from django import shortcuts
 from django.conf import settings
 from django.contrib import messages
 from django.core.mail import EmailMultiAlternatives
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db import transaction
 from django.urls import reverse, reverse_lazy
 from django.utils.safestring import mark_safe
@@ -22,17 +22,17 @@ from django.utils.html import strip_tags
 from django_otp import devices_for_user
 
 from accounts.models import Account
-from accounts.users import list_all_users_by_date
 
 from base.mixins import StaffRequiredMixin
 
 from billing import forms as billing_forms, payments
-from billing import orders
+from billing import summaries
 
+from board import bulk_transfers
 from board import forms as board_forms
-from board.models import CSVFileSync
+from board.models import CSVFileSync, BulkTransfer
 
-from epp import rpc_error
+from logs import rollups
 
 from zen import zmaster, zdomains
 
@@ -96,32 +96,62 @@ class FinancialReportView(StaffRequiredMixin, FormView):
     template_name = 'board/financial_report.html'
     form_class = billing_forms.FilterOrdersByDateForm
     success_url = reverse_lazy('financial_report')
+    # full list of the items is available via CSV export
+    max_items_displayed = 1000
 
     def form_valid(self, form):
         year = form.cleaned_data.get('year')
         month = form.cleaned_data.get('month')
         if year or (year and month):
-            orders_for_specific_time = orders.list_all_processed_orders_by_date(
-                year=form.data.get('year'),
-                month=form.data.get('month')
-            )
-            order_items = []
-            total_payment = 0
-            for order in orders_for_specific_time:
-                for order_item in order.items.all():
-                    order_items.append(order_item)
-                    total_payment += order_item.price
+            summary = summaries.period_summary(year=int(year), month=month or None)
+            order_items = list(summaries.processed_order_items(
+                year=year,
+                month=month or None,
+            ).select_related('order').order_by('-order__finished_at')[:self.max_items_displayed])
             return self.render_to_response(
                 self.get_context_data(
                     form=form,
                     object_list=order_items,
-                    total_payment_by_users=total_payment,
-                    total_registered_users=len(list_all_users_by_date(year, month))
+                    summary=summary,
+                    total_items=summary['items_count'],
+                    total_payment_by_users=summary['total_payment'],
+                    total_registered_users=summary['new_users'],
+                    csv_export_query='year=%s&month=%s' % (year, month or '', ),
                 )
             )
         return super().form_valid(form)
 
 
+class _EchoBuffer(object):
+
+    def write(self, value):
+        return value
+
+
+class FinancialReportCSVView(StaffRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        form = billing_forms.FilterOrdersByDateForm(request.GET)
+        if not form.is_valid() or not form.cleaned_data.get('year'):
+            messages.error(request, 'Please select year or month of the report')
+            return shortcuts.redirect('financial_report')
+        year = form.cleaned_data['year']
+        month = form.cleaned_data.get('month') or None
+        order_items = summaries.processed_order_items(year=year, month=month).order_by('order__finished_at', 'id').values_list(
+            'order__finished_at', 'order_id', 'order__owner__email', 'type', 'name', 'price', 'status',
+        )
+        writer = csv.writer(_EchoBuffer())
+
+        def _rows():
+            yield writer.writerow(['finished_at', 'order_id', 'owner', 'type', 'domain_name', 'price', 'status', ])
+            for row in order_items.iterator(chunk_size=2000):
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(_rows(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename=financial_report_%s%s.csv' % (year, ('_%s' % month) if month else '', )
+        return response
+
+
 class NotExistingDomainSyncView(StaffRequiredMixin, FormView):
     template_name = 'board/not_existing_domain_sync.html'
     form_class = board_forms.DomainSyncForm
@@ -149,6 +179,25 @@ class NotExistingDomainSyncView(StaffRequiredMixin, FormView):
         return super().form_valid(form)
 
 
+class RequestLatencyReportView(StaffRequiredMixin, FormView):
+    template_name = 'board/request_latency_report.html'
+    form_class = board_forms.RequestLatencyReportForm
+    success_url = reverse_lazy('request_latency_report')
+
+    def form_valid(self, form):
+        # only one batch of new records is added here, the rest is processed by the background worker
+        rollups.rollup_new_records(max_batches=1)
+        return self.render_to_response(
+            self.get_context_data(
+                form=form,
+                object_list=rollups.latency_report(
+                    minutes=form.cleaned_data['minutes'],
+                    order_by=form.cleaned_data['order_by'],
+                ),
+            )
+        )
+
+
 class CSVFileSyncRecordView(StaffRequiredMixin, DetailView):
     template_name = 'board/csv_file_sync_record.html'
 
@@ -273,136 +322,54 @@ class AuthCodesDownloadView(StaffRequiredMixin, View):
 class BulkTransferResultDownloadView(StaffRequiredMixin, View):
 
     def dispatch(self, request, *args, **kwargs):
-        file_name = '%s.txt' % kwargs.get('file_id')
-        file_path = f'/tmp/{file_name}'
-        if not os.path.isfile(file_path):
-            messages.warning(request, "Invalid request, file not exist")
+        bulk_transfer = BulkTransfer.transfers.filter(pk=kwargs.get('record_id')).first()
+        if not bulk_transfer:
+            messages.warning(request, "Invalid request, bulk transfer not exist")
             return shortcuts.redirect('index')
-        response = HttpResponse(open(file_path, 'rt').read(), content_type='text/plain')
+        file_name = f"bulk_transfer_{bulk_transfer.total_count}_domains_{bulk_transfer.created_at.strftime('%Y%m%d%H%M%S')}.txt"
+        response = HttpResponse(bulk_transfers.build_report(bulk_transfer), content_type='text/plain')
         response['Content-Disposition'] = f'attachment; filename={file_name}'
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.exception(f'was not able to delete file {file_path}: {e}')
         return response
 
 
+class BulkTransferRecordView(StaffRequiredMixin, DetailView):
+    template_name = 'board/bulk_transfer_record.html'
+
+    def get_object(self, queryset=None):
+        bulk_transfers.fail_stale_transfers()
+        return shortcuts.get_object_or_404(BulkTransfer, pk=self.kwargs.get('record_id'))
+
+
 class BulkTransferView(StaffRequiredMixin, FormView, FormMixin):
     template_name = 'board/bulk_transfer.html'
     form_class = board_forms.BulkTransferForm
     success_url = reverse_lazy('bulk_transfer')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        bulk_transfers.fail_stale_transfers()
+        context['bulk_transfer_records'] = BulkTransfer.transfers.all().order_by('-pk')[:20]
+        return context
+
     def form_valid(self, form):
         new_owner_email = form.cleaned_data.get('new_owner')
         body = form.cleaned_data.get('body')
         new_owner = Account.objects.filter(email=new_owner_email).first()
-        report = []
-        processed_count = 0
         if not new_owner:
             messages.warning(self.request, 'This user does not exist.')
             return super().form_valid(form)
-        try:
-            for line in body.split('\n'):
-                if line.count(','):
-                    domain_name, auth_code = line.strip().split(',')
-                elif line.strip().count(';'):
-                    domain_name, auth_code = line.strip().split(';')
-                elif line.strip().count('|'):
-                    domain_name, auth_code = line.strip().split('|')
-                elif line.strip().count(' '):
-                    domain_name, auth_code = line.strip().split(' ')
-                else:
-                    report.append(('', 'invlid input line', ))
-                    continue
-                domain_obj = zdomains.domain_find(domain_name=domain_name)
-                if not domain_obj:
-                    report.append((domain_name, 'domain does not exist', ))
-                    continue
-                if domain_obj.owner == new_owner:
-                    report.append((domain_name, 'domain is already owned by %r' % new_owner, ))
-                    continue
-                outputs = zmaster.domain_read_info(
-                    domain=domain_name,
-                    auth_info=auth_code,
-                    return_outputs=True,
-                )
-                if not outputs:
-                    report.append((domain_name, 'domain name is not registered or transfer is not possible at the moment', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPAuthorizationError):
-                    if outputs[-1].message.lower().count('incorrect authcode provided'):
-                        report.append((domain_name, 'incorrect authorization code provided', ))
-                    else:
-                        report.append((domain_name, 'you are not authorized to transfer this domain', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPAuthorizationInvalidError):
-                    if outputs[-1].message.lower().count('invalid authorization information'):
-                        report.append((domain_name, 'invalid authorization information provided', ))
-                    else:
-                        report.append((domain_name, 'you are not authorized to transfer this domain', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPObjectNotExist):
-                    report.append((domain_name, 'domain name is not registered', ))
-                    continue
-                if isinstance(outputs[-1], rpc_error.EPPError):
-                    report.append((domain_name, 'domain transfer failed due to unexpected error, please try again later', ))
-                    continue
-                if not outputs[-1].get(domain_name):
-                    report.append((domain_name, 'domain name is not registered', ))
-                    continue
-                if len(outputs) < 2:
-                    report.append((domain_name, 'domain name transfer is not possible at the moment, please try again later', ))
-                    continue
-                info = outputs[-2]
-                current_registrar = info['epp']['response']['resData']['infData']['clID']
-                if current_registrar.lower() == settings.ZENAIDA_REGISTRAR_ID.lower():
-                    internal = True
-                current_statuses = info['epp']['response']['resData']['infData']['status']
-                current_statuses = [current_statuses, ] if not isinstance(current_statuses, list) else current_statuses
-                current_statuses = [s['@s'] for s in current_statuses]
-                pw = info['epp']['response']['resData']['infData']['authInfo']['pw']
-                if pw != 'Authinfo Correct' and pw != auth_code:
-                    report.append((domain_name, 'given transfer code is not correct', ))
-                    continue
-                if 'clientTransferProhibited' in current_statuses or 'serverTransferProhibited' in current_statuses:
-                    report.append((domain_name, 'transfer failed because domain was locked or auth code was wrong', ))
-                    continue
-                if len(orders.find_pending_domain_transfer_order_items(domain_name)):
-                    report.append((domain_name, 'domain transfer is already in progress', ))
-                    continue
-                if current_registrar.lower() in [settings.ZENAIDA_AUCTION_REGISTRAR_ID.lower(), settings.ZENAIDA_REGISTRAR_ID.lower()]:
-                    price = 0.0
-                else:
-                    price = settings.ZENAIDA_DOMAIN_PRICE
-                if price > new_owner.balance:
-                    report.append((domain_name, 'account %r does not have enough funds to complete domain transfer', ))
-                    continue
-                transfer_order = orders.order_single_item(
-                    owner=new_owner,
-                    item_type='domain_transfer',
-                    item_price=price,
-                    item_name=domain_name,
-                    item_details={
-                        'transfer_code': auth_code,
-                        'rewrite_contacts': True,
-                        'internal': internal,
-                    },
-                )
-                new_status = orders.execute_order(transfer_order)
-                report.append((domain_name, 'created and executed %r, order status is %r' % (transfer_order, new_status, ), ))
-                if new_status == 'processed':
-                    processed_count += 1
-            txt = ''
-            counter = 0
-            for item in report:
-                txt += ('[%s] %s' % (item[0], item[1], )).strip() + '\n'
-                counter += 1
-            file_name = f"bulk_transfer_{counter}_domains_{time.strftime('%Y%m%d%H%M%S', time.localtime())}.txt"
-            open(f'/tmp/{file_name}', 'wt').write(txt)
-            messages.success(self.request, mark_safe('Bulk transfer completed, %d orders were processed. Download full report via <a href="%s">this link</a>' % (
-                processed_count, reverse("bulk_transfer_result_download", args=[file_name.replace('.txt', ''), ]),
-            )))
-        except Exception as e:
-            logging.exception('bulk transfer failed due to %r' % e)
-            messages.error(self.request, f'Bulk transfer failed due to {e}')
-        return super().form_valid(form)
+        bulk_transfer = bulk_transfers.start_bulk_transfer(new_owner, body)
+        logger.info('new bulk transfer started: %r', bulk_transfer)
+        subprocess.Popen(
+            '{} {} bulk_transfer --record_id={}'.format(
+                os.path.join(os.path.dirname(sys.executable), 'python'),
+                os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'manage.py')),
+                bulk_transfer.id,
+            ),
+            close_fds=True,
+            shell=True,
+        )
+        messages.success(self.request, mark_safe('Bulk transfer of %d domains started in background, follow the progress via <a href="%s">this link</a>' % (
+            bulk_transfer.total_count, reverse('bulk_transfer_record', args=[bulk_transfer.id, ]),
+        )))
+        return shortcuts.redirect('bulk_transfer_record', record_id=bulk_transfer.id)
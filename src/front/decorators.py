@@ -21,7 +21,11 @@ def validate_profile_exists(dispatch_func):
     return dispatch_wrapper
 
 
-def brute_force_protection(cache_key_prefix, max_attempts, timeout):
+def brute_force_protection(cache_key_prefix, max_attempts, timeout, check_only=False):
+    """
+    Sets `temporarily_blocked` flag of the request if too many attempts were made from the same IP address.
+    With `check_only=True` the counter is only read and the attempt is not registered.
+    """
     def decorator(func):
         def wrapper(request, *args, **kwargs):
             if settings.BRUTE_FORCE_PROTECTION_ENABLED:
@@ -32,11 +36,14 @@ def brute_force_protection(cache_key_prefix, max_attempts, timeout):
                     max_attempts=max_attempts,
                     timeout=timeout
                 )
-                try:
-                    request.request.temporarily_blocked = False
-                    brute_force.register_attempt()
-                except ExceededMaxAttemptsException:
-                    request.request.temporarily_blocked = True
+                if check_only:
+                    request.request.temporarily_blocked = brute_force.is_blocked()
+                else:
+                    try:
+                        request.request.temporarily_blocked = False
+                        brute_force.register_attempt()
+                    except ExceededMaxAttemptsException:
+                        request.request.temporarily_blocked = True
             else:
                 request.request.temporarily_blocked = False
             return func(request, *args, **kwargs)
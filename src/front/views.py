@@ -10,7 +10,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.cache import cache
 from django.core.mail import EmailMultiAlternatives
-from django.http import HttpResponseRedirect, HttpResponseServerError
+from django.http import HttpResponseRedirect, HttpResponseServerError, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -18,7 +18,7 @@ from django.utils.html import strip_tags
 from django.utils.decorators import method_decorator
 from django.utils.safestring import mark_safe
 from django.template.loader import render_to_string
-from django.views.generic import UpdateView, CreateView, DeleteView, ListView, TemplateView, FormView, RedirectView
+from django.views.generic import UpdateView, CreateView, DeleteView, ListView, TemplateView, FormView, RedirectView, View
 
 from back.models.domain import Domain, BlockedTransfer
 from back.models.contact import Contact
@@ -34,6 +34,7 @@ from zen import zdomains
 from zen import zcontacts
 from zen import zzones
 from zen import zmaster
+from zen import zcache
 
 from billing import orders
 
@@ -75,15 +76,24 @@ class AccountDomainsListView(ListView):
         context['q'] = self.request.GET.get("q") or ''
         context['s'] = self.request.GET.get("s") or 'expiry date'
         domain_objects_list = context.get('object_list', [])
+        context['refreshing_domains'] = []
         if settings.ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST and len(domain_objects_list) < 10:
-            zmaster.domains_quick_sync(
+            context['refreshing_domains'] = zmaster.domains_refresh_enqueue(
                 domain_objects_list=domain_objects_list,
                 hours_passed=12,
-                request_time_limit=3,
             )
         return context
 
 
+class AccountDomainsRefreshStatusView(LoginRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'refreshing': zmaster.domains_refresh_list_active(owner=request.user),
+            'failed': zmaster.domains_refresh_list_failed(owner=request.user),
+        })
+
+
 class AccountDomainCreateView(FormView):
     template_name = 'front/account_domain_create.html'
     form_class = forms.DomainCreateForm
@@ -482,6 +492,7 @@ class AccountDomainDSRecordsView(FormView):
                     rem_secdns=rem_secdns,
                     raise_for_result=True,
                 )
+                zcache.invalidate_domain_info(domain.name)
             except rpc_error.EPPError:
                 logger.exception('domain EPP info read failed')
                 messages.error(request, self.error_message)
@@ -512,6 +523,7 @@ class AccountDomainDSRecordsView(FormView):
                 add_secdns=add_secdns,
                 raise_for_result=True,
             )
+            zcache.invalidate_domain_info(domain.name)
         except rpc_error.EPPError:
             logger.exception('domain EPP info read failed')
             messages.error(self.request, self.error_message)
@@ -729,6 +741,18 @@ class DomainLookupView(FormView):
     form_class = forms.DomainLookupForm
     success_url = reverse_lazy('domain_lookup')
 
+    @brute_force_protection(
+        cache_key_prefix=settings.BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_KEY_PREFIX,
+        max_attempts=settings.BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_MAX_ATTEMPTS,
+        timeout=settings.BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_TIMEOUT,
+        check_only=True,
+    )
+    def get(self, request, *args, **kwargs):
+        # opening the page is not counted as an attempt, only the current state of the counter is checked
+        if self.request.temporarily_blocked:
+            messages.error(self.request, 'Too many attempts made, please try again later')
+        return super().get(request, *args, **kwargs)
+
     @brute_force_protection(
         cache_key_prefix=settings.BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_KEY_PREFIX,
         max_attempts=settings.BRUTE_FORCE_PROTECTION_DOMAIN_LOOKUP_MAX_ATTEMPTS,
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy
 
-from logs.models import RequestLog
+from logs.models import RequestLog, RequestLogHourly
 
 
 class HasExceptionListFilter(admin.SimpleListFilter):
@@ -42,4 +42,15 @@ class RequestLogAdmin(admin.ModelAdmin):
         return format_html('<pre>{request}</pre>', request=instance.request)
     get_request.short_description = 'Request'
 
+
+class RequestLogHourlyAdmin(admin.ModelAdmin):
+    list_display = ('hour', 'path', 'count', 'errors', 'duration_avg', 'duration_p50', 'duration_p95', 'duration_max', )
+    list_filter = ('hour', 'path', )
+    search_fields = ('path', )
+    date_hierarchy = 'hour'
+
+    def has_add_permission(self, request, **kwargs):
+        return False
+
 admin.site.register(RequestLog, RequestLogAdmin)
+admin.site.register(RequestLogHourly, RequestLogHourlyAdmin)
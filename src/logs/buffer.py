@@ -0,0 +1,133 @@
+import os
+import atexit
+import logging
+import threading
+import collections
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from logs.models import RequestLog
+
+
+logger = logging.getLogger(__name__)
+
+
+_Buffer = None
+
+
+class RequestLogBuffer(object):
+    """
+    Collects `RequestLog` records in memory and writes them to the DB with `bulk_create()` from a background thread.
+    Records are flushed every `flush_records` records or every `flush_seconds` seconds, whatever happens first.
+    Buffer is bounded: when it is full because the DB is slow the oldest records are dropped and counted.
+    """
+
+    def __init__(self, size, flush_records, flush_seconds):
+        self.size = size
+        self.flush_records = flush_records
+        self.flush_seconds = flush_seconds
+        self.records = collections.deque()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.pid = None
+        self.added = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    def add(self, record):
+        with self.lock:
+            if len(self.records) >= self.size:
+                self.records.popleft()
+                self.dropped += 1
+            self.records.append(record)
+            self.added += 1
+            pending = len(self.records)
+        self.start()
+        if pending >= self.flush_records:
+            self.wakeup.set()
+
+    def flush(self):
+        """
+        Writes all pending records to the DB in batches of `flush_records`.
+        If the DB write failed, records of that batch are counted as dropped and the rest stay in the buffer.
+        """
+        flushed = 0
+        while True:
+            with self.lock:
+                batch = [self.records.popleft() for _ in range(min(len(self.records), self.flush_records))]
+            if not batch:
+                break
+            try:
+                RequestLog.objects.bulk_create(batch)
+            except:
+                logger.exception('failed to write %d RequestLog records', len(batch))
+                with self.lock:
+                    self.dropped += len(batch)
+                break
+            flushed += len(batch)
+            with self.lock:
+                self.flushed += len(batch)
+        return flushed
+
+    def start(self):
+        # the buffer can be created before uwsgi forks worker processes, every process needs own thread
+        if self.thread and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name='request-log-buffer', daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5):
+        if self.thread and self.pid == os.getpid():
+            self.stopping.set()
+            self.wakeup.set()
+            self.thread.join(timeout)
+            self.thread = None
+        return self.flush()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'pending': len(self.records),
+                'added': self.added,
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+            }
+
+    def _run(self):
+        dropped = 0
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.flush_seconds)
+            self.wakeup.clear()
+            close_old_connections()
+            self.flush()
+            if self.dropped != dropped:
+                logger.warning('%d RequestLog records were dropped so far: %r', self.dropped, self.stats())
+                dropped = self.dropped
+        connection.close()
+
+
+def get_buffer():
+    global _Buffer
+    if _Buffer is None:
+        _Buffer = RequestLogBuffer(
+            size=settings.REQUEST_LOG_BUFFER_SIZE,
+            flush_records=settings.REQUEST_LOG_BUFFER_FLUSH_RECORDS,
+            flush_seconds=settings.REQUEST_LOG_BUFFER_FLUSH_SECONDS,
+        )
+        # uwsgi also runs registered exit functions when worker process is stopped or reloaded
+        atexit.register(shutdown)
+    return _Buffer
+
+
+def shutdown():
+    if _Buffer is None:
+        return 0
+    return _Buffer.stop()
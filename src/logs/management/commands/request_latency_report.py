@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from logs import rollups
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py request_latency_report --minutes=60 --order_by=p95 --top=20
+
+    """
+
+    help = 'Prints latency percentiles, throughput and error rate of every route within given time window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, dest='minutes')
+        parser.add_argument('--order_by', choices=['p50', 'p95', 'p99', 'avg', 'count', 'error_rate', ], default='p95', dest='order_by')
+        parser.add_argument('--top', type=int, default=20, dest='top')
+        parser.add_argument('--no_rollup', action='store_true', dest='no_rollup')
+
+    def handle(self, minutes, order_by, top, no_rollup, *args, **options):
+        if not no_rollup:
+            rollups.rollup_new_records()
+        report = rollups.latency_report(minutes=minutes, order_by=order_by)[:top]
+        self.stdout.write('%-50s %8s %8s %7s %8s %8s %8s %8s\n' % (
+            'path', 'count', 'req/min', 'errors', 'avg', 'p50', 'p95', 'p99', ))
+        for r in report:
+            self.stdout.write('%-50s %8d %8.2f %6.2f%% %8.3f %8.3f %8.3f %8.3f\n' % (
+                r['path'][:50], r['count'], r['throughput'], r['error_rate'] * 100.0, r['avg'], r['p50'], r['p95'], r['p99'], ))
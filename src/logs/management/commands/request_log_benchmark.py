@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from logs import buffer
+from logs.middleware import LogRequestsMiddleware
+from logs.models import RequestLog
+
+
+BENCHMARK_IP_ADDRESS = '10.255.255.254'
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py request_log_benchmark --requests=2000 --path=/
+
+    Requests are not sent to the real views, only LogRequestsMiddleware is executed.
+    All RequestLog records created by the benchmark are removed at the end.
+    """
+
+    help = 'Compares request latency of LogRequestsMiddleware with and without RequestLog buffer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, dest='requests')
+        parser.add_argument('--path', type=str, default='/', dest='path')
+
+    def handle(self, requests, path, *args, **options):
+        middleware = LogRequestsMiddleware(lambda request: HttpResponse('OK'))
+        factory = RequestFactory()
+        started_at = timezone.now()
+        try:
+            for buffer_enabled in (False, True, ):
+                with override_settings(REQUEST_LOG_BUFFER_ENABLED=buffer_enabled):
+                    latencies = []
+                    for _ in range(requests):
+                        request = factory.get(path, REMOTE_ADDR=BENCHMARK_IP_ADDRESS)
+                        started = time.perf_counter()
+                        middleware(request)
+                        latencies.append(time.perf_counter() - started)
+                    if buffer_enabled:
+                        started = time.perf_counter()
+                        buffer.shutdown()
+                        self.stdout.write('buffer flushed in %.3f sec: %r\n' % (
+                            time.perf_counter() - started, buffer.get_buffer().stats(), ))
+                latencies.sort()
+                self.stdout.write('buffer %s: %d requests, avg %.3f ms, p50 %.3f ms, p95 %.3f ms, p99 %.3f ms\n' % (
+                    'enabled' if buffer_enabled else 'disabled',
+                    requests,
+                    sum(latencies) * 1000.0 / len(latencies),
+                    latencies[int(len(latencies) * 0.5)] * 1000.0,
+                    latencies[int(len(latencies) * 0.95)] * 1000.0,
+                    latencies[int(len(latencies) * 0.99)] * 1000.0,
+                ))
+        finally:
+            deleted = RequestLog.objects.filter(ip_address=BENCHMARK_IP_ADDRESS, timestamp__gte=started_at).delete()
+            self.stdout.write('removed %d benchmark records\n' % deleted[0])
@@ -0,0 +1,49 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from logs import retention
+from logs.models import RequestLog
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py request_logs_purge --days=30 --batch_size=1000 --pause=0.1
+
+    Can be interrupted at any moment and started again, it will continue from the oldest remaining hour.
+    """
+
+    help = 'Aggregates old request logs into hourly statistics and removes them in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, dest='days')
+        parser.add_argument('--keep_records', type=int, default=None, dest='keep_records')
+        parser.add_argument('--batch_size', type=int, default=1000, dest='batch_size')
+        parser.add_argument('--pause', type=float, default=0.1, dest='pause')
+        parser.add_argument('--no_rollup', action='store_true', dest='no_rollup')
+        parser.add_argument('--dry_run', action='store_true', dest='dry_run')
+
+    def handle(self, days, keep_records, batch_size, pause, no_rollup, dry_run, *args, **options):
+        if days is None and keep_records is None:
+            self.stdout.write(self.style.ERROR('one of --days or --keep_records must be provided'))
+            return
+        before = None
+        if days is not None:
+            before = timezone.now() - datetime.timedelta(days=days)
+        if keep_records is not None:
+            cutoff = RequestLog.objects.order_by('-timestamp').values_list('timestamp', flat=True)[keep_records:keep_records + 1]
+            if not cutoff:
+                self.stdout.write('nothing to be removed\n')
+                return
+            before = min(before, cutoff[0]) if before else cutoff[0]
+        deleted = retention.purge(
+            before=before,
+            batch_size=batch_size,
+            pause=pause,
+            rollup=not no_rollup,
+            dry_run=dry_run,
+        )
+        self.stdout.write('%d request logs %s before %s\n' % (deleted, 'to be removed' if dry_run else 'removed', before, ))
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import resolve
+from django.urls.exceptions import Resolver404
+
+from logs import middleware
+from logs import routes
+
+
+DEFAULT_PATHS = [
+    '/',
+    '/accounts/login/',
+    '/domains/',
+    '/domains/example.ai/transfer-code/',
+    '/billing/orders/receipts/download/123/',
+    '/contacts/edit/45/',
+    '/admin/back/domain/',
+    '/robots.txt',
+    '/not/existing/page/',
+]
+
+
+def _legacy_lookup(path):
+    if any([path.startswith(ignore_path) for ignore_path in middleware.IGNORE_PATH_STARTSWITH]):
+        return None
+    try:
+        route = resolve(path).route
+    except Resolver404 as exc:
+        route = exc.args[0]['path']
+    short_path = path
+    for head, tail, short in middleware.SHORT_PATHS:
+        if path.startswith(head) and (not tail or path.endswith(tail)):
+            short_path = short
+            break
+    return route, short_path
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        ./venv/bin/python src/manage.py request_routes_benchmark --rounds=10000 --path=/ --path=/domains/
+
+    Measures per-request overhead of request path recognition in LogRequestsMiddleware:
+    the previous approach with Django `resolve()` and linear scans of the lists against the precompiled RouteMatcher.
+    """
+
+    help = 'Compares per-request overhead of route whitelisting, ignoring and short path detection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10000, dest='rounds')
+        parser.add_argument('--path', type=str, action='append', dest='paths')
+
+    def handle(self, rounds, paths, *args, **options):
+        paths = paths or DEFAULT_PATHS
+        started = time.perf_counter()
+        matcher = routes.RouteMatcher.from_urlconf(
+            urlconf_name=settings.ROOT_URLCONF,
+            ignore_path_startswith=middleware.IGNORE_PATH_STARTSWITH,
+            short_paths=middleware.SHORT_PATHS,
+        )
+        self.stdout.write('route matcher compiled in %.3f ms\n' % ((time.perf_counter() - started) * 1000.0, ))
+        for path in paths:
+            self.stdout.write('%s : %r\n' % (path, matcher.match(path), ))
+        for label, lookup in (('resolve()', _legacy_lookup, ), ('RouteMatcher', matcher.match, ), ):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for path in paths:
+                    lookup(path)
+            total = time.perf_counter() - started
+            self.stdout.write('%s: %d lookups, %.3f us per request\n' % (
+                label, rounds * len(paths), total * 1000000.0 / (rounds * len(paths)), ))
@@ -5,11 +5,9 @@ import traceback
 
 from django.conf import settings
 from django.http import HttpResponseForbidden
-from django.urls import resolve
-from django.urls.exceptions import Resolver404
-
-from django_extensions.management.commands import show_urls
 
+from logs import buffer
+from logs import routes
 from logs.models import RequestLog
 
 
@@ -62,25 +60,24 @@ class LogRequestsMiddleware(object):
 
     def __init__(self, get_response):
         self.get_response = get_response
-        self.whitelisted_routes = self.scan_all_routes()
+        self.route_matcher = self.build_route_matcher()
 
     def __call__(self, request):
         request._start_time = time.monotonic_ns()
         ip_addr = self.client_ip(request)
 
         request_body = self.request_body(request)
-        request_path = request.path or ''
 
-        if not self.log_filter(request):
+        if ip_addr in settings.MONITORING_HOSTS:
+            # skip logging all monitoring requests from specific hosts
             return self.get_response(request)
 
-        route = None
-        try:
-            route = resolve(request_path).route
-        except Resolver404 as exc:
-            route = exc.args[0]['path']
+        route_match = self.route_matcher.match(request.path or '')
+        if route_match.ignored:
+            # skip logging of some specific requests
+            return self.get_response(request)
 
-        if route not in self.whitelisted_routes:
+        if not route_match.whitelisted:
             #TODO: possibly we could block this IP if it hits the web-site too often
             return HttpResponseForbidden()
 
@@ -90,17 +87,21 @@ class LogRequestsMiddleware(object):
             return response
 
         try:
-            RequestLog.objects.create(
+            request_log = RequestLog(
                 ip_address=ip_addr,
                 user=self.user_email(request) or '',
                 method=request.method or '',
-                path=self.short_path(request.path) or '',
+                path=route_match.short_path or '',
                 path_full=request.path or '',
                 request=request_body,
                 status_code=response.status_code,
                 exception=getattr(request, '_captured_exception', None) or None,
                 duration=(time.monotonic_ns() - request._start_time) / 1000000000.0,
             )
+            if settings.REQUEST_LOG_BUFFER_ENABLED:
+                buffer.get_buffer().add(request_log)
+            else:
+                request_log.save()
         except:
             logger.exception("failed to create APILog record")
 
@@ -114,8 +115,7 @@ class LogRequestsMiddleware(object):
         if self.client_ip(request) in settings.MONITORING_HOSTS:
             # skip logging all monitoring requests from specific hosts
             return False
-        p = request.path or ''
-        if any([p.startswith(ignore_path) for ignore_path in IGNORE_PATH_STARTSWITH]):
+        if self.route_matcher.match(request.path or '').ignored:
             # skip logging of some specific requests
             return False
         return True
@@ -160,20 +160,12 @@ class LogRequestsMiddleware(object):
                 raw_request_body += str(e)
         return raw_request_body
 
-    def scan_all_routes(self):
-        urlconf = __import__(getattr(settings, 'ROOT_URLCONF'), {}, {}, [''])
-        routes = set()
-        for (_, regex, _) in show_urls.Command().extract_views_from_urlpatterns(urlconf.urlpatterns):
-            routes.add(regex)
-        return routes
+    def build_route_matcher(self):
+        return routes.RouteMatcher.from_urlconf(
+            urlconf_name=settings.ROOT_URLCONF,
+            ignore_path_startswith=IGNORE_PATH_STARTSWITH,
+            short_paths=SHORT_PATHS,
+        )
 
     def short_path(self, path):
-        for head, tail, short_path in SHORT_PATHS:
-            if head:
-                if not path.startswith(head):
-                    continue
-                if tail:
-                    if not ''.endswith(tail):
-                        continue
-                return short_path
-        return path
+        return self.route_matcher.short_path(path)
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0002_requestlog_path_full'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requestlog',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Time of the request'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0003_requestlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLogHourly',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True, help_text='Beginning of the hour')),
+                ('path', models.CharField(blank=True, db_index=True, default='', help_text='Request path', max_length=255)),
+                ('count', models.IntegerField(default=0, help_text='Number of requests')),
+                ('errors', models.IntegerField(default=0, help_text='Number of failed requests')),
+                ('duration_avg', models.FloatField(default=0.0, help_text='Average duration of the response')),
+                ('duration_p50', models.FloatField(default=0.0, help_text='Median duration of the response')),
+                ('duration_p95', models.FloatField(default=0.0, help_text='95th percentile of the response duration')),
+                ('duration_max', models.FloatField(default=0.0, help_text='Maximum duration of the response')),
+            ],
+            options={
+                'unique_together': {('hour', 'path')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0004_requestloghourly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLogMinutely',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField(db_index=True, help_text='Beginning of the minute')),
+                ('path', models.CharField(blank=True, db_index=True, default='', help_text='Request path', max_length=255)),
+                ('count', models.IntegerField(default=0, help_text='Number of requests')),
+                ('errors', models.IntegerField(default=0, help_text='Number of failed requests')),
+                ('duration_sum', models.FloatField(default=0.0, help_text='Total duration of all responses')),
+                ('histogram', models.JSONField(default=list, help_text='Number of responses in every duration bucket')),
+            ],
+            options={
+                'unique_together': {('minute', 'path')},
+            },
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
+from django.utils import timezone
 
 
 class RequestLog(models.Model):
-    timestamp = models.DateTimeField(help_text="Time of the request", auto_now_add=True, db_index=True)
+    timestamp = models.DateTimeField(help_text="Time of the request", default=timezone.now, db_index=True)
     ip_address = models.GenericIPAddressField(help_text="IP address of the requestor", blank=True, null=True, db_index=True)
     user = models.CharField(help_text="If captured, the name of the user who sent the request",
                             max_length=255, blank=True, default="", db_index=True)
@@ -16,6 +17,38 @@ class RequestLog(models.Model):
 
     @staticmethod
     def erase_old_records(num_records):
-        return RequestLog.objects.filter(
-            pk__in=RequestLog.objects.order_by('-timestamp').all().values_list('pk')[num_records:],
-        ).delete()
+        """
+        Keeps at least latest `num_records` records, older full hours are rolled up and removed in small batches.
+        """
+        from logs import retention
+        cutoff = RequestLog.objects.order_by('-timestamp').values_list('timestamp', flat=True)[num_records:num_records + 1]
+        if not cutoff:
+            return (0, {}, )
+        deleted = retention.purge(before=cutoff[0])
+        return (deleted, {'logs.RequestLog': deleted, }, )
+
+
+class RequestLogHourly(models.Model):
+    hour = models.DateTimeField(help_text="Beginning of the hour", db_index=True)
+    path = models.CharField(help_text="Request path", max_length=255, blank=True, default="", db_index=True)
+    count = models.IntegerField(help_text="Number of requests", default=0)
+    errors = models.IntegerField(help_text="Number of failed requests", default=0)
+    duration_avg = models.FloatField(help_text="Average duration of the response", default=0.0)
+    duration_p50 = models.FloatField(help_text="Median duration of the response", default=0.0)
+    duration_p95 = models.FloatField(help_text="95th percentile of the response duration", default=0.0)
+    duration_max = models.FloatField(help_text="Maximum duration of the response", default=0.0)
+
+    class Meta:
+        unique_together = ('hour', 'path', )
+
+
+class RequestLogMinutely(models.Model):
+    minute = models.DateTimeField(help_text="Beginning of the minute", db_index=True)
+    path = models.CharField(help_text="Request path", max_length=255, blank=True, default="", db_index=True)
+    count = models.IntegerField(help_text="Number of requests", default=0)
+    errors = models.IntegerField(help_text="Number of failed requests", default=0)
+    duration_sum = models.FloatField(help_text="Total duration of all responses", default=0.0)
+    histogram = models.JSONField(help_text="Number of responses in every duration bucket", default=list)
+
+    class Meta:
+        unique_together = ('minute', 'path', )
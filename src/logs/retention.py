@@ -0,0 +1,115 @@
+import math
+import time
+import logging
+import datetime
+
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from logs.models import RequestLog, RequestLogHourly
+
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of already sorted list of values.
+    """
+    if not sorted_values:
+        return 0.0
+    pos = int(math.ceil(percent / 100.0 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(pos, len(sorted_values) - 1))]
+
+
+def truncate_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_hour(hour):
+    """
+    Aggregates all RequestLog records within given hour into RequestLogHourly rows, one row per path.
+    Existing aggregates of that hour are replaced.
+    """
+    durations = {}
+    errors = {}
+    rows = RequestLog.objects.filter(
+        timestamp__gte=hour,
+        timestamp__lt=hour + datetime.timedelta(hours=1),
+    ).annotate(
+        has_exception=ExpressionWrapper(Q(exception__isnull=False), output_field=BooleanField()),
+    ).values_list('path', 'status_code', 'has_exception', 'duration')
+    for path, status_code, has_exception, duration in rows.iterator():
+        durations.setdefault(path, []).append(duration or 0.0)
+        if has_exception or status_code is None or status_code >= 500:
+            errors[path] = errors.get(path, 0) + 1
+    aggregates = []
+    for path, values in durations.items():
+        values.sort()
+        aggregates.append(RequestLogHourly(
+            hour=hour,
+            path=path,
+            count=len(values),
+            errors=errors.get(path, 0),
+            duration_avg=sum(values) / len(values),
+            duration_p50=percentile(values, 50),
+            duration_p95=percentile(values, 95),
+            duration_max=values[-1],
+        ))
+    with transaction.atomic():
+        RequestLogHourly.objects.filter(hour=hour).delete()
+        RequestLogHourly.objects.bulk_create(aggregates)
+    return len(aggregates)
+
+
+def delete_range(since, till, batch_size=1000, pause=0.1):
+    """
+    Removes RequestLog records within given time range in small batches to not lock the table for a long time.
+    """
+    deleted = 0
+    while True:
+        pks = list(RequestLog.objects.filter(
+            timestamp__gte=since,
+            timestamp__lt=till,
+        ).order_by('timestamp').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        deleted += RequestLog.objects.filter(pk__in=pks).delete()[0]
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def purge(before, batch_size=1000, pause=0.1, rollup=True, dry_run=False):
+    """
+    Removes all RequestLog records older than `before` moment hour by hour, starting from the oldest one.
+    Only full hours are processed: `before` is truncated down to the beginning of the hour.
+    If `rollup` is True, records of every hour are aggregated into RequestLogHourly first,
+    hours which already have aggregates are not aggregated again, so the process can be safely interrupted
+    and started again.
+    """
+    before = truncate_hour(before)
+    oldest = RequestLog.objects.filter(timestamp__lt=before).order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None:
+        return 0
+    hour = truncate_hour(oldest)
+    deleted = 0
+    while hour < before:
+        next_hour = hour + datetime.timedelta(hours=1)
+        if rollup and not RequestLogHourly.objects.filter(hour=hour).exists():
+            if dry_run:
+                logger.info('request logs of %s will be aggregated', hour)
+            else:
+                rollup_hour(hour)
+        if dry_run:
+            deleted += RequestLog.objects.filter(timestamp__gte=hour, timestamp__lt=next_hour).count()
+        else:
+            deleted += delete_range(hour, next_hour, batch_size=batch_size, pause=pause)
+        hour = next_hour
+        # skip empty hours
+        oldest = RequestLog.objects.filter(timestamp__gte=hour, timestamp__lt=before).order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest is None:
+            break
+        hour = truncate_hour(oldest)
+    logger.info('%d request logs %s before %s', deleted, 'to be removed' if dry_run else 'removed', before)
+    return deleted
@@ -0,0 +1,138 @@
+import bisect
+import logging
+import datetime
+
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
+
+from back.models.task_checkpoint import TaskCheckpoint
+
+from logs.models import RequestLog, RequestLogMinutely
+
+
+logger = logging.getLogger(__name__)
+
+
+# upper bounds of the duration buckets in seconds, last bucket collects everything slower
+HISTOGRAM_BOUNDS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, ]
+
+
+def bucket_index(duration):
+    return bisect.bisect_left(HISTOGRAM_BOUNDS, duration or 0.0)
+
+
+def histogram_percentile(histogram, percent):
+    """
+    Estimates percentile from the histogram: returns upper bound of the bucket where the percentile falls into.
+    For the last, unbounded, bucket the highest known bound is returned.
+    """
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    rank = percent / 100.0 * total
+    seen = 0
+    for pos, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return HISTOGRAM_BOUNDS[min(pos, len(HISTOGRAM_BOUNDS) - 1)]
+    return HISTOGRAM_BOUNDS[-1]
+
+
+def rollup_new_records(batch_size=10000, max_batches=None):
+    """
+    Adds all RequestLog records created after the previous run to the per-route, per-minute histograms.
+    Position of the latest processed record is stored in `TaskCheckpoint`, the row is locked while every batch
+    is processed, so every record is counted only once even when called from several processes at the same time.
+    Use `max_batches` to limit amount of work done in one call.
+    """
+    TaskCheckpoint.checkpoints.get_or_create(name='request_log_rollup')
+    started = timezone.now()
+    processed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            checkpoint = TaskCheckpoint.checkpoints.select_for_update().get(name='request_log_rollup')
+            rows = list(RequestLog.objects.filter(
+                id__gt=checkpoint.position,
+            ).annotate(
+                has_exception=ExpressionWrapper(Q(exception__isnull=False), output_field=BooleanField()),
+            ).order_by('id').values_list('id', 'timestamp', 'path', 'status_code', 'has_exception', 'duration')[:batch_size])
+            if not rows:
+                break
+            buckets = {}
+            for _, timestamp, path, status_code, has_exception, duration in rows:
+                key = (timestamp.replace(second=0, microsecond=0), path, )
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = {'count': 0, 'errors': 0, 'duration_sum': 0.0, 'histogram': [0] * (len(HISTOGRAM_BOUNDS) + 1), }
+                bucket['count'] += 1
+                bucket['duration_sum'] += duration or 0.0
+                bucket['histogram'][bucket_index(duration)] += 1
+                if has_exception or status_code is None or status_code >= 500:
+                    bucket['errors'] += 1
+            for (minute, path), bucket in buckets.items():
+                existing, created = RequestLogMinutely.objects.select_for_update().get_or_create(
+                    minute=minute,
+                    path=path,
+                    defaults=bucket,
+                )
+                if created:
+                    continue
+                existing.count += bucket['count']
+                existing.errors += bucket['errors']
+                existing.duration_sum += bucket['duration_sum']
+                existing.histogram = [a + b for a, b in zip(existing.histogram, bucket['histogram'])]
+                existing.save()
+            checkpoint.position = rows[-1][0]
+            checkpoint.started = started
+            checkpoint.processed = processed + len(rows)
+            checkpoint.finished = timezone.now()
+            checkpoint.save()
+        processed += len(rows)
+        batches += 1
+    if processed:
+        logger.info('%d request logs added to latency rollups', processed)
+    return processed
+
+
+def latency_report(minutes=60, moment_now=None, order_by='p95'):
+    """
+    Returns list of dictionaries with latency statistics for every route within the latest `minutes` minutes:
+    number of requests, throughput per minute, error rate, average, p50, p95 and p99 latency in seconds.
+    """
+    if moment_now is None:
+        moment_now = timezone.now()
+    since = moment_now - datetime.timedelta(minutes=minutes)
+    routes = {}
+    for path, count, errors, duration_sum, histogram in RequestLogMinutely.objects.filter(
+        minute__gte=since.replace(second=0, microsecond=0),
+        minute__lte=moment_now,
+    ).values_list('path', 'count', 'errors', 'duration_sum', 'histogram'):
+        route = routes.get(path)
+        if route is None:
+            route = routes[path] = {'count': 0, 'errors': 0, 'duration_sum': 0.0, 'histogram': [0] * (len(HISTOGRAM_BOUNDS) + 1), }
+        route['count'] += count
+        route['errors'] += errors
+        route['duration_sum'] += duration_sum
+        route['histogram'] = [a + b for a, b in zip(route['histogram'], histogram)]
+    report = []
+    for path, route in routes.items():
+        if not route['count']:
+            continue
+        report.append({
+            'path': path,
+            'count': route['count'],
+            'throughput': route['count'] / float(minutes),
+            'error_rate': route['errors'] / float(route['count']),
+            'avg': route['duration_sum'] / route['count'],
+            'p50': histogram_percentile(route['histogram'], 50),
+            'p95': histogram_percentile(route['histogram'], 95),
+            'p99': histogram_percentile(route['histogram'], 99),
+        })
+    report.sort(key=lambda r: (r[order_by], r['count'], ), reverse=True)
+    return report
+
+
+def cleanup(days=30):
+    return RequestLogMinutely.objects.filter(minute__lt=timezone.now() - datetime.timedelta(days=days)).delete()[0]
@@ -0,0 +1,70 @@
+import re
+import collections
+import importlib
+
+from django.urls import URLPattern, URLResolver
+
+
+RouteMatch = collections.namedtuple('RouteMatch', ['ignored', 'whitelisted', 'short_path', ])
+
+
+_NamedGroupRegex = re.compile(r'\(\?P<\w+>')
+
+
+def _pattern_regex(pattern):
+    regex = pattern.pattern.regex.pattern
+    if regex.startswith('^'):
+        regex = regex[1:]
+    # group names are repeated across the routes and can not be used in a single expression
+    return _NamedGroupRegex.sub('(?:', regex)
+
+
+def extract_routes(urlpatterns, prefix=''):
+    """
+    Walks through the URLconf and returns list of regular expressions of all end-point routes.
+    """
+    routes = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            routes.extend(extract_routes(pattern.url_patterns, prefix=prefix + _pattern_regex(pattern)))
+        elif isinstance(pattern, URLPattern):
+            routes.append(prefix + _pattern_regex(pattern))
+    return routes
+
+
+class RouteMatcher(object):
+    """
+    Recognizes request path with regular expressions compiled only once from the URLconf routes,
+    ignored path prefixes and short paths list.
+    Method `match()` returns ignore flag, whitelist status and short path of given request path in one call.
+    """
+
+    def __init__(self, routes, ignore_path_startswith, short_paths):
+        # same as the root URL resolver, all routes are matched after the leading slash
+        self.routes_regex = re.compile('/(?:%s)' % ('|'.join('(?:%s)' % route for route in routes) or r'(?!)'))
+        self.ignore_regex = re.compile('|'.join(re.escape(p) for p in ignore_path_startswith) or r'(?!)')
+        self.short_paths = []
+        short_path_patterns = []
+        for pos, (head, tail, short_path) in enumerate(short_paths):
+            self.short_paths.append(short_path)
+            short_path_patterns.append('(?P<s%d>%s%s)' % (
+                pos, re.escape(head or ''), ('.*' + re.escape(tail) + r'\Z') if tail else '', ))
+        self.short_path_regex = re.compile('|'.join(short_path_patterns) or r'(?!)')
+
+    @classmethod
+    def from_urlconf(cls, urlconf_name, ignore_path_startswith, short_paths):
+        urlconf = importlib.import_module(urlconf_name)
+        return cls(extract_routes(urlconf.urlpatterns), ignore_path_startswith, short_paths)
+
+    def short_path(self, path):
+        m = self.short_path_regex.match(path)
+        if not m:
+            return path
+        return self.short_paths[int(m.lastgroup[1:])]
+
+    def match(self, path):
+        path = path or ''
+        if self.ignore_regex.match(path):
+            return RouteMatch(True, False, path)
+        whitelisted = bool(self.routes_regex.match(path))
+        return RouteMatch(False, whitelisted, self.short_path(path))
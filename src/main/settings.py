@@ -178,6 +178,11 @@ LOGGING = {
             'propagate': False,
             'handlers': ['background_service', ],
         },
+        'back.management.commands.domains_refresh_worker': {
+            'level': LOG_LEVEL,
+            'propagate': False,
+            'handlers': ['background_service', ],
+        },
         'accounts.notifications': {
             'level': LOG_LEVEL,
             'propagate': False,
@@ -436,6 +441,13 @@ SMOKETEST_MAXIMUM_UNAVAILABLE_AMOUNT = getattr(params, 'SMOKETEST_MAXIMUM_UNAVAI
 
 MONITORING_HOSTS = getattr(params, 'MONITORING_HOSTS', [])
 
+#------------------------------------------------------------------------------
+#--- REQUEST LOGS
+REQUEST_LOG_BUFFER_ENABLED = getattr(params, 'REQUEST_LOG_BUFFER_ENABLED', True)
+REQUEST_LOG_BUFFER_SIZE = getattr(params, 'REQUEST_LOG_BUFFER_SIZE', 10000)
+REQUEST_LOG_BUFFER_FLUSH_RECORDS = getattr(params, 'REQUEST_LOG_BUFFER_FLUSH_RECORDS', 100)
+REQUEST_LOG_BUFFER_FLUSH_SECONDS = getattr(params, 'REQUEST_LOG_BUFFER_FLUSH_SECONDS', 2)
+
 #------------------------------------------------------------------------------
 #--- BRUTE FORCE PROTECTION SETTINGS
 BRUTE_FORCE_PROTECTION_ENABLED = getattr(params, 'BRUTE_FORCE_PROTECTION_ENABLED', False)
@@ -484,11 +496,13 @@ TRUST_PRIVATE_IP = getattr(params, 'TRUST_PRIVATE_IP', False)
 RATE_LIMIT_ENABLED = getattr(params, 'RATE_LIMIT_ENABLED', False)
 RATE_LIMIT_COUNT = getattr(params, 'RATE_LIMIT_COUNT', 5)
 RATE_LIMIT_WINDOW_SECONDS = getattr(params, 'RATE_LIMIT_WINDOW_SECONDS', 60)
+# items are (method, path) or (method, path, count, window_seconds) to set specific limit for given end-point
 RATE_LIMIT_TARGET_PATHS = getattr(params, 'RATE_LIMIT_TARGET_PATHS', [
     ('POST', '/admin/login'),
     ('POST', '/accounts/login'),
     ('POST', '/lookup'),
 ])
+RATE_LIMIT_REDIS_URL = getattr(params, 'RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
 
 #------------------------------------------------------------------------------
 #--- LOGIN SETTINGS
@@ -513,8 +527,26 @@ ZENAIDA_GATE_HEALTH_CHECK_PERIOD = getattr(params, 'ZENAIDA_GATE_HEALTH_CHECK_PE
 #------------------------------------------------------------------------------
 #--- ZENAIDA RELATED CONFIGS
 ZENAIDA_CSV_FILES_SYNC_FOLDER_PATH = getattr(params, 'ZENAIDA_CSV_FILES_SYNC_FOLDER_PATH', '/tmp/')
+ZENAIDA_CSV_IMPORT_BATCH_SIZE = getattr(params, 'ZENAIDA_CSV_IMPORT_BATCH_SIZE', 100)
+ZENAIDA_CSV_IMPORT_WORKERS = getattr(params, 'ZENAIDA_CSV_IMPORT_WORKERS', 4)
+ZENAIDA_CSV_IMPORT_MAX_STORED_FAILURES = getattr(params, 'ZENAIDA_CSV_IMPORT_MAX_STORED_FAILURES', 1000)
+ZENAIDA_CSV_IMPORT_MAX_LOG_SIZE = getattr(params, 'ZENAIDA_CSV_IMPORT_MAX_LOG_SIZE', 1024*1024)
+ZENAIDA_BULK_TRANSFER_WORKERS = getattr(params, 'ZENAIDA_BULK_TRANSFER_WORKERS', 4)
+ZENAIDA_BULK_TRANSFER_STALE_MINUTES = getattr(params, 'ZENAIDA_BULK_TRANSFER_STALE_MINUTES', 30)
 
 ZENAIDA_EPP_POLL_INTERVAL_SECONDS = getattr(params, 'ZENAIDA_EPP_POLL_INTERVAL_SECONDS', 20)
+ZENAIDA_EPP_POLL_HEARTBEAT_TIMEOUT_SECONDS = getattr(params, 'ZENAIDA_EPP_POLL_HEARTBEAT_TIMEOUT_SECONDS', 5*60)
+ZENAIDA_EPP_POLL_DRAIN_ENABLED = getattr(params, 'ZENAIDA_EPP_POLL_DRAIN_ENABLED', True)
+ZENAIDA_EPP_POLL_WORKERS = getattr(params, 'ZENAIDA_EPP_POLL_WORKERS', 4)
+ZENAIDA_EPP_POLL_QUEUE_SIZE = getattr(params, 'ZENAIDA_EPP_POLL_QUEUE_SIZE', 100)
+ZENAIDA_EPP_POLL_COALESCE_WINDOW_SECONDS = getattr(params, 'ZENAIDA_EPP_POLL_COALESCE_WINDOW_SECONDS', 10)
+ZENAIDA_EPP_POLL_REPORT_INTERVAL_SECONDS = getattr(params, 'ZENAIDA_EPP_POLL_REPORT_INTERVAL_SECONDS', 60)
+# EPP responses are cached in memory of every process separately: poll messages and local changes
+# only invalidate the cache of the process where they were handled, other processes (web, background workers)
+# can still use outdated responses until TTL expires, so keep these values small
+ZENAIDA_EPP_DOMAIN_INFO_CACHE_TTL_SECONDS = getattr(params, 'ZENAIDA_EPP_DOMAIN_INFO_CACHE_TTL_SECONDS', 10)
+ZENAIDA_EPP_CONTACT_INFO_CACHE_TTL_SECONDS = getattr(params, 'ZENAIDA_EPP_CONTACT_INFO_CACHE_TTL_SECONDS', 60)
+ZENAIDA_EPP_CONTACT_INFO_WORKERS = getattr(params, 'ZENAIDA_EPP_CONTACT_INFO_WORKERS', 4)
 
 ZENAIDA_REGISTRAR_ID = getattr(params, 'ZENAIDA_REGISTRAR_ID', 'zenaida_registrar')
 ZENAIDA_SUPPORTED_ZONES = getattr(params, 'ZENAIDA_SUPPORTED_ZONES', [])
@@ -525,6 +557,16 @@ ZENAIDA_ADMIN_NOTIFY_EMAILS = getattr(params, 'ZENAIDA_ADMIN_NOTIFY_EMAILS', '')
 ZENAIDA_PING_NAMESERVERS_ENABLED = getattr(params, 'ZENAIDA_PING_NAMESERVERS_ENABLED', True)
 
 ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST = getattr(params, 'ZENAIDA_SYNC_ACCOUNT_DOMAINS_LIST', True)
+ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS = getattr(params, 'ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS', 4)
+ZENAIDA_DOMAINS_QUICK_SYNC_DEADLINE_SECONDS = getattr(params, 'ZENAIDA_DOMAINS_QUICK_SYNC_DEADLINE_SECONDS', 5)
+ZENAIDA_DOMAINS_REFRESH_RATE_PER_MINUTE = getattr(params, 'ZENAIDA_DOMAINS_REFRESH_RATE_PER_MINUTE', 30)
+ZENAIDA_DOMAINS_REFRESH_RETRY_MINUTES = getattr(params, 'ZENAIDA_DOMAINS_REFRESH_RETRY_MINUTES', 30)
+ZENAIDA_SYNC_EXPIRED_DOMAINS_BATCH_SIZE = getattr(params, 'ZENAIDA_SYNC_EXPIRED_DOMAINS_BATCH_SIZE', 50)
+ZENAIDA_SYNC_EXPIRED_DOMAINS_WORKERS = getattr(params, 'ZENAIDA_SYNC_EXPIRED_DOMAINS_WORKERS', 4)
+ZENAIDA_SYNC_EXPIRED_DOMAINS_WINDOW_MINUTES = getattr(params, 'ZENAIDA_SYNC_EXPIRED_DOMAINS_WINDOW_MINUTES', 60)
+ZENAIDA_NOTIFICATIONS_BATCH_SIZE = getattr(params, 'ZENAIDA_NOTIFICATIONS_BATCH_SIZE', 50)
+ZENAIDA_NOTIFICATIONS_WORKERS = getattr(params, 'ZENAIDA_NOTIFICATIONS_WORKERS', 2)
+ZENAIDA_NOTIFICATIONS_MAX_PER_SECOND = getattr(params, 'ZENAIDA_NOTIFICATIONS_MAX_PER_SECOND', 5)
 
 #--- Billing
 ZENAIDA_DOMAIN_PRICE = getattr(params, 'ZENAIDA_DOMAIN_PRICE', 100.0)
@@ -532,6 +574,8 @@ ZENAIDA_DOMAIN_RESTORE_PRICE = getattr(params, 'ZENAIDA_DOMAIN_RESTORE_PRICE', 2
 ZENAIDA_DOMAIN_RENEW_YEARS = getattr(params, 'ZENAIDA_DOMAIN_RENEW_YEARS', 2)
 ZENAIDA_DOMAIN_RENEW_MAX_YEARS = getattr(params, 'ZENAIDA_DOMAIN_RENEW_MAX_YEARS', 10)
 ZENAIDA_BILLING_PAYMENT_TIME_FREEZE_SECONDS = getattr(params, 'ZENAIDA_BILLING_PAYMENT_TIME_FREEZE_SECONDS', 3*60)
+ZENAIDA_BILLING_PDF_CACHE_DIR = getattr(params, 'ZENAIDA_BILLING_PDF_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'billing_pdf'))
+ZENAIDA_BILLING_PDF_CACHE_TTL_SECONDS = getattr(params, 'ZENAIDA_BILLING_PDF_CACHE_TTL_SECONDS', 60*60*24*30)
 
 #--- Credit Card payments via 4csonline
 ZENAIDA_BILLING_4CSONLINE_ENABLED = getattr(params, 'ZENAIDA_BILLING_4CSONLINE_ENABLED', True)
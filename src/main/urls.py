@@ -60,6 +60,7 @@ patterns = [
     path('contacts/delete/<int:contact_id>/', front_views.AccountContactDeleteView.as_view(), name='account_contact_delete'),
 
     path('domains/', front_views.AccountDomainsListView.as_view(), name='account_domains'),
+    path('domains/refresh-status/', front_views.AccountDomainsRefreshStatusView.as_view(), name='account_domains_refresh_status'),
     path('domains/create/<str:domain_name>/', front_views.AccountDomainCreateView.as_view(), name='account_domain_create'),
     path('domains/transfer/', front_views.AccountDomainTransferTakeoverView.as_view(), name='account_domain_transfer_takeover'),
     path('domains/edit/<int:domain_id>/', front_views.AccountDomainUpdateView.as_view(), name='account_domain_edit'),
@@ -89,13 +90,16 @@ patterns = [
     path('board/balance-adjustment/', board_views.BalanceAdjustmentView.as_view(), name='balance_adjustment'),
     path('board/two-factor-reset/', board_views.TwoFactorResetView.as_view(), name='two_factor_reset'),
     path('board/financial-report/', board_views.FinancialReportView.as_view(), name='financial_report'),
+    path('board/financial-report/csv/', board_views.FinancialReportCSVView.as_view(), name='financial_report_csv'),
     path('board/domain-sync/', board_views.NotExistingDomainSyncView.as_view(), name='not_existing_domain_sync'),
+    path('board/request-latency/', board_views.RequestLatencyReportView.as_view(), name='request_latency_report'),
     path('board/csv-file-sync/<str:record_id>/', board_views.CSVFileSyncRecordView.as_view(), name='csv_file_sync_record'),
     path('board/csv-file-sync/', board_views.CSVFileSyncView.as_view(), name='csv_file_sync'),
     path('board/single-email/', board_views.SendingSingleEmailView.as_view(), name='sending_single_email'),
     path('board/auth-codes/<str:file_id>/', board_views.AuthCodesDownloadView.as_view(), name='auth_codes_download'),
+    path('board/bulk-transfer/<str:record_id>/', board_views.BulkTransferRecordView.as_view(), name='bulk_transfer_record'),
     path('board/bulk-transfer/', board_views.BulkTransferView.as_view(), name='bulk_transfer'),
-    path('board/bulk-transfer-result/<str:file_id>/', board_views.BulkTransferResultDownloadView.as_view(), name='bulk_transfer_result_download'),
+    path('board/bulk-transfer-result/<str:record_id>/', board_views.BulkTransferResultDownloadView.as_view(), name='bulk_transfer_result_download'),
 
     path('lookup/', front_views.DomainLookupView.as_view(), name='domain_lookup'),
 
@@ -5,25 +5,56 @@ import time
 from django.conf import settings
 from django.http import HttpResponse
 
-from redis import Redis
+from redis import ConnectionPool, Redis
+from redis.exceptions import RedisError
 
 logger = logging.getLogger(__name__)
 
 
+_ConnectionPool = None
+
+# maximum number of blocked IP addresses remembered locally, to protect the worker memory during large attacks
+LOCAL_BLOCKED_MAX_SIZE = 10000
+
+
 class HttpResponseRateLimitExceeded(HttpResponse):
     status_code = 429
 
 
+def get_connection_pool():
+    """
+    Single connection pool shared by all the middleware instances within the worker process.
+    """
+    global _ConnectionPool
+    if _ConnectionPool is None:
+        _ConnectionPool = ConnectionPool.from_url(settings.RATE_LIMIT_REDIS_URL)
+    return _ConnectionPool
+
+
 class RedisClient:
 
     def __init__(self, client: Redis):
         self.client = client
 
-    def incr(self, key: str):
-        return self.client.incr(key)
-
-    def expire(self, key: str, ex: int):
-        return self.client.expire(key, ex)
+    def hit(self, key: str, window: int, moment: float):
+        """
+        Registers one more request in the sliding window which ends at given moment and returns estimated
+        number of requests within the window and the number of requests in the current and previous fixed windows.
+        All commands are sent in a single MULTI/EXEC pipeline: one round trip to the Redis server.
+        """
+        current_window = int(moment // window)
+        current_key = f"{key}:{current_window}"
+        previous_key = f"{key}:{current_window - 1}"
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get(previous_key)
+        current_count, _, previous_count = pipe.execute()
+        previous_count = int(previous_count or 0)
+        # previous window counter is weighted by its part still overlapping with the sliding window
+        elapsed = (moment % window) / float(window)
+        estimated = previous_count * (1.0 - elapsed) + current_count
+        return estimated, current_count, previous_count
 
 
 class RateLimiterMiddleware(object):
@@ -33,40 +64,86 @@ class RateLimiterMiddleware(object):
         self.enabled = settings.RATE_LIMIT_ENABLED
         self.limit = settings.RATE_LIMIT_COUNT
         self.window = settings.RATE_LIMIT_WINDOW_SECONDS
-        self.targets = settings.RATE_LIMIT_TARGET_PATHS
-        self.redis_client = RedisClient(client=Redis())
+        self.targets = self.build_targets(settings.RATE_LIMIT_TARGET_PATHS)
+        self.redis_client = RedisClient(client=Redis(connection_pool=get_connection_pool()))
+        # IP addresses already known to be over the limit are rejected locally without contacting Redis
+        self.blocked = {}
 
     def __call__(self, request):
         if not self.enabled:
             return self.get_response(request)
 
-        ip_addr = self.client_ip(request)
         request_path = (request.path or '').rstrip("/")
 
         # Only use rate limiter for the selected end-points
-        if (request.method, request_path.rstrip("/")) not in self.targets:
+        target = self.targets.get((request.method, request_path, ))
+        if target is None:
             return self.get_response(request)
 
-        # Create the cache key using the client's IP and the current minute timestamp
-        key = f"{ip_addr}:{int(time.time() // self.window)}"
-
-        # Check the current request count for the client
-        request_count = self.redis_client.incr(key)
-        if request_count is None:
+        limit, window = target
+        ip_addr = self.client_ip(request)
+        key = f"rate_limit:{request.method}:{request_path}:{ip_addr}"
+        moment = time.time()
+
+        blocked_till = self.blocked.get(key)
+        if blocked_till is not None:
+            if blocked_till > moment:
+                return self.rejected(blocked_till - moment)
+            self.blocked.pop(key, None)
+
+        try:
+            estimated, current_count, previous_count = self.redis_client.hit(key, window, moment)
+        except RedisError as exc:
             # ignore Cache errors
+            logger.error(f"Rate limiter failed to reach Redis: {exc}")
             return self.get_response(request)
 
-        if request_count == 1:
-            # Set an expiration for the key if it's the first request within the window
-            self.redis_client.expire(key, self.window)
-
         # Check if the client has exceeded the rate limit
-        if request_count > self.limit:
+        if estimated > limit:
             logger.critical(f"Rate limit exceeded for [{key}]")
-            return HttpResponseRateLimitExceeded(content=b'please try again later')
+            retry_after = self.retry_after(limit, window, moment, current_count, previous_count)
+            self.block(key, moment + retry_after)
+            return self.rejected(retry_after)
 
         return self.get_response(request)
 
+    def build_targets(self, target_paths):
+        """
+        Items of RATE_LIMIT_TARGET_PATHS are tuples (method, path) which are using default limit and window,
+        or (method, path, limit, window_seconds) to set specific limit for given end-point.
+        """
+        targets = {}
+        for target in target_paths:
+            method, path = target[0], target[1].rstrip("/")
+            limit = target[2] if len(target) > 2 else self.limit
+            window = target[3] if len(target) > 3 else self.window
+            targets[(method, path, )] = (limit, window, )
+        return targets
+
+    def retry_after(self, limit, window, moment, current_count, previous_count):
+        """
+        Number of seconds the estimated number of requests stays over the limit if no more requests are made.
+        """
+        window_ends = window - (moment % window)
+        if current_count > limit or not previous_count:
+            return window_ends
+        # estimation is going down while the previous window slides away
+        remaining = (1.0 - (limit - current_count) / float(previous_count)) * window - (moment % window)
+        return max(0.0, min(remaining, window_ends))
+
+    def block(self, key, blocked_till):
+        if len(self.blocked) >= LOCAL_BLOCKED_MAX_SIZE:
+            moment = time.time()
+            self.blocked = {k: v for k, v in self.blocked.items() if v > moment}
+            if len(self.blocked) >= LOCAL_BLOCKED_MAX_SIZE:
+                return
+        self.blocked[key] = blocked_till
+
+    def rejected(self, retry_after):
+        response = HttpResponseRateLimitExceeded(content=b'please try again later')
+        response['Retry-After'] = str(int(retry_after) + 1)
+        return response
+
     def client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
@@ -115,3 +115,96 @@ def test_process_notifications_queue_with_failed(mock_send):
     notifications.process_notifications_queue(iterations=1, delay=0.1, iteration_delay=0.1)
     new_notification.refresh_from_db()
     assert new_notification.status == 'failed'
+
+
+@pytest.mark.django_db
+@mock.patch('accounts.notifications.zdomains.list_domains_details')
+def test_process_notifications_batch(mock_list_domains_details):
+    from django.core import mail
+    tester = testsupport.prepare_tester_account()
+    mock_list_domains_details.return_value = []
+    new_notifications = [notifications.start_email_notification_domain_expiring(
+        user=tester,
+        domain_name='abcd%d.ai' % i,
+        expiry_date='2050-01-01',
+    ) for i in range(3)]
+    result = notifications.process_notifications_batch(batch_size=2)
+    assert result == {'sent': 2, 'failed': 0, 'skipped': 0, }
+    assert len(mail.outbox) == 2
+    # domains details are prepared only once per account within the batch
+    mock_list_domains_details.assert_called_once_with(tester)
+    assert notifications.queue_stats()['pending'] == 1
+    assert notifications.process_notifications_batch(batch_size=2) == {'sent': 1, 'failed': 0, 'skipped': 0, }
+    assert notifications.process_notifications_batch(batch_size=2) == {'sent': 0, 'failed': 0, 'skipped': 0, }
+    for new_notification in new_notifications:
+        new_notification.refresh_from_db()
+        assert new_notification.status == 'sent'
+
+
+@pytest.mark.django_db
+def test_process_notifications_batch_skipped():
+    tester = testsupport.prepare_tester_account(email_notifications_enabled=False)
+    new_notification = notifications.start_email_notification_domain_expiring(
+        user=tester,
+        domain_name='abcd.ai',
+        expiry_date='2050-01-01',
+    )
+    assert notifications.process_notifications_batch(batch_size=10) == {'sent': 0, 'failed': 0, 'skipped': 1, }
+    new_notification.refresh_from_db()
+    assert new_notification.status == 'skipped'
+
+
+@pytest.mark.django_db
+@mock.patch('accounts.notifications.execute_email_notification')
+def test_process_notifications_batch_status_stored_after_each_send(mock_execute):
+    tester = testsupport.prepare_tester_account()
+    new_notifications = [notifications.start_email_notification_domain_expiring(
+        user=tester,
+        domain_name='abcd%d.ai' % i,
+        expiry_date='2050-01-01',
+    ) for i in range(2)]
+    seen_statuses = []
+
+    def _execute(one_notification, **kwargs):
+        seen_statuses.append([n.status for n in notifications.Notification.notifications.order_by('id')])
+        if one_notification.id == new_notifications[1].id:
+            raise Exception('some error while sending')
+        return True
+
+    mock_execute.side_effect = _execute
+    assert notifications.process_notifications_batch(batch_size=10) == {'sent': 1, 'failed': 1, 'skipped': 0, }
+    assert seen_statuses == [['sending', 'sending', ], ['sent', 'sending', ], ]
+    new_notifications[1].refresh_from_db()
+    assert new_notifications[1].status == 'failed'
+
+
+@pytest.mark.django_db
+def test_release_stuck_notifications():
+    import datetime
+    from django.utils import timezone
+    tester = testsupport.prepare_tester_account()
+    new_notification = notifications.start_email_notification_domain_expiring(
+        user=tester,
+        domain_name='abcd.ai',
+        expiry_date='2050-01-01',
+    )
+    assert len(notifications.claim_notifications_batch(batch_size=10)) == 1
+    assert notifications.claim_notifications_batch(batch_size=10) == []
+    assert notifications.release_stuck_notifications() == 0
+    notifications.Notification.notifications.filter(id=new_notification.id).update(
+        claimed_at=timezone.now() - datetime.timedelta(minutes=31),
+    )
+    assert notifications.release_stuck_notifications() == 1
+    new_notification.refresh_from_db()
+    assert new_notification.status == 'started'
+    assert new_notification.claimed_at is None
+
+
+@mock.patch('accounts.notifications.time.sleep')
+@mock.patch('accounts.notifications.time.monotonic')
+def test_send_rate_limiter(mock_monotonic, mock_sleep):
+    mock_monotonic.return_value = 100.0
+    rate_limiter = notifications.SendRateLimiter(max_per_second=4)
+    for _ in range(3):
+        rate_limiter.wait()
+    assert [c[0][0] for c in mock_sleep.call_args_list] == [0.25, 0.5, ]
@@ -9,7 +9,7 @@ from django.test import TestCase
 
 from tests import testsupport
 
-from accounts.tasks import activations_cleanup, check_notify_domain_expiring
+from accounts.tasks import activations_cleanup, check_notify_domain_expiring, check_notify_domains_expiring
 from accounts.models import Account
 from accounts.models.activation import Activation
 from accounts.models.notification import Notification
@@ -335,3 +335,26 @@ class TestCheckNotifyDomainExpiring(TestCase):
             subject='domain_expiring',
         )
         assert len(outgoing_emails_one_more) == 0
+
+    @pytest.mark.django_db
+    def test_multiple_windows_at_once(self):
+        tester = testsupport.prepare_tester_account()
+        for domain_name, days_left in (('abcd.ai', 45, ), ('efgh.ai', 15, ), ('ijkl.ai', 100, ), ):
+            tester_domain = testsupport.prepare_tester_domain(
+                domain_name=domain_name,
+                tester=tester,
+                domain_epp_id='epp_' + domain_name,
+            )
+            tester_domain.expiry_date = timezone.now() + datetime.timedelta(days=days_left, hours=1)
+            tester_domain.status = 'active'
+            tester_domain.save()
+        windows = [
+            (7, 30, 'domain_expire_soon', ),
+            (31, 60, 'domain_expiring', ),
+        ]
+        outgoing_emails = check_notify_domains_expiring(dry_run=False, windows=windows)
+        assert sorted([(e[0], e[1], ) for e in outgoing_emails]) == [(tester, 'abcd.ai', ), (tester, 'efgh.ai', ), ]
+        assert Notification.notifications.filter(subject='domain_expiring', domain_name='abcd.ai').count() == 1
+        assert Notification.notifications.filter(subject='domain_expire_soon', domain_name='efgh.ai').count() == 1
+        assert Notification.notifications.get(domain_name='abcd.ai').recipient == tester.profile.contact_email
+        assert check_notify_domains_expiring(dry_run=False, windows=windows) == []
@@ -1,4 +1,5 @@
 import os
+import mock
 import pytest
 
 from django.conf import settings
@@ -75,3 +76,18 @@ def test_domain_refreshed():
     assert outputs[2]['epp']['response']['result']['@code'] == '1000'
     assert outputs[3]['epp']['response']['result']['@code'] == '1000'
     assert outputs[4]['epp']['response']['result']['@code'] == '1000'
+
+
+@mock.patch('zen.zcache.contacts_info_many')
+def test_contacts_info_many_registrant_missing(mock_contacts_info_many):
+    mock_contacts_info_many.return_value = {'admin1': {}, }
+    dr = domain_refresher.DomainRefresher(
+        log_events=False,
+        log_transitions=False,
+    )
+    dr.received_contacts = [{'type': 'admin', 'id': 'admin1', }, ]
+    dr.received_registrant_epp_id = None
+    with mock.patch.object(dr, 'event') as mock_event:
+        dr.doEppContactsInfoMany()
+    assert mock_event.call_args[0][0] == 'error'
+    assert str(mock_event.call_args[0][1]).count('registrant ID is not known')
@@ -0,0 +1,111 @@
+import mock
+import pytest
+
+from django.core import mail
+
+from back import announcements
+from back.models.announcement_delivery import AnnouncementDelivery
+
+
+_recipients = [
+    {'email': 'customer1@zenaida.ai', 'person_name': 'Customer One', },
+    {'email': 'customer2@zenaida.ai', },
+    {'email': 'customer3@zenaida.ai', },
+]
+
+
+@pytest.mark.django_db
+def test_prepare_deliveries():
+    assert announcements.prepare_deliveries('test', _recipients) == 3
+    AnnouncementDelivery.deliveries.filter(email='customer1@zenaida.ai').update(status='sent')
+    assert announcements.prepare_deliveries('test', _recipients + [{'email': 'customer4@zenaida.ai', }, ]) == 1
+    assert announcements.delivery_stats('test') == {'pending': 3, 'sending': 0, 'sent': 1, 'failed': 0, }
+
+
+@pytest.mark.django_db
+def test_send_announcement():
+    report = announcements.send_announcement(
+        announcement='test',
+        template_name='email/test_email.html',
+        data={'subject': 'Test announcement', },
+        from_email='admin@zenaida.ai',
+        recipients=_recipients,
+        batch_size=2,
+    )
+    assert report['sent'] == 3
+    assert report['failed'] == 0
+    assert len(mail.outbox) == 3
+    assert mail.outbox[0].subject == 'Test announcement'
+    assert announcements.delivery_stats('test') == {'pending': 0, 'sending': 0, 'sent': 3, 'failed': 0, }
+
+
+@pytest.mark.django_db
+def test_send_announcement_resumed():
+    announcements.prepare_deliveries('test', _recipients)
+    AnnouncementDelivery.deliveries.filter(email='customer1@zenaida.ai').update(status='sent')
+    report = announcements.send_announcement(
+        announcement='test',
+        template_name='email/test_email.html',
+        data={'subject': 'Test announcement', },
+        from_email='admin@zenaida.ai',
+        recipients=_recipients,
+    )
+    assert report['sent'] == 2
+    assert sorted(m.to[0] for m in mail.outbox) == ['customer2@zenaida.ai', 'customer3@zenaida.ai', ]
+
+
+@pytest.mark.django_db
+@mock.patch('back.announcements.EmailMultiAlternatives.send')
+def test_send_announcement_failed(mock_send):
+    mock_send.side_effect = [1, Exception('connection refused'), 1, ]
+    report = announcements.send_announcement(
+        announcement='test',
+        template_name='email/test_email.html',
+        data={'subject': 'Test announcement', },
+        from_email='admin@zenaida.ai',
+        recipients=_recipients,
+    )
+    assert report['sent'] == 2
+    assert report['failed'] == 1
+    failed = AnnouncementDelivery.deliveries.get(status='failed')
+    assert failed.email == 'customer2@zenaida.ai'
+    assert failed.error == 'connection refused'
+    assert announcements.retry_failed('test') == 1
+    assert announcements.delivery_stats('test') == {'pending': 1, 'sending': 0, 'sent': 2, 'failed': 0, }
+
+
+def test_renderer_renders_every_recipient():
+    with mock.patch('back.announcements.get_template') as mock_get_template:
+        mock_get_template.return_value.render.side_effect = lambda context, request: '<p>Hello %s</p>' % context['email']
+        renderer = announcements.AnnouncementRenderer('email/test_email.html', {'subject': 'Test', })
+        assert renderer.render('a@zenaida.ai', None) == ('Test', '<p>Hello a@zenaida.ai</p>', 'Hello a@zenaida.ai', )
+        assert renderer.render('b@zenaida.ai', None) == ('Test', '<p>Hello b@zenaida.ai</p>', 'Hello b@zenaida.ai', )
+    mock_get_template.assert_called_once_with('email/test_email.html')
+
+
+@pytest.mark.django_db
+@mock.patch('back.announcements.EmailMultiAlternatives.send')
+def test_send_batch_stores_state_of_every_recipient(mock_send):
+    announcements.prepare_deliveries('test', _recipients)
+
+    def _send():
+        # the first recipient must be already stored as sent before the second message goes out
+        if mock_send.call_count == 2:
+            assert AnnouncementDelivery.deliveries.get(email='customer1@zenaida.ai').status == 'sent'
+            raise Exception('process was killed')
+        return 1
+
+    mock_send.side_effect = _send
+    renderer = announcements.AnnouncementRenderer('email/test_email.html', {'subject': 'Test', })
+    assert announcements.send_batch('test', renderer, 'admin@zenaida.ai', batch_size=2) == {'sent': 1, 'failed': 1, }
+    assert announcements.delivery_stats('test') == {'pending': 1, 'sending': 0, 'sent': 1, 'failed': 1, }
+
+
+@pytest.mark.django_db
+def test_release_stuck():
+    announcements.prepare_deliveries('test', _recipients)
+    assert len(announcements.claim_batch('test', batch_size=2)) == 2
+    assert announcements.claim_batch('test', batch_size=2)[0].email == 'customer3@zenaida.ai'
+    assert announcements.release_stuck('test') == 0
+    assert announcements.release_stuck('test', stuck_minutes=-1) == 3
+    assert announcements.delivery_stats('test')['pending'] == 3
@@ -1,7 +1,10 @@
 import os
+import datetime
 import pytest
+import mock
 
 from back import csv_import
+from back.models.domain_snapshot import DomainSnapshot
 
 from zen import zdomains
 from zen import zusers 
@@ -35,3 +38,94 @@ def test_domain_regenerate_from_csv_row():
     assert domain2.registrant.epp_id == 'epp583472wixr'
     assert domain2.contact_admin.epp_id == 'epp583456ht51'
     assert domain2.list_nameservers() == ['ns1.google.com', 'ns2.google.com', 'ns3.google.com', '']
+
+
+@pytest.mark.django_db
+def test_load_from_csv_progress_and_resume():
+    filename = os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv'))
+    progress = []
+    assert csv_import.load_from_csv(filename, dry_run=False, batch_size=1, progress_callback=lambda **kw: progress.append(kw)) == 2
+    assert [p['position'] for p in progress] == [1, 2, ]
+    assert [p['processed'] for p in progress] == [1, 1, ]
+    assert all(not p['failures'] for p in progress)
+    progress = []
+    assert csv_import.load_from_csv(filename, dry_run=True, start_position=1, progress_callback=lambda **kw: progress.append(kw)) == 1
+    assert len(progress) == 1
+    assert progress[0]['position'] == 2
+
+
+@pytest.mark.django_db
+def test_load_from_csv_failing_row():
+    filename = os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv'))
+    progress = []
+    original = csv_import.domain_regenerate_from_csv_row
+
+    def _regenerate(csv_row, *args, **kwargs):
+        if csv_row[4] == 'test-import-1.ai':
+            raise Exception('broken row')
+        return original(csv_row, *args, **kwargs)
+
+    with mock.patch('back.csv_import.domain_regenerate_from_csv_row', _regenerate):
+        assert csv_import.load_from_csv(filename, dry_run=False, progress_callback=lambda **kw: progress.append(kw)) == 2
+    assert len(progress) == 1
+    assert progress[0]['position'] == 2
+    assert len(progress[0]['failures']) == 1
+    assert progress[0]['failures'][0]['position'] == 1
+    assert progress[0]['failures'][0]['domain'] == 'test-import-1.ai'
+    assert zdomains.domain_find('test-import-1.ai') is None
+    assert zdomains.domain_find('test-import-2.ai') is not None
+
+
+def test_csv_columns():
+    headers = ['client_id', 'Name', 'registrant_Phone', ]
+    columns = csv_import.csv_columns(headers)
+    assert columns is csv_import.csv_columns(list(headers))
+    csv_record = columns.record(['zenaida_ai', ' test.ai ', ])
+    assert csv_record.get('client_id_0') == 'zenaida_ai'
+    assert csv_record.get('name_1') == 'test.ai'
+    assert csv_record.get('registrant_phone_2', '') == ''
+    assert csv_record.get('roid_0') is None
+
+
+def test_normalize_phone():
+    assert csv_import.normalize_phone('+1 (264) 111-2233') == '+12641112233'
+    assert csv_import.normalize_phone('+31.612 341 234 ext. 5') == '+31.612341234.5'
+    assert csv_import.normalize_phone('+1234567890123456789') == '+1234567890123456'
+    assert csv_import.normalize_phone('') == ''
+
+
+def test_parse_date():
+    assert csv_import.parse_date('2017-12-16').date() == datetime.date(2017, 12, 16)
+    assert csv_import.parse_date('2017-1-5').date() == datetime.date(2017, 1, 5)
+    with pytest.raises(ValueError):
+        csv_import.parse_date('2017-13-01')
+
+
+@pytest.mark.django_db
+def test_snapshot_diff(tmp_path):
+    filename = os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv'))
+    diff = csv_import.snapshot_diff(filename)
+    assert diff['added'] == {'test-import-1.ai', 'test-import-2.ai', }
+    assert csv_import.load_from_csv(filename, dry_run=False) == 2
+    diff = csv_import.snapshot_diff(filename)
+    assert csv_import.diff_summary(diff) == '0 added, 0 changed, 0 removed, 2 unchanged'
+    with open(filename) as csv_file:
+        lines = csv_file.read().splitlines()
+    modified_filename = str(tmp_path / 'domains_modified.csv')
+    with open(modified_filename, 'w') as csv_file:
+        csv_file.write('\n'.join([lines[0], lines[2].replace('ns3.google.com', 'ns4.google.com'), ]) + '\n')
+    diff = csv_import.snapshot_diff(modified_filename)
+    assert diff['added'] == set()
+    assert diff['changed'] == {'test-import-2.ai', }
+    assert diff['removed'] == {'test-import-1.ai', }
+    assert diff['unchanged'] == 0
+    # without synchronization nothing is done with removed domains, so their snapshots are kept
+    csv_import.load_from_csv(modified_filename, dry_run=False, changed_only=True)
+    assert DomainSnapshot.snapshots.filter(name='test-import-1.ai').exists()
+
+
+@pytest.mark.django_db
+def test_load_from_csv_changed_only():
+    filename = os.path.abspath(os.path.join(os.path.dirname(__file__), 'domains_sample.csv'))
+    assert csv_import.load_from_csv(filename, dry_run=False, changed_only=True) == 2
+    assert csv_import.load_from_csv(filename, dry_run=False, changed_only=True) == 0
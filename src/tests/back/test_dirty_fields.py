@@ -0,0 +1,75 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from back import dirty_fields
+from back.models.domain import Domain
+
+from tests import testsupport
+
+from zen import zdomains
+
+
+@pytest.mark.django_db
+def test_unchanged_domain_save_skipped():
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abcd.ai')
+    domain_object = Domain.domains.get(id=tester_domain.id)
+    assert domain_object.get_dirty_fields() == []
+    before = dirty_fields.counters()
+    with CaptureQueriesContext(connection) as queries:
+        domain_object.save()
+    assert len(queries) == 0
+    assert dirty_fields.counters_difference(before)['skipped'] == 1
+
+
+@pytest.mark.django_db
+def test_only_modified_columns_written():
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abcd.ai')
+    domain_object = Domain.domains.get(id=tester_domain.id)
+    domain_object.auth_key = 'abc123'
+    assert domain_object.get_dirty_fields() == ['auth_key', ]
+    with CaptureQueriesContext(connection) as queries:
+        domain_object.save()
+    assert len(queries) == 1
+    assert '"auth_key"' in queries[0]['sql']
+    assert '"nameserver1"' not in queries[0]['sql']
+    assert domain_object.get_dirty_fields() == []
+    assert Domain.domains.get(id=tester_domain.id).auth_key == 'abc123'
+
+
+@pytest.mark.django_db
+def test_explicit_update_fields_keep_other_fields_dirty():
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abcd.ai')
+    domain_object = Domain.domains.get(id=tester_domain.id)
+    domain_object.auth_key = 'abc123'
+    domain_object.nameserver1 = 'ns1.example.com'
+    domain_object.save(update_fields=['auth_key', ])
+    assert domain_object.get_dirty_fields() == ['nameserver1', ]
+    domain_object.save()
+    assert domain_object.get_dirty_fields() == []
+    assert Domain.domains.get(id=tester_domain.id).nameserver1 == 'ns1.example.com'
+
+
+@pytest.mark.django_db
+def test_json_field_modified_in_place():
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abcd.ai', domain_epp_statuses={'ok': 'Active'})
+    domain_object = Domain.domains.get(id=tester_domain.id)
+    domain_object.epp_statuses['clientHold'] = 'Suspended'
+    assert domain_object.get_dirty_fields() == ['epp_statuses', ]
+    domain_object.save()
+    assert Domain.domains.get(id=tester_domain.id).epp_statuses == {'ok': 'Active', 'clientHold': 'Suspended', }
+
+
+@pytest.mark.django_db
+def test_domain_replace_contacts_single_write():
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abcd.ai')
+    domain_object = Domain.domains.get(id=tester_domain.id)
+    new_contact = domain_object.contact_admin
+    with CaptureQueriesContext(connection) as queries:
+        zdomains.domain_replace_contacts(domain_object, new_admin_contact=new_contact, new_tech_contact=new_contact)
+    assert len([q for q in queries if q['sql'].startswith('UPDATE')]) == 1
+    domain_object = Domain.domains.get(id=tester_domain.id)
+    assert domain_object.contact_admin == new_contact
+    assert domain_object.contact_tech == new_contact
+    assert domain_object.contact_billing is None
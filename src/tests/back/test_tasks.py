@@ -12,6 +12,7 @@ from accounts.models.notification import Notification
 from accounts.notifications import process_notifications_queue
 from back import tasks
 from back.models.back_end_renew import BackEndRenew
+from back.models.task_checkpoint import TaskCheckpoint
 from billing import orders
 from epp import rpc_error
 from zen import zdomains
@@ -80,6 +81,69 @@ class TestSyncExpiredDomains(TestCase):
         report = tasks.sync_expired_domains(dry_run=False)
         assert len(report) == 0
 
+    @pytest.mark.django_db
+    @mock.patch('zen.zmaster.domain_synchronize_from_backend')
+    def test_skip_synchronized_in_window(self, mock_domain_synchronize_from_backend):
+        tester = testsupport.prepare_tester_account()
+        tester_domain = testsupport.prepare_tester_domain(
+            domain_name='abcd.ai',
+            tester=tester,
+            domain_epp_id='aaa123',
+        )
+        tester_domain.expiry_date = timezone.now() - datetime.timedelta(days=1)  # already expired a day ago
+        tester_domain.status = 'active'
+        tester_domain.latest_sync_date = timezone.now() + datetime.timedelta(seconds=1)
+        tester_domain.save()
+        report = tasks.sync_expired_domains(dry_run=False)
+        assert len(report) == 0
+        mock_domain_synchronize_from_backend.assert_not_called()
+        checkpoint = TaskCheckpoint.checkpoints.get(name='sync_expired_domains')
+        assert checkpoint.skipped == 1
+        assert checkpoint.processed == 0
+        assert checkpoint.position == 0
+        assert checkpoint.duration is not None
+
+    @pytest.mark.django_db
+    @mock.patch('zen.zmaster.domain_synchronize_from_backend')
+    def test_continue_from_checkpoint(self, mock_domain_synchronize_from_backend):
+        mock_domain_synchronize_from_backend.return_value = ['ok', ]
+        tester = testsupport.prepare_tester_account()
+        tester_domains = []
+        for domain_name in ['abcd.ai', 'efgh.ai', ]:
+            tester_domain = testsupport.prepare_tester_domain(
+                domain_name=domain_name,
+                tester=tester,
+                domain_epp_id='epp_' + domain_name,
+            )
+            tester_domain.expiry_date = timezone.now() - datetime.timedelta(days=1)  # already expired a day ago
+            tester_domain.status = 'active'
+            tester_domain.save()
+            tester_domains.append(tester_domain)
+        # previous iteration was interrupted after the first domain
+        TaskCheckpoint.checkpoints.create(
+            name='sync_expired_domains',
+            position=tester_domains[0].id,
+            window_started=timezone.now() - datetime.timedelta(minutes=1),
+        )
+        report = tasks.sync_expired_domains(dry_run=False, batch_size=1)
+        assert report == [(tester_domains[1], ['ok', ], ), ]
+        checkpoint = TaskCheckpoint.checkpoints.get(name='sync_expired_domains')
+        assert checkpoint.processed == 1
+        assert checkpoint.failed == 0
+        assert checkpoint.position == 0
+
+    @pytest.mark.django_db
+    @mock.patch('zen.zmaster.domain_synchronize_from_backend')
+    def test_dry_run_checkpoint_not_stored(self, mock_domain_synchronize_from_backend):
+        tester_domain = testsupport.prepare_tester_domain(domain_name='abcd.ai', domain_epp_id='aaa123')
+        tester_domain.expiry_date = timezone.now() - datetime.timedelta(days=1)  # already expired a day ago
+        tester_domain.status = 'active'
+        tester_domain.save()
+        report = tasks.sync_expired_domains(dry_run=True)
+        assert report == [(tester_domain, [], ), ]
+        mock_domain_synchronize_from_backend.assert_not_called()
+        assert TaskCheckpoint.checkpoints.filter(name='sync_expired_domains').count() == 0
+
 
 class TestBackEndAutoRenewExpiringDomains(TestCase):
 
@@ -1,11 +1,21 @@
+import threading
+
 import mock
 import pytest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from base.exceptions import ExceededMaxAttemptsException
 from base.bruteforceprotection import BruteForceProtection
 
 
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test_bruteforceprotection',
+    }
+}
+
+
 class TestBruteForceProtection(TestCase):
 
     def setUp(self):
@@ -19,13 +29,71 @@ class TestBruteForceProtection(TestCase):
     def test_read_total_attempts(self):
         assert self.brute_force_protection.read_total_attempts() == 0
 
-    @mock.patch('django.core.cache.cache.set')
-    def test_increase_total_attempts(self, mock_cache_set):
+    @mock.patch('django.core.cache.cache.add')
+    @mock.patch('django.core.cache.cache.incr')
+    def test_increase_total_attempts(self, mock_cache_incr, mock_cache_add):
+        mock_cache_incr.side_effect = ValueError('not found')
+        mock_cache_add.return_value = True
         assert self.brute_force_protection.increase_total_attempts() == 1
-        mock_cache_set.assert_called_once_with('test_hashkey_prefix_192.168.1.1', 1, timeout=2)
+        mock_cache_add.assert_called_once_with('test_hashkey_prefix_192.168.1.1', 1, timeout=2)
 
+    @mock.patch('django.core.cache.cache.add')
+    @mock.patch('django.core.cache.cache.incr')
+    def test_increase_total_attempts_existing_counter(self, mock_cache_incr, mock_cache_add):
+        mock_cache_incr.return_value = 5
+        assert self.brute_force_protection.increase_total_attempts() == 5
+        mock_cache_incr.assert_called_once_with('test_hashkey_prefix_192.168.1.1')
+        mock_cache_add.assert_not_called()
+
+    @mock.patch('django.core.cache.cache.set')
     @mock.patch('django.core.cache.cache.get')
-    def test_register_attempt_returns_exception(self, mock_cache_get):
-        mock_cache_get.return_value = 2
+    @mock.patch('django.core.cache.cache.add')
+    @mock.patch('django.core.cache.cache.incr')
+    def test_increase_total_attempts_cache_not_reachable(self, mock_cache_incr, mock_cache_add, mock_cache_get, mock_cache_set):
+        mock_cache_incr.side_effect = ValueError('not found')
+        mock_cache_add.return_value = False
+        mock_cache_get.return_value = 3
+        assert self.brute_force_protection.increase_total_attempts() == 4
+        mock_cache_set.assert_called_once_with('test_hashkey_prefix_192.168.1.1', 4, timeout=2)
+
+    @mock.patch('django.core.cache.cache.add')
+    @mock.patch('django.core.cache.cache.incr')
+    def test_increase_total_attempts_counter_created_in_parallel(self, mock_cache_incr, mock_cache_add):
+        mock_cache_incr.side_effect = [ValueError('not found'), 2, ]
+        mock_cache_add.return_value = False
+        assert self.brute_force_protection.increase_total_attempts() == 2
+        assert mock_cache_incr.call_count == 2
+
+    @mock.patch('django.core.cache.cache.incr')
+    def test_register_attempt_returns_exception(self, mock_cache_incr):
+        mock_cache_incr.return_value = 2
         with pytest.raises(ExceededMaxAttemptsException):
             self.brute_force_protection.register_attempt()
+
+    @mock.patch('django.core.cache.cache.get')
+    def test_is_blocked(self, mock_cache_get):
+        mock_cache_get.return_value = 1
+        assert self.brute_force_protection.is_blocked() is True
+        mock_cache_get.return_value = None
+        assert self.brute_force_protection.is_blocked() is False
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+def test_register_attempt_concurrent():
+    results = []
+
+    def _attempt():
+        brute_force = BruteForceProtection(cache_key_prefix='test_concurrent', key='10.0.0.1', max_attempts=5, timeout=10)
+        try:
+            brute_force.register_attempt()
+            results.append(True)
+        except ExceededMaxAttemptsException:
+            results.append(False)
+
+    threads = [threading.Thread(target=_attempt) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 5
+    assert results.count(False) == 15
@@ -0,0 +1,83 @@
+import datetime
+
+import mock
+import pytest
+
+from django.utils import timezone
+
+from billing import documents
+from billing import orders
+from billing.models.order import Order
+from billing.models.order_item import OrderItem
+
+from tests import testsupport
+
+
+def _prepare_orders(owner, count):
+    for i in range(count):
+        finished_at = timezone.make_aware(datetime.datetime(2020, 1 + i % 12, 10, 12, 0, 0))
+        order = Order.orders.create(owner=owner, started_at=finished_at, finished_at=finished_at, status='processed')
+        OrderItem.order_items.create(order=order, price=100.0, type='domain_renew', name='test%d.ai' % i, status='processed')
+
+
+def test_cache_read_write(settings, tmp_path):
+    settings.ZENAIDA_BILLING_PDF_CACHE_DIR = str(tmp_path)
+    key = documents.cache_key('receipt', 1, 2020)
+    assert documents.cache_read(key) is None
+    assert documents.cache_write(key, b'%PDF-1.4') is True
+    assert documents.cache_read(key) == b'%PDF-1.4'
+    settings.ZENAIDA_BILLING_PDF_CACHE_TTL_SECONDS = -1
+    assert documents.cache_read(key) is None
+
+
+def test_cache_disabled(settings):
+    settings.ZENAIDA_BILLING_PDF_CACHE_DIR = ''
+    assert documents.cache_write('abcd', b'%PDF-1.4') is False
+    assert documents.cache_read('abcd') is None
+
+
+def test_cache_cleanup(settings, tmp_path):
+    settings.ZENAIDA_BILLING_PDF_CACHE_DIR = str(tmp_path)
+    documents.cache_write(documents.cache_key('receipt', 1, 2020), b'%PDF-1.4')
+    documents.cache_write(documents.cache_key('receipt', 1, 2021), b'%PDF-1.4')
+    assert documents.cache_cleanup() == 0
+    settings.ZENAIDA_BILLING_PDF_CACHE_TTL_SECONDS = -1
+    assert documents.cache_cleanup() == 2
+    assert documents.cache_read(documents.cache_key('receipt', 1, 2020)) is None
+
+
+@pytest.mark.django_db
+@mock.patch('billing.orders.get_template')
+@mock.patch('billing.documents.pdfkit.from_string')
+def test_build_receipt_cached(mock_from_string, mock_get_template, settings, tmp_path):
+    settings.ZENAIDA_BILLING_PDF_CACHE_DIR = str(tmp_path)
+    mock_from_string.return_value = b'%PDF-1.4'
+    mock_get_template.return_value.render.return_value = '<html></html>'
+    tester = testsupport.prepare_tester_account()
+    _prepare_orders(tester, 24)
+    pdf_info = orders.build_receipt(owner=tester, year=2020)
+    assert pdf_info == {'body': b'%PDF-1.4', 'filename': '2020_receipt.pdf', }
+    mock_from_string.assert_called_once_with('<html></html>', False)
+    assert len(mock_get_template.return_value.render.call_args[0][0]['domain_orders']) == 24
+    # second call is served from the cache
+    assert orders.build_receipt(owner=tester, year=2020) == pdf_info
+    assert mock_from_string.call_count == 1
+    # new order changes the key and the receipt is rendered again
+    _prepare_orders(tester, 1)
+    orders.build_receipt(owner=tester, year=2020)
+    assert mock_from_string.call_count == 2
+    # changed profile of the customer also changes the key
+    tester.profile.person_name = 'Another Name'
+    tester.profile.save()
+    orders.build_receipt(owner=tester, year=2020)
+    assert mock_from_string.call_count == 3
+
+
+@pytest.mark.django_db
+@mock.patch('billing.orders.get_template')
+@mock.patch('billing.documents.pdfkit.from_string')
+def test_build_receipt_no_orders(mock_from_string, mock_get_template, settings, tmp_path):
+    settings.ZENAIDA_BILLING_PDF_CACHE_DIR = str(tmp_path)
+    tester = testsupport.prepare_tester_account()
+    assert orders.build_receipt(owner=tester, year=2020) is None
+    mock_from_string.assert_not_called()
@@ -0,0 +1,79 @@
+import datetime
+
+import mock
+import pytest
+
+from django.utils import timezone
+
+from billing import summaries
+from billing.models.financial_summary import FinancialSummary
+
+from tests import testsupport
+
+
+@pytest.mark.django_db
+def test_month_summary():
+    tester = testsupport.prepare_tester_account(join_date=timezone.make_aware(datetime.datetime(2019, 1, 5)))
+    testsupport.prepare_tester_order(domain_name='test1.ai', status='processed', owner=tester,
+                                     finished_at=timezone.make_aware(datetime.datetime(2019, 1, 10)))
+    testsupport.prepare_tester_order(domain_name='test2.ai', order_type='domain_renew', price=200.0, status='processed',
+                                     owner=tester, finished_at=timezone.make_aware(datetime.datetime(2019, 1, 20)))
+    testsupport.prepare_tester_order(domain_name='test3.ai', status='processed', owner=tester,
+                                     finished_at=timezone.make_aware(datetime.datetime(2019, 2, 1)))
+    summary = summaries.month_summary(2019, 1)
+    assert summary.orders_count == 2
+    assert summary.items_count == 2
+    assert summary.total_payment == 300.0
+    assert summary.new_users == 1
+    assert summary.totals_by_type == {
+        'domain_register': {'count': 1, 'amount': 100.0, },
+        'domain_renew': {'count': 1, 'amount': 200.0, },
+    }
+
+
+@pytest.mark.django_db
+def test_past_month_summary_not_calculated_again():
+    tester = testsupport.prepare_tester_account()
+    testsupport.prepare_tester_order(domain_name='test1.ai', status='processed', owner=tester,
+                                     finished_at=timezone.make_aware(datetime.datetime(2019, 1, 10)))
+    first = summaries.month_summary(2019, 1)
+    with mock.patch('billing.summaries.calculate_month') as mock_calculate_month:
+        assert summaries.month_summary(2019, 1) == first
+        mock_calculate_month.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_period_summary():
+    tester = testsupport.prepare_tester_account()
+    for month in (1, 5, 12, ):
+        testsupport.prepare_tester_order(domain_name='test%d.ai' % month, status='processed', owner=tester,
+                                         finished_at=timezone.make_aware(datetime.datetime(2019, month, 10)))
+    result = summaries.period_summary(2019)
+    assert result['orders_count'] == 3
+    assert result['total_payment'] == 300.0
+    assert FinancialSummary.summaries.count() == 12
+
+
+@pytest.mark.django_db
+def test_order_finished_updates_summary():
+    tester = testsupport.prepare_tester_account()
+    summaries.month_summary(2019, 1)
+    order = testsupport.prepare_tester_order(domain_name='test1.ai', status='processed', owner=tester,
+                                             finished_at=timezone.make_aware(datetime.datetime(2019, 1, 10)))
+    with mock.patch('billing.summaries.calculate_month') as mock_calculate_month:
+        summaries.order_finished(order)
+        mock_calculate_month.assert_not_called()
+    summary = summaries.month_summary(2019, 1)
+    assert summary.orders_count == 1
+    assert summary.items_count == 1
+    assert summary.total_payment == 100.0
+    assert summary.totals_by_type == {'domain_register': {'count': 1, 'amount': 100.0, }, }
+
+
+@pytest.mark.django_db
+def test_order_finished_summary_not_calculated_yet():
+    tester = testsupport.prepare_tester_account()
+    order = testsupport.prepare_tester_order(domain_name='test1.ai', status='processed', owner=tester,
+                                             finished_at=timezone.make_aware(datetime.datetime(2019, 1, 10)))
+    assert summaries.order_finished(order) is None
+    assert FinancialSummary.summaries.count() == 0
@@ -0,0 +1,107 @@
+import mock
+import pytest
+import datetime
+
+from django.test import override_settings
+from django.utils import timezone
+
+from board import bulk_transfers
+from board.models.bulk_transfer import BulkTransfer
+
+from tests import testsupport
+
+
+def _domain_info(domain_name, registrar='another_registrar', statuses=None, auth_code='12345'):
+    return [{
+        'epp': {
+            'response': {
+                'resData': {
+                    'infData': {
+                        'clID': registrar,
+                        'status': [{'@s': s} for s in (statuses or ['ok', ])],
+                        'authInfo': {'pw': auth_code, },
+                    },
+                },
+            },
+        },
+    }, {domain_name: True, }, ]
+
+
+def test_parse_line():
+    assert bulk_transfers.parse_line('abc.ai,12345') == ('abc.ai', '12345', )
+    assert bulk_transfers.parse_line(' abc.ai; 12345 ') == ('abc.ai', '12345', )
+    assert bulk_transfers.parse_line('abc.ai|12345') == ('abc.ai', '12345', )
+    assert bulk_transfers.parse_line('abc.ai 12345') == ('abc.ai', '12345', )
+    assert bulk_transfers.parse_line('abc.ai') is None
+    assert bulk_transfers.parse_line('abc.ai,') is None
+
+
+@pytest.mark.django_db
+@override_settings(ZENAIDA_REGISTRAR_ID='zenaida_registrar', ZENAIDA_AUCTION_REGISTRAR_ID='auction_registrar', ZENAIDA_DOMAIN_PRICE=100.0)
+@mock.patch('billing.orders.execute_order')
+@mock.patch('zen.zmaster.domain_read_info')
+def test_run_bulk_transfer(mock_domain_read_info, mock_execute_order):
+    old_owner = testsupport.prepare_tester_account(email='old_owner@zenaida.ai')
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai', account_balance=150.0)
+    for domain_name in ('first.ai', 'second.ai', 'third.ai', 'locked.ai', ):
+        testsupport.prepare_tester_domain(domain_name=domain_name, tester=old_owner, domain_status='active')
+    mock_domain_read_info.side_effect = lambda domain, auth_info, return_outputs: {
+        'first.ai': _domain_info('first.ai'),
+        'second.ai': _domain_info('second.ai'),
+        'third.ai': _domain_info('third.ai', registrar='zenaida_registrar'),
+        'locked.ai': _domain_info('locked.ai', statuses=['clientTransferProhibited', ]),
+    }[domain]
+    mock_execute_order.return_value = 'processing'
+    bulk_transfer = bulk_transfers.start_bulk_transfer(
+        new_owner,
+        'first.ai,12345\nsecond.ai,12345\nthird.ai,12345\nlocked.ai,12345\nunknown.ai,12345\nbad-line\n',
+    )
+    bulk_transfer = bulk_transfers.run_bulk_transfer(bulk_transfer, workers=1)
+    assert bulk_transfer.status == 'finished'
+    assert bulk_transfer.total_count == 6
+    assert bulk_transfer.processed_count == 6
+    assert bulk_transfer.succeeded_count == 2
+    assert bulk_transfer.failed_count == 4
+    results = {item.domain_name: (item.status, item.result, ) for item in bulk_transfer.items.all()}
+    assert results['first.ai'][0] == 'succeeded'
+    assert results['second.ai'] == ('failed', "account 'new_owner@zenaida.ai' does not have enough funds to complete domain transfer", )
+    assert results['third.ai'][0] == 'succeeded'
+    assert results['locked.ai'] == ('failed', 'transfer failed because domain was locked or auth code was wrong', )
+    assert results['unknown.ai'] == ('failed', 'domain does not exist', )
+    assert results[''] == ('failed', 'invalid input line', )
+    assert mock_execute_order.call_count == 2
+    report = bulk_transfers.build_report(bulk_transfer)
+    assert report.count('\n') == 6
+    assert report.count('[locked.ai] transfer failed')
+
+
+@pytest.mark.django_db
+@mock.patch('billing.orders.execute_order')
+def test_run_bulk_transfer_interrupted(mock_execute_order):
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai', account_balance=1000.0)
+    mock_execute_order.return_value = 'processing'
+    bulk_transfer = bulk_transfers.start_bulk_transfer(new_owner, 'ordered.ai,12345\nnot-ordered.ai,12345\n')
+    bulk_transfer.items.update(status='transferring', price=100.0)
+    testsupport.prepare_tester_order(domain_name='ordered.ai', order_type='domain_transfer', status='processing',
+                                     item_status='pending', started_at=timezone.now(), owner=new_owner)
+    bulk_transfer = bulk_transfers.run_bulk_transfer(bulk_transfer, workers=1)
+    assert bulk_transfer.status == 'finished'
+    assert bulk_transfer.succeeded_count == 2
+    results = {item.domain_name: (item.status, item.result, ) for item in bulk_transfer.items.all()}
+    assert results['ordered.ai'][0] == 'succeeded'
+    assert results['ordered.ai'][1].startswith('found ')
+    assert results['not-ordered.ai'][0] == 'succeeded'
+    assert results['not-ordered.ai'][1].startswith('created and executed ')
+    # transfer order was created again only for the item which was not ordered before
+    assert mock_execute_order.call_count == 1
+
+
+@pytest.mark.django_db
+def test_fail_stale_transfers():
+    new_owner = testsupport.prepare_tester_account(email='new_owner@zenaida.ai')
+    bulk_transfer = bulk_transfers.start_bulk_transfer(new_owner, 'first.ai,12345\n')
+    assert bulk_transfers.fail_stale_transfers(stale_minutes=30) == 0
+    BulkTransfer.transfers.filter(pk=bulk_transfer.pk).update(updated_at=timezone.now() - datetime.timedelta(minutes=31))
+    assert bulk_transfers.fail_stale_transfers(stale_minutes=30) == 1
+    bulk_transfer.refresh_from_db()
+    assert bulk_transfer.status == 'failed'
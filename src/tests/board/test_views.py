@@ -11,6 +11,8 @@ from billing import payments
 from tests import testsupport
 
 from board.models.csv_file_sync import CSVFileSync
+from board.models.bulk_transfer import BulkTransfer
+from logs.models import RequestLog
 
 
 class BaseAuthTesterMixin(object):
@@ -162,6 +164,55 @@ class TestFinancialReportView(BaseAuthTesterMixin, TestCase):
         assert response.context['total_registered_users'] == 1
         assert len(response.context['object_list']) == 2
 
+    def test_financial_result_totals_by_type(self):
+        testsupport.prepare_tester_order(
+            domain_name='test1.ai',
+            status='processed',
+            finished_at=datetime.datetime(2019, 1, 1, 1, 0, 0),
+            owner=self.account
+        )
+        testsupport.prepare_tester_order(
+            domain_name='test2.ai',
+            order_type='domain_renew',
+            status='processed',
+            finished_at=datetime.datetime(2019, 1, 2, 1, 0, 0),
+            owner=self.account
+        )
+        testsupport.prepare_tester_order(
+            domain_name='test3.ai',
+            status='cancelled',
+            finished_at=datetime.datetime(2019, 1, 3, 1, 0, 0),
+            owner=self.account
+        )
+        response = self.client.post('/board/financial-report/', data=dict(year=2019, month=1))
+        assert response.status_code == 200
+        assert response.context['summary']['totals_by_type'] == {
+            'domain_register': {'count': 1, 'amount': 100.0, },
+            'domain_renew': {'count': 1, 'amount': 100.0, },
+        }
+        assert response.context['total_items'] == 2
+
+    def test_financial_report_csv(self):
+        testsupport.prepare_tester_order(
+            domain_name='test1.ai',
+            status='processed',
+            finished_at=datetime.datetime(2019, 1, 1, 1, 0, 0),
+            owner=self.account
+        )
+        testsupport.prepare_tester_order(
+            domain_name='test2.ai',
+            status='processed',
+            finished_at=datetime.datetime(2019, 2, 1, 1, 0, 0),
+            owner=self.account
+        )
+        response = self.client.get('/board/financial-report/csv/?year=2019&month=1')
+        assert response.status_code == 200
+        assert response['Content-Disposition'] == 'attachment; filename=financial_report_2019_1.csv'
+        lines = b''.join(response.streaming_content).decode().strip().split('\r\n')
+        assert len(lines) == 2
+        assert lines[0] == 'finished_at,order_id,owner,type,domain_name,price,status'
+        assert 'test1.ai' in lines[1]
+
     @mock.patch('django.contrib.messages.error')
     def test_financial_result_access_denied_for_normal_user(self, mock_messages_error):
         self.account.is_staff = False
@@ -210,6 +261,17 @@ class TestNotExistingDomainSyncView(BaseAuthTesterMixin, TestCase):
         mock_messages_error.assert_called_once()
 
 
+class TestRequestLatencyReportView(BaseAuthTesterMixin, TestCase):
+
+    @pytest.mark.django_db
+    def test_report(self):
+        RequestLog.objects.create(method='GET', path='/domains/', path_full='/domains/', status_code=200, duration=0.3)
+        response = self.client.post('/board/request-latency/', data=dict(minutes=60, order_by='p95'))
+        assert response.status_code == 200
+        assert [r['path'] for r in response.context['object_list']] == ['/domains/', ]
+        assert response.context['object_list'][0]['p50'] == 0.5
+
+
 class TestCSVFileSyncView(BaseAuthTesterMixin, TestCase):
 
     @mock.patch('django.contrib.messages.error')
@@ -274,3 +336,39 @@ class TestSendingSingleEmailView(BaseAuthTesterMixin, TestCase):
         assert response.status_code == 302
         mock_messages_success.assert_called_once()
         mock_EmailMultiAlternatives.assert_called_once()
+
+
+class TestBulkTransferView(BaseAuthTesterMixin, TestCase):
+
+    @mock.patch('django.contrib.messages.warning')
+    def test_owner_not_exist(self, mock_messages_warning):
+        response = self.client.post('/board/bulk-transfer/', data=dict(new_owner='unknown@zenaida.ai', body='abc.ai,12345'))
+        assert response.status_code == 302
+        mock_messages_warning.assert_called_once()
+        assert BulkTransfer.transfers.count() == 0
+
+    @mock.patch('subprocess.Popen')
+    def test_started_in_background(self, mock_popen):
+        response = self.client.post('/board/bulk-transfer/', data=dict(
+            new_owner='tester@zenaida.ai',
+            body='abc.ai,12345\nbad-line\n\nxyz.ai 67890\n',
+        ))
+        bulk_transfer = BulkTransfer.transfers.latest('id')
+        assert response.status_code == 302
+        assert response.url == '/board/bulk-transfer/%d/' % bulk_transfer.id
+        popen_cmd = mock_popen.call_args_list[0][0][0]
+        assert popen_cmd.count('src/manage.py bulk_transfer')
+        assert popen_cmd.count('--record_id=%d' % bulk_transfer.id)
+        assert bulk_transfer.total_count == 3
+        assert bulk_transfer.processed_count == 1
+        assert bulk_transfer.failed_count == 1
+        assert [(i.domain_name, i.auth_code, i.status) for i in bulk_transfer.items.all()] == [
+            ('abc.ai', '12345', 'pending'),
+            ('', '', 'failed'),
+            ('xyz.ai', '67890', 'pending'),
+        ]
+        response = self.client.get('/board/bulk-transfer/%d/' % bulk_transfer.id)
+        assert response.status_code == 200
+        response = self.client.get('/board/bulk-transfer-result/%d/' % bulk_transfer.id)
+        assert response.status_code == 200
+        assert response.content.decode() == '[abc.ai] pending\n[] invalid input line\n[xyz.ai] pending\n'
@@ -1,4 +1,13 @@
 from django import setup
+from django.conf import settings
 
 def pytest_configure():
     setup()
+    # request logs are written right away during tests, background thread would keep own DB connection open
+    settings.REQUEST_LOG_BUFFER_ENABLED = False
+    # notifications are sent from the main thread during tests, worker threads would not see test transaction
+    settings.ZENAIDA_NOTIFICATIONS_WORKERS = 1
+    # domains are synchronized from the main thread during tests by the same reason
+    settings.ZENAIDA_CSV_IMPORT_WORKERS = 1
+    settings.ZENAIDA_BULK_TRANSFER_WORKERS = 1
+    settings.ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS = 1
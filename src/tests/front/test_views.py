@@ -13,6 +13,7 @@ from django.conf import settings
 from back.models import contact
 from back.models.contact import Contact, Registrant
 from back.models.domain import Domain
+from back.models.domain_refresh_request import DomainRefreshRequest
 from back.models.profile import Profile
 from back.models.zone import Zone
 from billing import orders as billing_orders
@@ -69,6 +70,31 @@ class TestAccountDomainsListView(BaseAuthTesterMixin, TestCase):
         assert response.status_code == 200
         assert len(response.context['object_list']) == 1
 
+    @mock.patch('zen.zmaster.domain_synchronize_from_backend')
+    @mock.patch('zen.zcontacts.list_contacts')
+    @mock.patch('back.models.profile.Profile.is_complete')
+    def test_domain_list_stale_domain_queued(self, mock_user_profile_complete, mock_list_contacts, mock_domain_synchronize_from_backend):
+        mock_user_profile_complete.return_value = True
+        mock_list_contacts.return_value = [mock.MagicMock(), mock.MagicMock()]
+        Domain.domains.create(
+            owner=self.account,
+            name='test.ai',
+            expiry_date=datetime.datetime(2099, 1, 1, tzinfo=pytz.UTC),
+            create_date=datetime.datetime(1970, 1, 1, tzinfo=pytz.UTC),
+            zone=Zone.zones.create(name='ai'),
+            epp_id='12345',
+        )
+        response = self.client.get('/domains/')
+        assert response.status_code == 200
+        assert response.context['refreshing_domains'] == ['test.ai', ]
+        mock_domain_synchronize_from_backend.assert_not_called()
+        response = self.client.get('/domains/')
+        assert response.status_code == 200
+        assert DomainRefreshRequest.refresh_requests.filter(domain_name='test.ai').count() == 1
+        response = self.client.get('/domains/refresh-status/')
+        assert response.status_code == 200
+        assert response.json() == {'refreshing': ['test.ai', ], 'failed': [], }
+
     @mock.patch('back.models.profile.Profile.is_complete')
     def test_profile_is_not_complete(self, mock_user_profile_complete):
         mock_user_profile_complete.return_value = False
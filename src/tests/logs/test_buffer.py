@@ -0,0 +1,43 @@
+import mock
+import pytest
+
+from logs.buffer import RequestLogBuffer
+from logs.models import RequestLog
+
+
+def _request_log(path):
+    return RequestLog(ip_address='127.0.0.1', method='GET', path=path, path_full=path, status_code=200, duration=0.01)
+
+
+@pytest.mark.django_db
+@mock.patch('logs.buffer.RequestLogBuffer.start')
+def test_flush_in_batches(mock_start):
+    buf = RequestLogBuffer(size=100, flush_records=3, flush_seconds=1)
+    for i in range(7):
+        buf.add(_request_log('/page/%d/' % i))
+    assert buf.wakeup.is_set()
+    assert RequestLog.objects.count() == 0
+    assert buf.flush() == 7
+    assert RequestLog.objects.count() == 7
+    assert buf.stats() == {'pending': 0, 'added': 7, 'flushed': 7, 'dropped': 0, }
+
+
+@mock.patch('logs.buffer.RequestLogBuffer.start')
+def test_oldest_records_dropped(mock_start):
+    buf = RequestLogBuffer(size=5, flush_records=100, flush_seconds=1)
+    for i in range(8):
+        buf.add(_request_log('/page/%d/' % i))
+    assert not buf.wakeup.is_set()
+    assert [r.path for r in buf.records] == ['/page/%d/' % i for i in range(3, 8)]
+    assert buf.stats()['dropped'] == 3
+
+
+@mock.patch('logs.buffer.RequestLogBuffer.start')
+@mock.patch('logs.models.RequestLog.objects.bulk_create')
+def test_failed_write_counted(mock_bulk_create, mock_start):
+    mock_bulk_create.side_effect = Exception('database is down')
+    buf = RequestLogBuffer(size=100, flush_records=2, flush_seconds=1)
+    for i in range(5):
+        buf.add(_request_log('/page/%d/' % i))
+    assert buf.flush() == 0
+    assert buf.stats() == {'pending': 3, 'added': 5, 'flushed': 0, 'dropped': 2, }
@@ -0,0 +1,57 @@
+import datetime
+import pytest
+
+from django.utils import timezone
+
+from logs import retention
+from logs.models import RequestLog, RequestLogHourly
+
+
+def _request_log(timestamp, path, duration, status_code=200):
+    return RequestLog.objects.create(
+        timestamp=timestamp, method='GET', path=path, path_full=path, status_code=status_code, duration=duration)
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert retention.percentile(values, 50) == 50.0
+    assert retention.percentile(values, 95) == 95.0
+    assert retention.percentile([0.5, ], 95) == 0.5
+    assert retention.percentile([], 50) == 0.0
+
+
+@pytest.mark.django_db
+def test_purge_with_rollup():
+    old_hour = retention.truncate_hour(timezone.now() - datetime.timedelta(days=10))
+    for i in range(10):
+        _request_log(old_hour + datetime.timedelta(minutes=i), '/domains/', duration=0.1 * (i + 1))
+    _request_log(old_hour + datetime.timedelta(minutes=30), '/domains/', duration=5.0, status_code=500)
+    _request_log(old_hour + datetime.timedelta(hours=2), '/contacts/', duration=0.2)
+    recent = _request_log(timezone.now(), '/domains/', duration=0.1)
+    deleted = retention.purge(before=timezone.now() - datetime.timedelta(days=1), batch_size=3, pause=0)
+    assert deleted == 12
+    assert list(RequestLog.objects.values_list('pk', flat=True)) == [recent.pk, ]
+    assert RequestLogHourly.objects.count() == 2
+    domains_hourly = RequestLogHourly.objects.get(hour=old_hour, path='/domains/')
+    assert domains_hourly.count == 11
+    assert domains_hourly.errors == 1
+    assert domains_hourly.duration_max == 5.0
+    assert round(domains_hourly.duration_p50, 3) == 0.6
+    contacts_hourly = RequestLogHourly.objects.get(path='/contacts/')
+    assert contacts_hourly.hour == old_hour + datetime.timedelta(hours=2)
+    assert contacts_hourly.count == 1
+    assert retention.purge(before=timezone.now() - datetime.timedelta(days=1)) == 0
+
+
+@pytest.mark.django_db
+def test_erase_old_records():
+    old_hour = retention.truncate_hour(timezone.now() - datetime.timedelta(days=2))
+    for i in range(5):
+        _request_log(old_hour + datetime.timedelta(minutes=i), '/domains/', duration=0.1)
+    _request_log(timezone.now() - datetime.timedelta(days=1), '/domains/', duration=0.1)
+    for i in range(3):
+        _request_log(timezone.now() - datetime.timedelta(seconds=i), '/domains/', duration=0.1)
+    # records within the same hour as the oldest kept record are not removed
+    assert RequestLog.erase_old_records(num_records=3) == (5, {'logs.RequestLog': 5, }, )
+    assert RequestLog.objects.count() == 4
+    assert RequestLogHourly.objects.get(hour=old_hour).count == 5
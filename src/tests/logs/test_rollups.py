@@ -0,0 +1,56 @@
+import datetime
+import pytest
+
+from django.utils import timezone
+
+from logs import rollups
+from logs.models import RequestLog, RequestLogMinutely
+
+
+def _request_log(timestamp, path, duration, status_code=200):
+    return RequestLog.objects.create(
+        timestamp=timestamp, method='GET', path=path, path_full=path, status_code=status_code, duration=duration)
+
+
+def test_histogram_percentile():
+    histogram = [0] * (len(rollups.HISTOGRAM_BOUNDS) + 1)
+    for duration in [0.003] * 90 + [0.2] * 9 + [100.0]:
+        histogram[rollups.bucket_index(duration)] += 1
+    assert rollups.histogram_percentile(histogram, 50) == 0.005
+    assert rollups.histogram_percentile(histogram, 95) == 0.25
+    assert rollups.histogram_percentile(histogram, 99) == 0.25
+    assert rollups.histogram_percentile(histogram, 100) == 30.0
+    assert rollups.histogram_percentile([0, 0, ], 50) == 0.0
+
+
+@pytest.mark.django_db
+def test_rollup_new_records_incremental():
+    minute = timezone.now().replace(second=0, microsecond=0) - datetime.timedelta(minutes=5)
+    for i in range(4):
+        _request_log(minute + datetime.timedelta(seconds=i), '/domains/', duration=0.02)
+    _request_log(minute + datetime.timedelta(seconds=10), '/domains/', duration=0.7, status_code=500)
+    _request_log(minute + datetime.timedelta(minutes=1), '/contacts/', duration=0.04)
+    assert rollups.rollup_new_records(batch_size=2) == 6
+    assert rollups.rollup_new_records() == 0
+    _request_log(minute + datetime.timedelta(seconds=20), '/domains/', duration=0.02)
+    assert rollups.rollup_new_records() == 1
+    assert RequestLogMinutely.objects.count() == 2
+    bucket = RequestLogMinutely.objects.get(minute=minute, path='/domains/')
+    assert bucket.count == 6
+    assert bucket.errors == 1
+    report = rollups.latency_report(minutes=60)
+    assert [r['path'] for r in report] == ['/domains/', '/contacts/', ]
+    assert report[0]['p50'] == 0.025
+    assert report[0]['p99'] == 1.0
+    assert round(report[0]['error_rate'], 3) == round(1 / 6.0, 3)
+
+
+@pytest.mark.django_db
+def test_rollup_new_records_limited():
+    minute = timezone.now().replace(second=0, microsecond=0) - datetime.timedelta(minutes=5)
+    for i in range(5):
+        _request_log(minute + datetime.timedelta(seconds=i), '/domains/', duration=0.02)
+    assert rollups.rollup_new_records(batch_size=2, max_batches=1) == 2
+    assert rollups.latency_report(minutes=60)[0]['count'] == 2
+    assert rollups.rollup_new_records(batch_size=2) == 3
+    assert rollups.latency_report(minutes=60)[0]['count'] == 5
@@ -0,0 +1,81 @@
+from django.http import HttpResponse
+from django.urls import include, path, re_path
+
+from logs import routes
+
+
+def _view(request, **kwargs):
+    return HttpResponse('OK')
+
+
+_nested_patterns = [
+    path('', _view),
+    path('edit/<int:contact_id>/', _view),
+]
+
+_urlpatterns = [
+    path('', _view),
+    path('domains/<str:domain_name>/transfer-code/', _view),
+    path('contacts/', include(_nested_patterns)),
+    re_path(r'^billing/order/(?P<order_id>\d+)/$', _view),
+    re_path(r'', include([path('account/two_factor/', _view), ])),
+]
+
+_short_paths = [
+    ('/contacts/edit/', None, '/contacts/edit/*', ),
+    ('/domains/', '/transfer-code/', '/domains/*/transfer-code/', ),
+    ('/billing/order/', None, '/billing/order/*', ),
+]
+
+
+def _matcher():
+    return routes.RouteMatcher(routes.extract_routes(_urlpatterns), ['/admin/', '/robots.txt', ], _short_paths)
+
+
+def test_extract_routes():
+    assert len(routes.extract_routes(_urlpatterns)) == 6
+
+
+def test_whitelisted():
+    matcher = _matcher()
+    assert matcher.match('/').whitelisted is True
+    assert matcher.match('/domains/abc.ai/transfer-code/').whitelisted is True
+    assert matcher.match('/contacts/').whitelisted is True
+    assert matcher.match('/contacts/edit/12/').whitelisted is True
+    assert matcher.match('/billing/order/34/').whitelisted is True
+    assert matcher.match('/account/two_factor/').whitelisted is True
+
+
+def test_not_whitelisted():
+    matcher = _matcher()
+    assert matcher.match('/contacts/edit/abc/').whitelisted is False
+    assert matcher.match('/billing/order/34/extra/').whitelisted is False
+    assert matcher.match('/not/existing/').whitelisted is False
+    assert matcher.match('contacts/').whitelisted is False
+    assert matcher.match('').whitelisted is False
+
+
+def test_ignored():
+    matcher = _matcher()
+    assert matcher.match('/admin/back/domain/') == routes.RouteMatch(True, False, '/admin/back/domain/')
+    assert matcher.match('/robots.txt').ignored is True
+    assert matcher.match('/contacts/').ignored is False
+
+
+def test_short_path():
+    matcher = _matcher()
+    assert matcher.match('/contacts/edit/12/').short_path == '/contacts/edit/*'
+    assert matcher.match('/domains/abc.ai/transfer-code/').short_path == '/domains/*/transfer-code/'
+    assert matcher.match('/billing/order/34/').short_path == '/billing/order/*'
+    assert matcher.short_path('/domains/abc.ai/') == '/domains/abc.ai/'
+    assert matcher.short_path('/contacts/') == '/contacts/'
+
+
+def test_short_path_first_match_wins():
+    matcher = routes.RouteMatcher([], [], [
+        ('/accounts/password/reset/', None, '/accounts/password/reset/', ),
+        ('/accounts/password/', None, '/accounts/password/*', ),
+    ])
+    assert matcher.short_path('/accounts/password/reset/abc/') == '/accounts/password/reset/'
+    assert matcher.short_path('/accounts/password/change/') == '/accounts/password/*'
+    assert matcher.match('/accounts/password/change/').whitelisted is False
@@ -0,0 +1,97 @@
+import time
+
+import mock
+import pytest
+
+import fakeredis
+from redis.exceptions import ConnectionError
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from rate_limit import rate_limiter_middleware
+
+
+# fake Redis server expires keys according to the clock, so all moments are close to the real time
+WINDOW_STARTED = int(time.time() // 60) * 60 + 60
+
+
+@pytest.fixture
+def rate_limiter(settings):
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_COUNT = 3
+    settings.RATE_LIMIT_WINDOW_SECONDS = 60
+    settings.RATE_LIMIT_TARGET_PATHS = [
+        ('POST', '/accounts/login'),
+        ('POST', '/lookup/', 1, 10, ),
+    ]
+    middleware = rate_limiter_middleware.RateLimiterMiddleware(lambda request: HttpResponse('OK'))
+    middleware.redis_client = rate_limiter_middleware.RedisClient(client=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    return middleware
+
+
+def _post(middleware, path, ip_address='1.2.3.4', moment=WINDOW_STARTED):
+    with mock.patch('rate_limit.rate_limiter_middleware.time.time', return_value=moment):
+        return middleware(RequestFactory().post(path, REMOTE_ADDR=ip_address))
+
+
+def test_limit_exceeded(rate_limiter):
+    for _ in range(3):
+        assert _post(rate_limiter, '/accounts/login/').status_code == 200
+    response = _post(rate_limiter, '/accounts/login/')
+    assert response.status_code == 429
+    assert response['Retry-After'] == '61'
+
+
+def test_other_ip_address_not_limited(rate_limiter):
+    for _ in range(4):
+        _post(rate_limiter, '/accounts/login/')
+    assert _post(rate_limiter, '/accounts/login/', ip_address='5.6.7.8').status_code == 200
+
+
+def test_not_target_path(rate_limiter):
+    for _ in range(5):
+        assert _post(rate_limiter, '/accounts/logout/').status_code == 200
+    assert rate_limiter.redis_client.client.keys() == []
+
+
+def test_disabled(rate_limiter):
+    rate_limiter.enabled = False
+    for _ in range(5):
+        assert _post(rate_limiter, '/accounts/login/').status_code == 200
+
+
+def test_per_endpoint_limit(rate_limiter):
+    assert _post(rate_limiter, '/lookup').status_code == 200
+    assert _post(rate_limiter, '/lookup').status_code == 429
+    assert _post(rate_limiter, '/accounts/login').status_code == 200
+    # the window of that end-point is only 10 seconds long
+    assert _post(rate_limiter, '/lookup', moment=WINDOW_STARTED + 20).status_code == 200
+
+
+def test_sliding_window(rate_limiter):
+    for _ in range(3):
+        assert _post(rate_limiter, '/accounts/login/', moment=WINDOW_STARTED + 30).status_code == 200
+    # at the middle of the next window half of the previous requests are still counted
+    assert _post(rate_limiter, '/accounts/login/', moment=WINDOW_STARTED + 90).status_code == 200
+    assert _post(rate_limiter, '/accounts/login/', moment=WINDOW_STARTED + 90).status_code == 429
+    current_key = 'rate_limit:POST:/accounts/login:1.2.3.4:%d' % ((WINDOW_STARTED + 90) // 60)
+    assert rate_limiter.redis_client.client.get(current_key) == b'2'
+
+
+def test_blocked_locally_without_redis(rate_limiter):
+    for _ in range(4):
+        _post(rate_limiter, '/accounts/login/')
+    with mock.patch.object(rate_limiter.redis_client, 'hit') as mock_hit:
+        assert _post(rate_limiter, '/accounts/login/', moment=WINDOW_STARTED + 30).status_code == 429
+        mock_hit.assert_not_called()
+        # local block expires at the end of the window
+        mock_hit.return_value = (0.0, 1, 0, )
+        assert _post(rate_limiter, '/accounts/login/', moment=WINDOW_STARTED + 61).status_code == 200
+        mock_hit.assert_called_once()
+
+
+def test_redis_errors_ignored(rate_limiter):
+    with mock.patch.object(rate_limiter.redis_client.client, 'pipeline', side_effect=ConnectionError('refused')):
+        for _ in range(5):
+            assert _post(rate_limiter, '/accounts/login/').status_code == 200
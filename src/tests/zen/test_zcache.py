@@ -0,0 +1,124 @@
+import mock
+import pytest
+
+from epp import rpc_error
+
+from zen import zcache
+from zen import zpoll
+
+
+def _contact_info_response(contact_id):
+    return {'epp': {'response': {'resData': {'infData': {'id': contact_id, 'email': '%s@zenaida.ai' % contact_id, }}}}}
+
+
+def _domain_info_response(domain_name, code='1000'):
+    return {'epp': {'response': {'result': {'@code': code, }, 'resData': {'infData': {'name': domain_name, }}}}}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    zcache.cache_clear()
+    yield
+    zcache.cache_clear()
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contacts_info_many_deduplicated(mock_cmd_contact_info):
+    mock_cmd_contact_info.side_effect = lambda contact_id, **kw: _contact_info_response(contact_id)
+    responses = zcache.contacts_info_many(['admin1', 'admin1', 'tech1', 'admin1', 'registrant1', ])
+    assert sorted(responses.keys()) == ['admin1', 'registrant1', 'tech1', ]
+    assert responses['tech1']['epp']['response']['resData']['infData']['id'] == 'tech1'
+    assert mock_cmd_contact_info.call_count == 3
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contacts_info_many_cached(mock_cmd_contact_info):
+    mock_cmd_contact_info.side_effect = lambda contact_id, **kw: _contact_info_response(contact_id)
+    for _ in range(10):
+        zcache.contacts_info_many(['admin1', 'billing1', 'registrant1', ])
+    assert mock_cmd_contact_info.call_count == 3
+    stats = zcache.cache_stats()['contact_info']
+    assert stats['size'] == 3
+    assert stats['hits'] == 27
+    assert zcache.invalidate_contact_info('ADMIN1') is True
+    zcache.contacts_info_many(['admin1', ])
+    assert mock_cmd_contact_info.call_count == 4
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contacts_info_many_error(mock_cmd_contact_info):
+    def _cmd_contact_info(contact_id, **kw):
+        if contact_id == 'tech1':
+            raise rpc_error.EPPAuthorizationError()
+        return _contact_info_response(contact_id)
+    mock_cmd_contact_info.side_effect = _cmd_contact_info
+    with pytest.raises(rpc_error.EPPError):
+        zcache.contacts_info_many(['admin1', 'tech1', 'registrant1', ])
+    assert zcache.cache_stats()['contact_info']['size'] == 2
+
+
+@mock.patch('epp.rpc_client.cmd_domain_info')
+def test_domain_info_cached_per_auth_info(mock_cmd_domain_info):
+    mock_cmd_domain_info.side_effect = lambda domain, **kw: _domain_info_response(domain)
+    assert zcache.domain_info('abc.ai')['epp']['response']['resData']['infData']['name'] == 'abc.ai'
+    zcache.domain_info('ABC.ai')
+    zcache.domain_info('abc.ai', auth_info='secret')
+    zcache.domain_info('abc.ai', auth_info='secret')
+    assert mock_cmd_domain_info.call_count == 2
+    assert zcache.cache_stats()['domain_info'] == {'size': 2, 'hits': 2, 'misses': 2, }
+    assert zcache.invalidate_domain_info('abc.ai') is True
+    assert zcache.cache_stats()['domain_info']['size'] == 0
+    zcache.domain_info('abc.ai')
+    assert mock_cmd_domain_info.call_count == 3
+
+
+@mock.patch('epp.rpc_client.cmd_domain_info')
+def test_domain_info_error_not_cached(mock_cmd_domain_info):
+    mock_cmd_domain_info.return_value = _domain_info_response('abc.ai', code='2303')
+    zcache.domain_info('abc.ai', raise_for_result=False)
+    zcache.domain_info('abc.ai', raise_for_result=False)
+    assert mock_cmd_domain_info.call_count == 2
+    assert zcache.cache_stats()['domain_info']['size'] == 0
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zpoll.handle_event')
+def test_poll_message_invalidates_domain_info(mock_handle_event):
+    mock_handle_event.return_value = True
+    with mock.patch('epp.rpc_client.cmd_domain_info') as mock_cmd_domain_info:
+        mock_cmd_domain_info.side_effect = lambda domain, **kw: _domain_info_response(domain)
+        zcache.domain_info('abc.ai')
+        req = {'epp': {'response': {'msgQ': {'@id': '1', 'msg': 'Delete Completed: abc.ai', }, }}}
+        zpoll.process_poll_message(zpoll.record_poll_message('1', req), req)
+        zcache.domain_info('abc.ai')
+    assert mock_cmd_domain_info.call_count == 2
+
+
+@mock.patch('epp.rpc_client.cmd_contact_info')
+def test_contacts_info_many_not_using_cache(mock_cmd_contact_info):
+    mock_cmd_contact_info.side_effect = lambda contact_id, **kw: _contact_info_response(contact_id)
+    zcache.contacts_info_many(['admin1', 'registrant1', ])
+    zcache.contacts_info_many(['admin1', 'registrant1', ], use_cache=False)
+    assert mock_cmd_contact_info.call_count == 4
+    # fresh responses are still stored in the cache
+    zcache.contacts_info_many(['admin1', 'registrant1', ])
+    assert mock_cmd_contact_info.call_count == 4
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zpoll.handle_event')
+def test_poll_message_invalidates_contact_info(mock_handle_event):
+    from tests import testsupport
+    mock_handle_event.return_value = True
+    testsupport.prepare_tester_domain(
+        domain_name='abc.ai',
+        epp_id_dict={'registrant': 'registrant1', 'admin': 'admin1', 'billing': 'billing1', 'tech': 'tech1', },
+    )
+    with mock.patch('epp.rpc_client.cmd_contact_info') as mock_cmd_contact_info:
+        mock_cmd_contact_info.side_effect = lambda contact_id, **kw: _contact_info_response(contact_id)
+        zcache.contacts_info_many(['admin1', 'tech1', 'registrant1', 'other1', ])
+        req = {'epp': {'response': {'msgQ': {'@id': '1', 'msg': 'Delete Completed: abc.ai', }, }}}
+        zpoll.process_poll_message(zpoll.record_poll_message('1', req), req)
+        assert zcache.cache_stats()['contact_info']['size'] == 1
+        zcache.contacts_info_many(['admin1', 'tech1', 'registrant1', 'other1', ])
+    assert mock_cmd_contact_info.call_count == 7
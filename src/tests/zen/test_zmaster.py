@@ -0,0 +1,133 @@
+import time
+import mock
+import pytest
+import datetime
+
+from django.utils import timezone
+
+from back.models.domain_refresh_request import DomainRefreshRequest
+from zen import zmaster
+
+from tests import testsupport
+
+
+def _domain_object(name, hours_ago=None):
+    domain_object = mock.MagicMock(
+        latest_sync_date=(timezone.now() - datetime.timedelta(hours=hours_ago)) if hours_ago is not None else None,
+    )
+    domain_object.name = name
+    return domain_object
+
+
+def test_domain_needs_quick_sync():
+    assert zmaster.domain_needs_quick_sync(_domain_object('abc.ai')) is True
+    assert zmaster.domain_needs_quick_sync(_domain_object('abc.ai', hours_ago=13), hours_passed=12) is True
+    assert zmaster.domain_needs_quick_sync(_domain_object('abc.ai', hours_ago=1), hours_passed=12) is False
+
+
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_quick_sync_concurrent(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.side_effect = lambda domain_name, **kwargs: (
+        [Exception('failed'), ] if domain_name == 'bad.ai' else ['ok', ])
+    domain_objects = [
+        _domain_object('abc.ai'),
+        _domain_object('bad.ai'),
+        _domain_object('fresh.ai', hours_ago=1),
+    ]
+    result = zmaster.domains_quick_sync_concurrent(domain_objects, hours_passed=12, deadline=5)
+    assert sorted(result['synchronized']) == ['abc.ai', ]
+    assert result['failed'] == ['bad.ai', ]
+    assert result['deferred'] == []
+    assert mock_domain_synchronize_from_backend.call_count == 2
+
+
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_quick_sync_concurrent_deadline(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.side_effect = lambda domain_name, **kwargs: time.sleep(0.5) or ['ok', ]
+    result = zmaster.domains_quick_sync_concurrent([_domain_object('slow.ai'), ], deadline=0.01)
+    assert result == {'synchronized': [], 'failed': [], 'deferred': ['slow.ai', ], }
+    time.sleep(1)
+    mock_domain_synchronize_from_backend.assert_called_once()
+    assert zmaster.quick_sync_capacity() == zmaster.settings.ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS
+
+
+@mock.patch('zen.zmaster._domains_refresh_finish')
+@mock.patch('zen.zmaster.domains_refresh_claim')
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_refresh_process_batch_concurrent(mock_domain_synchronize_from_backend, mock_domains_refresh_claim,
+                                                  mock_domains_refresh_finish, settings):
+    settings.ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS = 2
+    mock_domain_synchronize_from_backend.side_effect = lambda domain_name, **kwargs: (
+        [Exception('failed'), ] if domain_name == 'bad.ai' else ['ok', ])
+    mock_domains_refresh_claim.return_value = [
+        mock.MagicMock(id=1, domain_name='abc.ai'),
+        mock.MagicMock(id=2, domain_name='bad.ai'),
+    ]
+    result = zmaster.domains_refresh_process_batch(limit=2, deadline=5)
+    assert result == {'synchronized': ['abc.ai', ], 'failed': ['bad.ai', ], 'deferred': [], }
+    mock_domains_refresh_claim.assert_called_once_with(2)
+    assert sorted(c[0][0] for c in mock_domains_refresh_finish.call_args_list) == [1, 2, ]
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_refresh_process_batch(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abc.ai')
+    assert zmaster.domains_refresh_enqueue([tester_domain, ]) == ['abc.ai', ]
+    assert zmaster.domains_refresh_process_batch(limit=5) == {'synchronized': ['abc.ai', ], 'failed': [], 'deferred': [], }
+    assert DomainRefreshRequest.refresh_requests.get(domain_name='abc.ai').status == 'done'
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_refresh_process_next(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abc.ai')
+    assert zmaster.domains_refresh_enqueue([tester_domain, ]) == ['abc.ai', ]
+    assert zmaster.domains_refresh_enqueue([tester_domain, ]) == ['abc.ai', ]
+    assert DomainRefreshRequest.refresh_requests.count() == 1
+    assert zmaster.domains_refresh_list_active(owner=tester_domain.owner) == ['abc.ai', ]
+    refresh_request = zmaster.domains_refresh_process_next()
+    assert refresh_request.domain_name == 'abc.ai'
+    assert refresh_request.status == 'done'
+    assert zmaster.domains_refresh_process_next() is None
+    assert zmaster.domains_refresh_list_active(owner=tester_domain.owner) == []
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_refresh_process_next_sync_raised(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.side_effect = Exception('unexpected error')
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abc.ai')
+    assert zmaster.domains_refresh_enqueue([tester_domain, ]) == ['abc.ai', ]
+    assert zmaster.domains_refresh_process_next().status == 'failed'
+    refresh_request = DomainRefreshRequest.refresh_requests.get(domain_name='abc.ai')
+    assert refresh_request.status == 'failed'
+    assert refresh_request.finished is not None
+
+
+@pytest.mark.django_db
+def test_domains_refresh_enqueue_concurrent():
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abc.ai')
+    # another request added the same domain after the queue was checked for already queued domains
+    with mock.patch('zen.zmaster.domain_needs_quick_sync', return_value=True):
+        DomainRefreshRequest.refresh_requests.create(domain_name='abc.ai', owner=tester_domain.owner)
+        with mock.patch.object(DomainRefreshRequest.refresh_requests, 'filter') as mock_filter:
+            mock_filter.return_value.values_list.return_value = []
+            assert zmaster.domains_refresh_enqueue([tester_domain, ]) == ['abc.ai', ]
+    assert DomainRefreshRequest.refresh_requests.filter(status='pending').count() == 1
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domains_refresh_enqueue_skip_recently_failed(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.return_value = [Exception('back-end is down'), ]
+    tester_domain = testsupport.prepare_tester_domain(domain_name='abc.ai')
+    assert zmaster.domains_refresh_enqueue([tester_domain, ]) == ['abc.ai', ]
+    assert zmaster.domains_refresh_process_next().status == 'failed'
+    assert zmaster.domains_refresh_list_failed(owner=tester_domain.owner) == ['abc.ai', ]
+    assert zmaster.domains_refresh_enqueue([tester_domain, ]) == []
+    assert DomainRefreshRequest.refresh_requests.count() == 1
+    assert zmaster.domains_refresh_enqueue([tester_domain, ], retry_minutes=0) == ['abc.ai', ]
+    assert DomainRefreshRequest.refresh_requests.filter(status='pending').count() == 1
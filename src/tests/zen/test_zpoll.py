@@ -0,0 +1,186 @@
+import mock
+import pytest
+
+from back.models.poll_message import PollMessage
+from zen import zpoll
+from zen import zerrors
+
+
+def _poll_req(msg_id, msg_text):
+    return {'epp': {'response': {
+        'result': {'@code': '1301', },
+        'msgQ': {'@id': msg_id, 'msg': msg_text, },
+    }}}
+
+
+def _offline_update(domain_name, change, details):
+    return (
+        '<offlineUpdate><domain><name>%s</name><change>%s</change><details>%s</details></domain></offlineUpdate>' % (
+            domain_name, change, details, )
+    )
+
+
+def test_get_event_domain_plain_text():
+    assert zpoll.get_event_domain(_poll_req('1', 'Delete Completed: abc.ai')) == 'abc.ai'
+
+
+def test_get_event_domain_offline_update():
+    assert zpoll.get_event_domain(_poll_req('1', _offline_update('abc.ai', 'RENEWAL', 'domain renewed'))) == 'abc.ai'
+
+
+def test_get_event_domain_transfer_response():
+    req = {'epp': {'response': {'resData': {'trnData': {'name': 'ABC.ai', 'trStatus': 'serverApproved', }}}}}
+    assert zpoll.get_event_domain(req) == 'abc.ai'
+
+
+def test_get_event_domain_unknown():
+    assert zpoll.get_event_domain(_poll_req('1', 'Low balance alert')) == ''
+    assert zpoll.get_event_domain({}) == ''
+
+
+@pytest.mark.django_db
+def test_record_poll_message_only_once():
+    req = _poll_req('123', 'Delete Completed: abc.ai')
+    first = zpoll.record_poll_message('123', req)
+    second = zpoll.record_poll_message('123', req)
+    assert first.id == second.id
+    assert first.domain_name == 'abc.ai'
+    assert first.status == 'received'
+    assert PollMessage.messages.count() == 1
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zpoll.handle_event')
+def test_process_poll_message_failed(mock_handle_event):
+    mock_handle_event.side_effect = Exception('failed')
+    req = _poll_req('123', 'Delete Completed: abc.ai')
+    poll_message = zpoll.record_poll_message('123', req)
+    assert zpoll.process_poll_message(poll_message, req) is False
+    poll_message.refresh_from_db()
+    assert poll_message.status == 'failed'
+
+
+@mock.patch('zen.zpoll.process_poll_message')
+def test_workers_pool_keeps_domain_order(mock_process_poll_message):
+    processed = []
+    mock_process_poll_message.side_effect = lambda poll_message, req: processed.append(
+        (poll_message.domain_name, poll_message.msg_id, )) or True
+    pool = zpoll.PollWorkersPool(workers_count=3, queue_size=5)
+    pool.start()
+    for i in range(20):
+        pool.submit(PollMessage(msg_id=str(i), domain_name='domain%d.ai' % (i % 4)), {})
+    pool.stop()
+    assert len(processed) == 20
+    for n in range(4):
+        domain_messages = [int(msg_id) for domain_name, msg_id in processed if domain_name == 'domain%d.ai' % n]
+        assert domain_messages == sorted(domain_messages)
+    stats = pool.stats()
+    assert stats['submitted'] == 20
+    assert stats['processed'] == 20
+    assert stats['queue_depth'] == 0
+
+
+def test_coalescer_merges_flags():
+    coalescer = zpoll.DomainSyncCoalescer(window=10)
+    coalescer.add('abc.ai', refresh_contacts=False, change_owner_allowed=False)
+    coalescer.add('ABC.ai', contacts_changed=True)
+    coalescer.add('abc.ai', refresh_contacts=True, change_owner_allowed=False)
+    assert coalescer.list_due() == []
+    assert coalescer.list_due(force=True) == ['abc.ai', ]
+    entry = coalescer.pop('abc.ai')
+    assert entry['events'] == 3
+    assert entry['flags'] == {'refresh_contacts': True, 'change_owner_allowed': False, 'contacts_changed': True, }
+    assert coalescer.absorbed == 2
+    assert coalescer.pop('abc.ai') is None
+
+
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_coalesced_domain_sync_runs_once(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    with mock.patch('zen.zpoll._Coalescer', zpoll.DomainSyncCoalescer(window=10)):
+        assert zpoll.do_domain_status_changed('abc.ai') is True
+        assert zpoll.do_domain_nameservers_changed('abc.ai') is True
+        assert zpoll.do_domain_expiry_date_updated('abc.ai') is True
+        mock_domain_synchronize_from_backend.assert_not_called()
+        assert zpoll.flush_domain_sync('abc.ai') is True
+        assert zpoll.flush_domain_sync('abc.ai') is True
+    mock_domain_synchronize_from_backend.assert_called_once_with(
+        domain_name='abc.ai',
+        refresh_contacts=False,
+        rewrite_contacts=None,
+        change_owner_allowed=False,
+        create_new_owner_allowed=False,
+    )
+
+
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_domain_sync_without_coalescing(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    assert zpoll.do_domain_status_changed('abc.ai') is True
+    assert zpoll.do_domain_status_changed('abc.ai') is True
+    assert mock_domain_synchronize_from_backend.call_count == 2
+
+
+@pytest.mark.django_db
+@mock.patch('zen.zmaster.domain_synchronize_from_backend')
+def test_replay_poll_messages(mock_domain_synchronize_from_backend):
+    mock_domain_synchronize_from_backend.return_value = ['ok', ]
+    req1 = _poll_req('1', _offline_update('abc.ai', 'NAMESERVERS_CHANGED', 'domain nameservers changed'))
+    req2 = _poll_req('2', _offline_update('abc.ai', 'STATE_CHANGE', 'domain status updated'))
+    req3 = _poll_req('3', _offline_update('abc.ai', 'STATE_CHANGE', 'domain activated'))
+    zpoll.record_poll_message('1', req1)
+    zpoll.record_poll_message('2', req2)
+    zpoll.record_poll_message('3', req3)
+    PollMessage.messages.filter(msg_id='2').update(status='failed')
+    PollMessage.messages.filter(msg_id='3').update(status='processed')
+    report = zpoll.replay_poll_messages()
+    assert [(pm.msg_id, pm.status, result, ) for pm, result in report] == [
+        ('1', 'processed', True, ),
+        ('2', 'processed', True, ),
+    ]
+    mock_domain_synchronize_from_backend.assert_called_once()
+    poll_message = PollMessage.messages.get(msg_id='1')
+    assert poll_message.attempts == 1
+    assert poll_message.duration is not None
+    assert zpoll.replay_poll_messages() == []
+
+
+@pytest.mark.django_db
+def test_replay_poll_messages_poller_active():
+    zpoll.record_poll_message('1', _poll_req('1', _offline_update('abc.ai', 'STATE_CHANGE', 'domain status updated')))
+    zpoll.poller_heartbeat(force=True)
+    assert zpoll.poller_active() is True
+    with pytest.raises(zerrors.CommandInvalid):
+        zpoll.replay_poll_messages()
+    assert zpoll.replay_poll_messages(statuses=('failed', )) == []
+    zpoll.poller_stopped()
+    assert zpoll.poller_active() is False
+    assert len(zpoll.replay_poll_messages(dry_run=True)) == 1
+
+
+def test_match_queue_message_plain_text():
+    assert zpoll.match_queue_message('Delete Completed: ABC.ai') == (zpoll.do_domain_deleted, 'abc.ai', )
+    assert zpoll.match_queue_message('restore requested: abc.ai') == (zpoll.do_domain_restore_requested, 'abc.ai', )
+    assert zpoll.match_queue_message('Low balance alert') == (zpoll.do_admin_alert, 'Low balance alert', )
+
+
+def test_match_queue_message_offline_update():
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'TRANSFER', 'Domain transferred away')) == (
+        zpoll.do_domain_transfer_away, 'abc.ai', )
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'RENEWAL', 'anything')) == (
+        zpoll.do_domain_renewal, 'abc.ai', )
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'TRANSFER', 'Transfer rejected through UI')) == (
+        zpoll.do_domain_transfer_rejected, 'abc.ai', )
+    # message is only logged, but must not stay in the journal as failed
+    assert zpoll.do_domain_transfer_rejected('abc.ai') is True
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'STATE_CHANGE', 'status ADDPERIOD_GRACE removed')) == (
+        zpoll.do_skip, 'abc.ai', )
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'UNKNOWN', '')) == (
+        zpoll.do_domain_change_unknown, 'abc.ai', )
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'UNKNOWN', 'None')) == (
+        zpoll.do_domain_change_unknown, 'abc.ai', )
+
+
+def test_match_queue_message_unknown():
+    assert zpoll.match_queue_message(_offline_update('abc.ai', 'SOMETHING', 'else')) == (None, None, )
+    assert zpoll.match_queue_message('<notValidXML') == (None, None, )
@@ -0,0 +1,185 @@
+import copy
+import logging
+import threading
+import time
+
+from concurrent import futures
+
+from django.conf import settings
+
+from epp import rpc_client
+
+logger = logging.getLogger(__name__)
+
+
+class ResponsesCache(object):
+    """
+    Thread-safe in-memory storage of EPP responses with limited time-to-live.
+    Shared by all the automats running in the current process.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.items = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None or time.time() - item[0] > self.ttl:
+                self.items.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(item[1])
+
+    def set(self, key, response):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.items[key] = (time.time(), copy.deepcopy(response), )
+
+    def invalidate(self, name):
+        """
+        Removes all cached responses of given EPP object, keys are tuples where first item is the object name.
+        """
+        with self.lock:
+            keys = [key for key in self.items.keys() if key[0] == name]
+            for key in keys:
+                self.items.pop(key)
+            return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.items),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_DomainsInfo = ResponsesCache(ttl=settings.ZENAIDA_EPP_DOMAIN_INFO_CACHE_TTL_SECONDS)
+_ContactsInfo = ResponsesCache(ttl=settings.ZENAIDA_EPP_CONTACT_INFO_CACHE_TTL_SECONDS)
+
+
+def _result_code(response):
+    try:
+        return str(response['epp']['response']['result']['@code'])
+    except (KeyError, TypeError, ):
+        return None
+
+
+def domain_info(domain_name, auth_info=None, raise_for_result=True, request_time_limit=None):
+    """
+    Returns `domain_info` EPP response for given domain, fetched from the back-end or taken from the cache.
+    Responses are cached per domain name and auth_info, only successful responses are stored.
+    """
+    key = (domain_name.lower(), auth_info or '', )
+    response = _DomainsInfo.get(key)
+    if response is not None:
+        return response
+    kw = {}
+    if auth_info:
+        kw['auth_info'] = auth_info
+    if request_time_limit is not None:
+        kw['request_time_limit'] = request_time_limit
+    response = rpc_client.cmd_domain_info(
+        domain=domain_name,
+        raise_for_result=raise_for_result,
+        **kw,
+    )
+    if _result_code(response) == '1000':
+        _DomainsInfo.set(key, response)
+    return response
+
+
+def invalidate_domain_info(domain_name):
+    """
+    Removes all cached `domain_info` responses of given domain, must be called after the domain was modified
+    on the back-end or a poll message about the domain was received.
+    """
+    if not domain_name:
+        return False
+    return _DomainsInfo.invalidate(domain_name.lower()) > 0
+
+
+def contact_info(contact_id, request_time_limit=None, use_cache=True):
+    """
+    Returns `contact_info` EPP response for given contact, fetched from the back-end or taken from the cache.
+    When `use_cache=False` the response is always fetched from the back-end and stored in the cache.
+    Raises `rpc_error.EPPError` if the request failed.
+    """
+    key = (contact_id.lower(), )
+    if use_cache:
+        response = _ContactsInfo.get(key)
+        if response is not None:
+            return response
+    kw = {}
+    if request_time_limit is not None:
+        kw['request_time_limit'] = request_time_limit
+    response = rpc_client.cmd_contact_info(
+        contact_id=contact_id,
+        raise_for_result=True,
+        **kw,
+    )
+    _ContactsInfo.set(key, response)
+    return response
+
+
+def contacts_info_many(contact_ids, request_time_limit=None, workers=None, use_cache=True):
+    """
+    Returns dictionary with `contact_info` EPP responses for all given contact IDs.
+    Every unique contact ID is requested only once and requests are sent concurrently.
+    When `use_cache=False` cached responses are not used, see `contact_info()`.
+    Raises first `rpc_error.EPPError` happened, in the order of given contact IDs.
+    """
+    unique_ids = []
+    for contact_id in contact_ids:
+        if contact_id and contact_id not in unique_ids:
+            unique_ids.append(contact_id)
+    if not unique_ids:
+        return {}
+    if workers is None:
+        workers = settings.ZENAIDA_EPP_CONTACT_INFO_WORKERS
+    workers = max(1, min(workers, len(unique_ids)))
+    if workers == 1:
+        return {contact_id: contact_info(contact_id, request_time_limit=request_time_limit, use_cache=use_cache) for contact_id in unique_ids}
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = [
+            (contact_id, executor.submit(contact_info, contact_id, request_time_limit=request_time_limit, use_cache=use_cache), )
+            for contact_id in unique_ids
+        ]
+    # executor already waited for all requests to finish, errors are raised in the order of given IDs
+    return {contact_id: fut.result() for contact_id, fut in pending}
+
+
+def invalidate_contact_info(contact_id):
+    """
+    Removes cached `contact_info` response of given contact, must be called after the contact was modified.
+    """
+    if not contact_id:
+        return False
+    return _ContactsInfo.invalidate(contact_id.lower()) > 0
+
+
+def cache_stats():
+    """
+    Returns size and hit/miss counters of all EPP responses caches.
+    """
+    return {
+        'domain_info': _DomainsInfo.stats(),
+        'contact_info': _ContactsInfo.stats(),
+    }
+
+
+def cache_clear():
+    _DomainsInfo.clear()
+    _ContactsInfo.clear()
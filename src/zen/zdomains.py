@@ -277,7 +277,7 @@ def domain_change_owner(domain_object, new_owner, also_registrants=True, save=Tr
     return domain_object
 
 
-def domain_join_contact(domain_object, role, new_contact_object):
+def domain_join_contact(domain_object, role, new_contact_object, save=True):
     """
     Add/Change single contact with given role of that domain.
     This will only create a new relation, contact object must already exist.
@@ -287,19 +287,21 @@ def domain_join_contact(domain_object, role, new_contact_object):
         logger.info('domain %s contact "%s" was not modified', domain_object.name, role)
         return domain_object
     domain_object.set_contact(role, new_contact_object)
-    domain_object.save()
+    if save:
+        domain_object.save()
     logger.info('domain %r contact role %r modified : %r -> %r', domain_object.name, role, current_contact, new_contact_object)
     return domain_object
 
 
-def domain_detach_contact(domain_object, role):
+def domain_detach_contact(domain_object, role, save=True):
     """
     Remove given contact with given role from that domain.
     This will only remove existing relation, contact object is not removed.
     """
     current_contact = domain_object.get_contact(role)
     domain_object.set_contact(role, None)
-    domain_object.save()
+    if save:
+        domain_object.save()
     logger.info('domain %r contact role %r disconnected, previous was : %r', domain_object.name, role, current_contact)
     return domain_object
 
@@ -308,13 +310,14 @@ def domain_replace_contacts(domain_object, new_admin_contact=None, new_tech_cont
     """
     Detach all current contacts of the domain and attach new contacts as admin & tech roles if required.
     """
-    domain_object = domain_detach_contact(domain_object, 'admin')
-    domain_object = domain_detach_contact(domain_object, 'billing')
-    domain_object = domain_detach_contact(domain_object, 'tech')
+    domain_object = domain_detach_contact(domain_object, 'admin', save=False)
+    domain_object = domain_detach_contact(domain_object, 'billing', save=False)
+    domain_object = domain_detach_contact(domain_object, 'tech', save=False)
     if new_admin_contact is not None:
-        domain_object = domain_join_contact(domain_object, 'admin', new_admin_contact)
+        domain_object = domain_join_contact(domain_object, 'admin', new_admin_contact, save=False)
     if new_tech_contact is not None:
-        domain_object = domain_join_contact(domain_object, 'tech', new_tech_contact)
+        domain_object = domain_join_contact(domain_object, 'tech', new_tech_contact, save=False)
+    domain_object.save()
     return domain_object
 
 
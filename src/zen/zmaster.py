@@ -1,6 +1,10 @@
 import logging
 import datetime
+import threading
 
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import close_old_connections, connection, transaction
 from django.utils import timezone
 from django.conf import settings
 
@@ -16,9 +20,14 @@ from epp import rpc_client
 
 from zen import zerrors
 from zen import zdomains
+from zen import zcache
 
 logger = logging.getLogger(__name__)
 
+_QuickSyncExecutor = None
+_QuickSyncInFlight = 0
+_QuickSyncLock = threading.Lock()
+
 
 def contact_create_update(contact_object, raise_errors=False, log_events=True, log_transitions=True):
     """
@@ -78,16 +87,23 @@ def domains_check(domain_names, verify_registrant=False, raise_errors=False, log
     return outputs[-1]
 
 
+def domain_needs_quick_sync(domain_object, hours_passed=12):
+    """
+    Returns True if domain was never synchronized from back-end, or latest sync was more than `hours_passed` ago.
+    """
+    if not domain_object.latest_sync_date:
+        return True
+    sync_hours_ago = (timezone.now() - domain_object.latest_sync_date).total_seconds() / (60 * 60)
+    return sync_hours_ago > hours_passed
+
+
 def domains_quick_sync(domain_objects_list, hours_passed=12, request_time_limit=5, raise_errors=False, log_events=True, log_transitions=True):
     """
     Run domain_info EPP command for each domain object from the list to verify and update actual status from the back-end.
     """
     for domain_object in domain_objects_list:
-        sync_hours_ago = None
-        if domain_object.latest_sync_date:
-            sync_hours_ago = (timezone.now() - domain_object.latest_sync_date).total_seconds() / (60 * 60)
-        if sync_hours_ago is None or sync_hours_ago > hours_passed:
-            logger.info('starting domain sync for %r, latest sync was %r hours ago', domain_object, sync_hours_ago)
+        if domain_needs_quick_sync(domain_object, hours_passed=hours_passed):
+            logger.info('starting domain sync for %r, latest sync was at %r', domain_object, domain_object.latest_sync_date)
             domain_synchronize_from_backend(
                 domain_name=domain_object.name,
                 skip_check=True,
@@ -105,6 +121,305 @@ def domains_quick_sync(domain_objects_list, hours_passed=12, request_time_limit=
             )
 
 
+def _quick_sync_executor():
+    global _QuickSyncExecutor
+    if _QuickSyncExecutor is None:
+        _QuickSyncExecutor = ThreadPoolExecutor(
+            max_workers=settings.ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS,
+            thread_name_prefix='domains-quick-sync',
+        )
+    return _QuickSyncExecutor
+
+
+def quick_sync_capacity():
+    """
+    Returns number of threads of the shared quick sync pool which are not busy right now.
+    """
+    with _QuickSyncLock:
+        return max(0, settings.ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS - _QuickSyncInFlight)
+
+
+def _domain_quick_sync_in_thread(domain_name, request_time_limit, log_events, log_transitions, refresh_request_id=None):
+    global _QuickSyncInFlight
+    close_old_connections()
+    try:
+        try:
+            outputs = domain_synchronize_from_backend(
+                domain_name=domain_name,
+                skip_check=True,
+                refresh_contacts=False,
+                rewrite_contacts=None,
+                change_owner_allowed=False,
+                create_new_owner_allowed=False,
+                expected_owner=None,
+                soft_delete=True,
+                domain_transferred_away=False,
+                request_time_limit=request_time_limit,
+                raise_errors=False,
+                log_events=log_events,
+                log_transitions=log_transitions,
+            )
+        except Exception as exc:
+            logger.exception('concurrent domain sync for %r failed', domain_name)
+            outputs = [exc, ]
+        if refresh_request_id is not None:
+            # request is finished here, because the caller may stop waiting for the result after the deadline
+            _domains_refresh_finish(refresh_request_id, outputs)
+        return outputs
+    finally:
+        with _QuickSyncLock:
+            _QuickSyncInFlight -= 1
+        connection.close()
+
+
+def _quick_sync_submit(domain_name, request_time_limit, log_events, log_transitions, refresh_request_id=None):
+    global _QuickSyncInFlight
+    with _QuickSyncLock:
+        _QuickSyncInFlight += 1
+    return _quick_sync_executor().submit(
+        _domain_quick_sync_in_thread,
+        domain_name=domain_name,
+        request_time_limit=request_time_limit,
+        log_events=log_events,
+        log_transitions=log_transitions,
+        refresh_request_id=refresh_request_id,
+    )
+
+
+def _quick_sync_wait(futures, deadline):
+    result = {'synchronized': [], 'failed': [], 'deferred': [], }
+    if not futures:
+        return result
+    done, not_done = wait(futures.keys(), timeout=deadline)
+    for future in done:
+        outputs = None if future.exception() else future.result()
+        if not outputs or not outputs[-1] or isinstance(outputs[-1], Exception):
+            result['failed'].append(futures[future])
+        else:
+            result['synchronized'].append(futures[future])
+    for future in not_done:
+        result['deferred'].append(futures[future])
+    if result['deferred']:
+        logger.info('domains sync deferred to the background after %r seconds: %r', deadline, result['deferred'])
+    return result
+
+
+def domains_quick_sync_concurrent(domain_objects_list, hours_passed=12, request_time_limit=5, deadline=None,
+                                  log_events=True, log_transitions=True):
+    """
+    Same as `domains_quick_sync()`, but domains are synchronized concurrently by a shared bounded pool of threads.
+    Waits not more than `deadline` seconds for all results: domains which were not synchronized in time
+    are left in the background queue of the pool and will be finished after this method returns.
+    Returns dictionary with lists of domain names: "synchronized", "failed" and "deferred".
+    """
+    if deadline is None:
+        deadline = settings.ZENAIDA_DOMAINS_QUICK_SYNC_DEADLINE_SECONDS
+    futures = {}
+    for domain_object in domain_objects_list:
+        if not domain_needs_quick_sync(domain_object, hours_passed=hours_passed):
+            continue
+        logger.info('starting concurrent domain sync for %r, latest sync was at %r', domain_object, domain_object.latest_sync_date)
+        futures[_quick_sync_submit(
+            domain_name=domain_object.name,
+            request_time_limit=request_time_limit,
+            log_events=log_events,
+            log_transitions=log_transitions,
+        )] = domain_object.name
+    return _quick_sync_wait(futures, deadline)
+
+
+def domains_refresh_enqueue(domain_objects_list, hours_passed=12, retry_minutes=None):
+    """
+    Adds stale domains to the background refresh queue to be synchronized from back-end by `domains_refresh_worker`.
+    Domains which are already waiting in the queue or being processed right now are not added again.
+    Domains which failed to refresh during last `retry_minutes` are skipped, because `latest_sync_date`
+    is not updated when the back-end is not available.
+    Returns list of names of all domains from the list which are now waiting in the queue or being processed.
+    """
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    if retry_minutes is None:
+        retry_minutes = settings.ZENAIDA_DOMAINS_REFRESH_RETRY_MINUTES
+    stale_domains = {}
+    for domain_object in domain_objects_list:
+        if domain_needs_quick_sync(domain_object, hours_passed=hours_passed):
+            stale_domains[domain_object.name] = domain_object
+    if not stale_domains:
+        return []
+    recently_failed = set(DomainRefreshRequest.refresh_requests.filter(
+        domain_name__in=list(stale_domains.keys()),
+        status='failed',
+        finished__gte=timezone.now() - datetime.timedelta(minutes=retry_minutes),
+    ).values_list('domain_name', flat=True))
+    for domain_name in recently_failed:
+        stale_domains.pop(domain_name)
+    if not stale_domains:
+        return []
+    already_queued = set(DomainRefreshRequest.refresh_requests.filter(
+        domain_name__in=list(stale_domains.keys()),
+        status__in=['pending', 'in_progress', ],
+    ).values_list('domain_name', flat=True))
+    new_requests = [
+        DomainRefreshRequest(domain_name=domain_name, owner=domain_object.owner)
+        for domain_name, domain_object in stale_domains.items() if domain_name not in already_queued
+    ]
+    if new_requests:
+        # parallel requests can try to add the same domain at the same time, unique constraint keeps only one
+        DomainRefreshRequest.refresh_requests.bulk_create(new_requests, ignore_conflicts=True)
+        logger.info('added %d domains to the refresh queue', len(new_requests))
+    return list(stale_domains.keys())
+
+
+def domains_refresh_list_active(owner):
+    """
+    Returns names of domains of given account which are waiting in the refresh queue or being processed right now.
+    """
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    return list(DomainRefreshRequest.refresh_requests.filter(
+        owner=owner,
+        status__in=['pending', 'in_progress', ],
+    ).values_list('domain_name', flat=True).distinct())
+
+
+def domains_refresh_list_failed(owner, retry_minutes=None):
+    """
+    Returns names of domains of given account which failed to refresh during last `retry_minutes`.
+    """
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    if retry_minutes is None:
+        retry_minutes = settings.ZENAIDA_DOMAINS_REFRESH_RETRY_MINUTES
+    return list(DomainRefreshRequest.refresh_requests.filter(
+        owner=owner,
+        status='failed',
+        finished__gte=timezone.now() - datetime.timedelta(minutes=retry_minutes),
+    ).values_list('domain_name', flat=True).distinct())
+
+
+def domains_refresh_process_next(request_time_limit=10, log_events=True, log_transitions=True):
+    """
+    Takes the oldest pending request from the refresh queue and synchronize that domain from back-end.
+    Multiple workers can run in parallel, every request will be processed only once.
+    Returns processed request object or None if the queue is empty.
+    """
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    with transaction.atomic():
+        refresh_request = DomainRefreshRequest.refresh_requests.select_for_update(skip_locked=True).filter(
+            status='pending',
+        ).order_by('id').first()
+        if not refresh_request:
+            return None
+        refresh_request.status = 'in_progress'
+        refresh_request.started = timezone.now()
+        refresh_request.save()
+    try:
+        outputs = domain_synchronize_from_backend(
+            domain_name=refresh_request.domain_name,
+            skip_check=True,
+            refresh_contacts=False,
+            rewrite_contacts=None,
+            change_owner_allowed=False,
+            create_new_owner_allowed=False,
+            expected_owner=None,
+            soft_delete=True,
+            domain_transferred_away=False,
+            request_time_limit=request_time_limit,
+            raise_errors=False,
+            log_events=log_events,
+            log_transitions=log_transitions,
+        )
+    except Exception as exc:
+        logger.exception('failed to refresh domain %r', refresh_request.domain_name)
+        outputs = [exc, ]
+    if not outputs or not outputs[-1] or isinstance(outputs[-1], Exception):
+        refresh_request.status = 'failed'
+    else:
+        refresh_request.status = 'done'
+    refresh_request.finished = timezone.now()
+    refresh_request.save()
+    logger.info('processed %r', refresh_request)
+    return refresh_request
+
+
+def _domains_refresh_finish(refresh_request_id, outputs):
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    DomainRefreshRequest.refresh_requests.filter(id=refresh_request_id).update(
+        status='failed' if (not outputs or not outputs[-1] or isinstance(outputs[-1], Exception)) else 'done',
+        finished=timezone.now(),
+    )
+
+
+def domains_refresh_claim(limit):
+    """
+    Marks up to `limit` oldest pending requests from the refresh queue as "in_progress" and returns them.
+    Multiple workers can run in parallel, every request will be claimed only once.
+    """
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    if limit <= 0:
+        return []
+    with transaction.atomic():
+        refresh_requests = list(DomainRefreshRequest.refresh_requests.select_for_update(skip_locked=True).filter(
+            status='pending',
+        ).order_by('id')[:limit])
+        if refresh_requests:
+            DomainRefreshRequest.refresh_requests.filter(id__in=[r.id for r in refresh_requests]).update(
+                status='in_progress',
+                started=timezone.now(),
+            )
+    return refresh_requests
+
+
+def domains_refresh_process_batch(limit=None, request_time_limit=10, deadline=None, log_events=True, log_transitions=True):
+    """
+    Takes pending requests from the refresh queue, as many as there are free threads in the shared pool
+    of `domains_quick_sync_concurrent()`, and synchronize those domains concurrently.
+    Waits not more than `deadline` seconds, requests which were not finished in time are completed in the background.
+    When only one worker thread is configured requests are processed one by one in the current thread.
+    Returns dictionary with lists of domain names: "synchronized", "failed" and "deferred".
+    """
+    result = {'synchronized': [], 'failed': [], 'deferred': [], }
+    if settings.ZENAIDA_DOMAINS_QUICK_SYNC_WORKERS <= 1:
+        for _ in range(limit or 1):
+            refresh_request = domains_refresh_process_next(
+                request_time_limit=request_time_limit,
+                log_events=log_events,
+                log_transitions=log_transitions,
+            )
+            if not refresh_request:
+                break
+            result['synchronized' if refresh_request.status == 'done' else 'failed'].append(refresh_request.domain_name)
+        return result
+    if limit is None:
+        limit = quick_sync_capacity()
+    if deadline is None:
+        deadline = settings.ZENAIDA_DOMAINS_QUICK_SYNC_DEADLINE_SECONDS
+    futures = {}
+    for refresh_request in domains_refresh_claim(limit):
+        futures[_quick_sync_submit(
+            domain_name=refresh_request.domain_name,
+            request_time_limit=request_time_limit,
+            log_events=log_events,
+            log_transitions=log_transitions,
+            refresh_request_id=refresh_request.id,
+        )] = refresh_request.domain_name
+    return _quick_sync_wait(futures, deadline)
+
+
+def domains_refresh_cleanup(stuck_minutes=30, finished_hours=24):
+    """
+    Returns back to the queue requests which were started too long ago (for example worker was restarted)
+    and removes finished requests.
+    """
+    from back.models.domain_refresh_request import DomainRefreshRequest
+    moment_now = timezone.now()
+    DomainRefreshRequest.refresh_requests.filter(
+        status='in_progress',
+        started__lt=moment_now - datetime.timedelta(minutes=stuck_minutes),
+    ).update(status='pending', started=None)
+    DomainRefreshRequest.refresh_requests.filter(
+        status__in=['done', 'failed', ],
+        finished__lt=moment_now - datetime.timedelta(hours=finished_hours),
+    ).delete()
+
+
 def domain_check_create_update_renew(domain_object, sync_contacts=True, sync_nameservers=True, renew_years=None,
                                      new_domain_statuses=None, save_to_db=True,
                                      raise_errors=False, return_outputs=False, log_events=True, log_transitions=True):
@@ -472,6 +787,7 @@ def process_back_end_renew_notification(notification, domain_object):
                 domain=domain_object.name,
                 remove_statuses_list=[{'name': 'clientUpdateProhibited', }],
             )
+            zcache.invalidate_domain_info(domain_object.name)
         except rpc_error.EPPError as exc:
             logger.exception('domain %s failed to remove clientUpdateProhibited status: %r' % (domain_object, exc, ))
             notification.status = 'failed'
@@ -485,6 +801,7 @@ def process_back_end_renew_notification(notification, domain_object):
                 domain=domain_object.name,
                 remove_statuses_list=[{'name': 'clientDeleteProhibited', }],
             )
+            zcache.invalidate_domain_info(domain_object.name)
         except rpc_error.EPPError as exc:
             logger.exception('domain %s failed to remove clientDeleteProhibited status: %r' % (domain_object, exc, ))
             notification.status = 'failed'
@@ -493,6 +810,7 @@ def process_back_end_renew_notification(notification, domain_object):
             return False
     try:
         rpc_client.cmd_domain_delete(domain_object.name)
+        zcache.invalidate_domain_info(domain_object.name)
     except rpc_error.EPPError as exc:
         logger.exception('domain %s delete request failed: %r' % (domain_object, exc, ))
         notification.status = 'failed'
@@ -1,12 +1,16 @@
 #!/usr/bin/python
 
+import re
 import logging
-import json
 import time
 import datetime
+import queue
+import threading
+import zlib
 
-from lib import xml2json
+from xml.etree import ElementTree
 
+from django.db import close_old_connections, connection
 from django.utils import timezone
 from django.conf import settings
 
@@ -17,6 +21,8 @@ from epp import rpc_error
 
 from zen import zmaster
 from zen import zdomains
+from zen import zcache
+from zen import zerrors
 
 #------------------------------------------------------------------------------
 
@@ -24,13 +30,171 @@ logger = logging.getLogger(__name__)
 
 #------------------------------------------------------------------------------
 
-class XML2JsonOptions(object):
-    pretty = True
+_Coalescer = None
+_Current = threading.local()
+_LastHeartbeat = None
+
+#------------------------------------------------------------------------------
+
+class DomainSyncCoalescer(object):
+    """
+    Collects domain synchronization requests during a short time window and merges them together,
+    so a burst of poll messages related to the same domain results in a single synchronization
+    executed with the strongest combination of the requested flags.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.absorbed = 0
+
+    def add(self, domain, poll_message_id=None, **flags):
+        domain = domain.lower()
+        with self.lock:
+            entry = self.pending.get(domain)
+            if entry is None:
+                self.pending[domain] = {
+                    'flags': dict(flags),
+                    'events': 1,
+                    'started': time.time(),
+                    'scheduled': False,
+                    'messages': [poll_message_id, ] if poll_message_id else [],
+                }
+                return
+            for key, value in flags.items():
+                entry['flags'][key] = entry['flags'].get(key, False) or value
+            entry['events'] += 1
+            if poll_message_id:
+                entry['messages'].append(poll_message_id)
+            self.absorbed += 1
+
+    def pop(self, domain):
+        with self.lock:
+            return self.pending.pop(domain.lower(), None)
+
+    def list_due(self, force=False):
+        """
+        Returns names of the domains which window is already closed and not yet scheduled for synchronization.
+        """
+        result = []
+        with self.lock:
+            now = time.time()
+            for domain, entry in self.pending.items():
+                if entry['scheduled']:
+                    continue
+                if force or now - entry['started'] >= self.window:
+                    entry['scheduled'] = True
+                    result.append(domain)
+        return result
+
+#------------------------------------------------------------------------------
+
+def run_domain_sync(domain, refresh_contacts=False, change_owner_allowed=False, create_new_owner_allowed=False,
+                    contacts_changed=False, events=1):
+    """
+    Synchronize domain from back-end with given flags.
+    When `contacts_changed=True` contacts are first read from back-end, then written back and read again.
+    """
+    logger.info('domain %s synchronize started, %d event(s) absorbed', domain, events)
+    if contacts_changed:
+        return sync_domain_contacts(domain)
+    try:
+        outputs = zmaster.domain_synchronize_from_backend(
+            domain_name=domain,
+            refresh_contacts=refresh_contacts,
+            rewrite_contacts=None,
+            change_owner_allowed=change_owner_allowed,
+            create_new_owner_allowed=create_new_owner_allowed,
+        )
+    except rpc_error.EPPError:
+        logger.exception('failed to synchronize domain from back-end: %s' % domain)
+        return False
+    logger.info('outputs: %r', outputs)
+    return True
+
+
+def sync_domain_contacts(domain):
+    # step 1: read info from back-end and make changes in local DB
+    try:
+        outputs1 = zmaster.domain_synchronize_from_backend(
+            domain_name=domain,
+            refresh_contacts=True,
+            rewrite_contacts=False,
+            change_owner_allowed=True,
+            create_new_owner_allowed=True,
+        )
+    except rpc_error.EPPError:
+        logger.exception('failed to synchronize domain from back-end: %s' % domain)
+        return False
+    logger.info('outputs1: %r', outputs1)
+    # step 2: write changes to back-end
+    try:
+        outputs2 = zmaster.domain_synchronize_from_backend(
+            domain_name=domain,
+            refresh_contacts=False,
+            rewrite_contacts=True,
+            change_owner_allowed=False,
+        )
+    except rpc_error.EPPError:
+        logger.exception('failed to re-write domain info on back-end: %s' % domain)
+        return False
+    logger.info('outputs2: %r', outputs2)
+    # step 3: read again latest info from back-end and make sure all contacts are refreshed
+    try:
+        outputs3 = zmaster.domain_synchronize_from_backend(
+            domain_name=domain,
+            refresh_contacts=True,
+            rewrite_contacts=False,
+            change_owner_allowed=False,
+        )
+    except rpc_error.EPPError:
+        logger.exception('failed to synchronize domain contacts from back-end: %s' % domain)
+        return False
+    logger.info('outputs3: %r', outputs3)
+    return True
+
+
+def request_domain_sync(domain, **flags):
+    """
+    Synchronize domain from back-end right away, or if coalescing is enabled,
+    merge the request with other pending requests for the same domain and run it later only once.
+    """
+    if _Coalescer is None:
+        return run_domain_sync(domain, **flags)
+    current_poll_message = getattr(_Current, 'poll_message', None)
+    _Coalescer.add(domain, poll_message_id=current_poll_message.id if current_poll_message else None, **flags)
+    _Current.deferred = True
+    logger.info('domain %s synchronize requested with %r', domain, flags)
+    return True
+
+
+def flush_domain_sync(domain):
+    """
+    Executes pending coalesced synchronization for given domain if there is one.
+    """
+    if _Coalescer is None:
+        return True
+    entry = _Coalescer.pop(domain)
+    if not entry:
+        return True
+    started = time.time()
+    result = run_domain_sync(domain, events=entry['events'], **entry['flags'])
+    if entry['messages']:
+        from back.models.poll_message import PollMessage
+        PollMessage.messages.filter(id__in=entry['messages'], status='deferred').update(
+            status='processed' if result else 'failed',
+            processed=timezone.now(),
+            duration=time.time() - started,
+            error='' if result else 'domain synchronize failed',
+        )
+    return result
 
 #------------------------------------------------------------------------------
 
 def do_domain_transfer_in(domain):
     logger.info('domain %s transferred to Zenaida', domain)
+    flush_domain_sync(domain)
     try:
         outputs = zmaster.domain_synchronize_from_backend(
             domain_name=domain,
@@ -58,6 +222,7 @@ def do_domain_transfer_in(domain):
 
 def do_domain_transfer_away(domain, from_client=None, to_client=None, notify=False):
     logger.info('domain %s transferred away', domain)
+    flush_domain_sync(domain)
     try:
         outputs = zmaster.domain_synchronize_from_backend(
             domain_name=domain,
@@ -75,6 +240,7 @@ def do_domain_transfer_away(domain, from_client=None, to_client=None, notify=Fal
 
 def do_domain_deleted(domain, soft_delete=True, notify=False):
     logger.info('domain %s deleted', domain)
+    flush_domain_sync(domain)
     try:
         outputs = zmaster.domain_synchronize_from_backend(
             domain_name=domain,
@@ -91,21 +257,16 @@ def do_domain_deleted(domain, soft_delete=True, notify=False):
 
 def do_domain_status_changed(domain, notify=False):
     logger.info('domain %s status changed', domain)
-    try:
-        outputs = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=False,
-            change_owner_allowed=False,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain from back-end: %s' % domain)
-        return False
-    logger.info('outputs: %r', outputs)
-    return True
+    return request_domain_sync(
+        domain,
+        refresh_contacts=False,
+        change_owner_allowed=False,
+    )
 
 
 def do_domain_restored(domain, notify=False):
     logger.info('domain %s was restored', domain)
+    flush_domain_sync(domain)
     try:
         outputs = zmaster.domain_synchronize_from_backend(
             domain_name=domain,
@@ -123,6 +284,7 @@ def do_domain_restored(domain, notify=False):
 
 def do_domain_renewal(domain, ex_date=None, notify=False):
     logger.info('domain %s renewal', domain)
+    flush_domain_sync(domain)
     site_name = settings.SITE_BASE_URL.replace("https://","")
     if False:
         for admin_email in settings.ZENAIDA_ADMIN_NOTIFY_EMAILS:
@@ -203,109 +365,196 @@ def do_domain_renewal(domain, ex_date=None, notify=False):
 
 def do_domain_expiry_date_updated(domain):
     logger.info('domain %s expiry date updated', domain)
-    try:
-        outputs = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=False,
-            change_owner_allowed=False,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain from back-end: %s' % domain)
-        return False
-    logger.info('outputs: %r', outputs)
-    return True
+    return request_domain_sync(
+        domain,
+        refresh_contacts=False,
+        change_owner_allowed=False,
+    )
 
 
 def do_domain_create_date_updated(domain):
     logger.info('domain %s create date updated', domain)
-    try:
-        outputs = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=False,
-            change_owner_allowed=False,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain from back-end: %s' % domain)
-        return False
-    logger.info('outputs: %r', outputs)
-    return True
+    return request_domain_sync(
+        domain,
+        refresh_contacts=False,
+        change_owner_allowed=False,
+    )
 
 
 def do_domain_nameservers_changed(domain):
     logger.info('domain %s nameservers changed', domain)
-    try:
-        outputs = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=False,
-            change_owner_allowed=False,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain from back-end: %s' % domain)
-        return False
-    logger.info('outputs: %r', outputs)
-    return True
+    return request_domain_sync(
+        domain,
+        refresh_contacts=False,
+        change_owner_allowed=False,
+    )
 
 
 def do_domain_contacts_changed(domain):
     logger.info('domain %s contacts changed', domain)
-    # step 1: read info from back-end and make changes in local DB
-    try:
-        outputs1 = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=True,
-            rewrite_contacts=False,
-            change_owner_allowed=True,
-            create_new_owner_allowed=True,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain from back-end: %s' % domain)
-        return False
-    logger.info('outputs1: %r', outputs1)
-    # step 2: write changes to back-end
-    try:
-        outputs2 = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=False,
-            rewrite_contacts=True,
-            change_owner_allowed=False,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to re-write domain info on back-end: %s' % domain)
-        return False
-    logger.info('outputs2: %r', outputs2)
-    # step 3: read again latest info from back-end and make sure all contacts are refreshed
-    try:
-        outputs3 = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=True,
-            rewrite_contacts=False,
-            change_owner_allowed=False,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain contacts from back-end: %s' % domain)
-        return False
-    logger.info('outputs3: %r', outputs3)
-    return True
+    return request_domain_sync(
+        domain,
+        contacts_changed=True,
+    )
 
 
 def do_domain_change_unknown(domain):
     logger.info('domain %s change is unknown, doing hard-synchronize', domain)
-    try:
-        outputs = zmaster.domain_synchronize_from_backend(
-            domain_name=domain,
-            refresh_contacts=True,
-            rewrite_contacts=None,
-            change_owner_allowed=True,
-            create_new_owner_allowed=True,
-        )
-    except rpc_error.EPPError:
-        logger.exception('failed to synchronize domain from back-end: %s' % domain)
-        return False
-    logger.info('outputs: %r', outputs)
+    return request_domain_sync(
+        domain,
+        refresh_contacts=True,
+        change_owner_allowed=True,
+        create_new_owner_allowed=True,
+    )
+
+def do_admin_alert(msg_text):
+    site_name = settings.SITE_BASE_URL.replace("https://","")
+    for admin_email in settings.ZENAIDA_ADMIN_NOTIFY_EMAILS:
+        try:
+            send_email(
+                subject=f'{site_name}: Admin alert',
+                text_content=msg_text,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to_email=admin_email,
+            )
+        except:
+            logger.exception('alert EMAIL sending failed')
+    logger.warn(msg_text)
+    return True
+
+
+def do_domain_delete_requested(domain):
+    logger.info('received removal request for domain %r', domain)
+    return True
+
+
+def do_domain_restore_requested(domain):
+    logger.info('received restore request for domain %r', domain)
+    return True
+
+
+def do_domain_transfer_rejected(domain):
+    logger.info('domain %s transfer was rejected', domain)
+    return True
+
+
+def do_skip(domain):
+    logger.debug('SKIP message for domain %r', domain)
     return True
 
 #------------------------------------------------------------------------------
 
+# Plain-text poll messages in format "<prefix>: <domain name>"
+_PlainTextRules = {
+    'delete requested': do_domain_delete_requested,
+    'restore requested': do_domain_restore_requested,
+    'restore completed': do_domain_restored,
+    'delete completed': do_domain_deleted,
+    'pending delete': do_domain_deleted,
+}
+_PlainTextRegex = re.compile(r'(%s): (.*)' % '|'.join(_PlainTextRules.keys()), re.IGNORECASE | re.DOTALL)
+
+# "offlineUpdate" poll messages, keyed by (change, lowercase details), None matches any details
+_OfflineUpdateRules = {
+    ('TRANSFER', 'domain transferred away'): do_domain_transfer_away,
+    ('TRANSFER', 'domain transferred'): do_domain_transfer_in,
+    ('TRANSFER', 'transfer rejected through ui'): do_domain_transfer_rejected,
+    ('DELETION', 'domain deleted'): do_domain_deleted,
+    ('DELETION', 'domain pending delete'): do_domain_status_changed,
+    ('DELETION', 'domain pending deletion'): do_domain_status_changed,
+    ('RENEWAL', None): do_domain_renewal,
+    ('RESTORED', 'domain restored'): do_domain_status_changed,
+    ('RESTORED', 'domain restored via ui'): do_domain_status_changed,
+    ('STATE_CHANGE', 'domain status updated'): do_domain_status_changed,
+    ('STATE_CHANGE', 'domain activated'): do_domain_status_changed,
+    ('STATE_CHANGE', 'domain deleted'): do_domain_deleted,
+    ('EXCLUSION', 'domain excluded'): do_domain_status_changed,
+    ('SUSPENSION', 'domain suspended'): do_domain_status_changed,
+    ('DETAILS_CHANGED', 'domain expiry date updated'): do_domain_expiry_date_updated,
+    ('DETAILS_CHANGED', 'domain create date modified'): do_domain_create_date_updated,
+    ('CONTACTS_CHANGED', None): do_domain_contacts_changed,
+    ('NAMESERVERS_CHANGED', None): do_domain_nameservers_changed,
+    # TODO: found that when you change domain auth code directly on backend epp messages coming to Zenaida like that:
+    # {'offlineUpdate': {'domain': {'name': 'lala.ai', 'change': 'UNKNOWN', 'details': None}}}
+    # need to ask guys from COCCA about that...
+    # for now we can try to do a simple domain sync to at least try to solve the most issues
+    ('UNKNOWN', ''): do_domain_change_unknown,
+    ('UNKNOWN', 'none'): do_domain_change_unknown,
+}
+
+# "offlineUpdate" poll messages which details contain given text, checked when no exact rule was found
+_OfflineUpdateContainsRules = {
+    'STATE_CHANGE': (
+        ('addperiod_grace', do_skip, ),
+        ('redemption_period', do_skip, ),
+    ),
+    'UNKNOWN': (
+        ('domain epp statuses updated', do_domain_status_changed, ),
+    ),
+}
+
+#------------------------------------------------------------------------------
+
+def parse_plain_text_message(msg_text):
+    """
+    Returns tuple (prefix, domain name) for plain-text poll messages like "Delete Completed: abc.ai",
+    or None if given text is not recognized.
+    """
+    match = _PlainTextRegex.search(msg_text)
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2).strip().lower()
+
+
+def parse_offline_update(msg_text):
+    """
+    Reads "offlineUpdate" XML message directly into a dictionary with "name", "change" and "details" keys.
+    Returns None if given text is not a valid "offlineUpdate" message.
+    """
+    try:
+        root = ElementTree.fromstring(msg_text)
+    except ElementTree.ParseError:
+        return None
+    if root.tag.split('}')[-1] != 'offlineUpdate':
+        return None
+    info = {}
+    for domain_element in root:
+        if domain_element.tag.split('}')[-1] != 'domain':
+            continue
+        for element in domain_element:
+            info[element.tag.split('}')[-1]] = (element.text or '').strip()
+    if not info.get('name') or not info.get('change'):
+        return None
+    info.setdefault('details', '')
+    return info
+
+
+def match_queue_message(msg_text):
+    """
+    Finds a handler for given poll message text using pre-compiled rules, no handler is executed here.
+    Returns tuple (handler, argument) or (None, None) if message was not recognized.
+    """
+    msg_text_lower = msg_text.lower()
+    if 'alert' in msg_text_lower and 'balance' in msg_text_lower:
+        return do_admin_alert, msg_text
+    plain_text = parse_plain_text_message(msg_text)
+    if plain_text:
+        return _PlainTextRules[plain_text[0]], plain_text[1]
+    info = parse_offline_update(msg_text)
+    if not info:
+        return None, None
+    change = info['change']
+    details = info['details'].lower()
+    handler = _OfflineUpdateRules.get((change, details, )) or _OfflineUpdateRules.get((change, None, ))
+    if handler:
+        return handler, info['name']
+    for text, handler in _OfflineUpdateContainsRules.get(change, ()):
+        if text in details:
+            return handler, info['name']
+    return None, None
+
+#------------------------------------------------------------------------------
+
 def on_queue_response(resData):
     if 'trnData' in resData:
         try:
@@ -360,137 +609,12 @@ def on_queue_message(msgQ):
         logger.error('unexpected payload received: %r' % msgQ)
         return True
 
-    if msg_text.lower().count('alert') and msg_text.lower().count('balance'):
-        site_name = settings.SITE_BASE_URL.replace("https://","")
-        for admin_email in settings.ZENAIDA_ADMIN_NOTIFY_EMAILS:
-            try:
-                send_email(
-                    subject=f'{site_name}: Admin alert',
-                    text_content=msg_text,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to_email=admin_email,
-                )
-            except:
-                logger.exception('alert EMAIL sending failed')
-        logger.warn(msg_text)
-        return True
-
-    if msg_text.lower().count('delete requested: '):
-        domain = msg_text.lower().replace('delete requested: ', '')
-        logger.info('received removal request for domain %r', domain)
-        return True
-
-    if msg_text.lower().count('restore requested: '):
-        domain = msg_text.lower().replace('restore requested: ', '')
-        logger.info('received restore request for domain %r', domain)
-        return True
-
-    if msg_text.lower().count('restore completed: '):
-        domain = msg_text.lower().replace('restore completed: ', '')
-        logger.info('received restore completed notification for domain %r', domain)
-        return do_domain_restored(domain)
-
-    if msg_text.lower().count('delete completed: '):
-        domain = msg_text.lower().replace('delete completed: ', '')
-        logger.info('received delete completed notification for domain %r', domain)
-        return do_domain_deleted(domain)
-
-    if msg_text.lower().count('pending delete: '):
-        domain = msg_text.lower().replace('pending delete: ', '')
-        logger.info('received pending delete notification for domain %r', domain)
-        return do_domain_deleted(domain)
-
-    try:
-        json_input = json.loads(xml2json.xml2json(msg_text, XML2JsonOptions(), strip_ns=1, strip=1))
-    except:
-        logger.exception('can not process queue message: %s' % msgQ)
+    handler, arg = match_queue_message(msg_text)
+    if not handler:
+        logger.error('UNKNOWN poll message: %s' % msg_text)
         return False
 
-    if 'offlineUpdate' in json_input:
-        try:
-            domain = str(json_input['offlineUpdate']['domain']['name'])
-            change = str(json_input['offlineUpdate']['domain']['change'])
-            details = str(json_input['offlineUpdate']['domain']['details'])
-        except:
-            logger.exception('can not process queue json message: %s' % json_input)
-            return False
-
-        if change == 'TRANSFER':
-            if details.lower() == 'domain transferred away':
-                return do_domain_transfer_away(domain)
-
-            if details.lower() == 'domain transferred':
-                return do_domain_transfer_in(domain)
-
-            if details.lower() == 'transfer rejected through ui':
-                return False
-
-        if change == 'DELETION':
-            if details.lower() == 'domain deleted':
-                return do_domain_deleted(domain)
-            if details.lower() == 'domain pending delete' or details.lower() == 'domain pending deletion':
-                return do_domain_status_changed(domain)
-
-        if change == 'RENEWAL':
-            return do_domain_renewal(domain)
-
-        if change == 'RESTORED':
-            if details.lower() in ['domain restored', 'domain restored via ui', ]:
-                return do_domain_status_changed(domain)
-            # TODO: domain to be sync, check other scenarios ?
-
-        if change == 'STATE_CHANGE':
-            if details.lower() == 'domain status updated':
-                return do_domain_status_changed(domain)
-            if details.lower() == 'domain activated':
-                return do_domain_status_changed(domain)
-            # TODO: domain to be sync, check other scenarios ?
-
-        if change == 'EXCLUSION':
-            if details.lower() == 'domain excluded':
-                return do_domain_status_changed(domain)
-            # TODO: domain to be sync, check other scenarios ?
-
-        if change == 'SUSPENSION':
-            if details.lower() == 'domain suspended':
-                return do_domain_status_changed(domain)
-            # TODO: domain to be sync, check other scenarios ?
-
-        if change == 'DETAILS_CHANGED':
-            if details.lower() == 'domain expiry date updated':
-                return do_domain_expiry_date_updated(domain)
-            if details.lower() == 'domain create date modified':
-                return do_domain_create_date_updated(domain)
-            # TODO: domain to be sync, check other scenarios ?
-
-        if change == 'CONTACTS_CHANGED':
-            return do_domain_contacts_changed(domain)
-
-        if change == 'NAMESERVERS_CHANGED':
-            return do_domain_nameservers_changed(domain)
-
-        if change == 'STATE_CHANGE':
-            if details.lower() == 'domain deleted':
-                return do_domain_deleted(domain)
-            if details.lower().count('addperiod_grace'):
-                logger.debug('SKIP message: %r', json_input)
-                return True
-            if details.lower().count('redemption_period'):
-                logger.debug('SKIP message: %r', json_input)
-                return True
-
-        if change == 'UNKNOWN':
-            if details.lower().count('domain epp statuses updated'):
-                return do_domain_status_changed(domain)
-            # TODO: found that when you change domain auth code directly on backend epp messages coming to Zenaida like that:
-            # {'offlineUpdate': {'domain': {'name': 'lala.ai', 'change': 'UNKNOWN', 'details': None}}}
-            # need to ask guys from COCCA about that...
-            if not details or details.lower() == 'none':
-                # for now we can try to do a simple domain sync to at least try to solve the most issues
-                return do_domain_change_unknown(domain)
-
-    logger.error('UNKNOWN poll message: %s' % json_input)
-    return False
+    return handler(arg)
 
 
 def handle_event(req):
@@ -518,49 +642,376 @@ def handle_event(req):
 
 #------------------------------------------------------------------------------
 
-def main():
-    logger.info('polling loop started at %r', time.asctime())
-    while True:
-        result = False
-        while True:
-            try:
-                req = rpc_client.cmd_poll_req()
-                resp_code = str(req['epp']['response']['result']['@code'])
-            except:
-                logger.exception('ERROR in cmd_poll_req()')
-                break
-
-            if resp_code == '1300':
-                # No new messages
-                # logger.debug('.')
-                break
-
-            if resp_code != '1301':
-                logger.error('wrong response from EPP: %s', req)
-                break
-
+def get_event_domain(req):
+    """
+    Returns name of the domain given poll message is related to, or empty string if it was not recognized.
+    Used to keep messages for the same domain processed in the same order they were received.
+    """
+    try:
+        resp = req['epp']['response']
+    except:
+        return ''
+    res_data = resp.get('resData') or {}
+    for data_key in ('trnData', 'renData', ):
+        if data_key in res_data:
             try:
-                msg_id = req['epp']['response']['msgQ']['@id']
-                logger.info('msg_id: %r', msg_id)
-                rpc_client.cmd_poll_ack(msg_id)
+                return str(res_data[data_key]['name']).lower()
             except:
-                logger.exception('ERROR in cmd_poll_ack()')
+                return ''
+    try:
+        msg_element = resp['msgQ']['msg']
+    except:
+        return ''
+    if isinstance(msg_element, dict):
+        msg_text = msg_element.get('#text') or ''
+    else:
+        msg_text = str(msg_element or '')
+    plain_text = parse_plain_text_message(msg_text)
+    if plain_text:
+        return plain_text[1]
+    info = parse_offline_update(msg_text)
+    if info:
+        return info['name'].lower()
+    return ''
+
+
+def record_poll_message(msg_id, req):
+    """
+    Stores received poll message in the DB, so it can be safely acknowledged on the back-end.
+    If same message was already recorded before (for example ack was not delivered) existing record is returned.
+    """
+    from back.models.poll_message import PollMessage
+    poll_message, _ = PollMessage.messages.get_or_create(
+        msg_id=str(msg_id),
+        defaults=dict(
+            domain_name=get_event_domain(req),
+            payload=req,
+        ),
+    )
+    return poll_message
+
+
+def invalidate_cached_responses(domain_name):
+    """
+    Removes cached `domain_info` response of given domain and `contact_info` responses
+    of all contacts known for that domain in local DB.
+    """
+    zcache.invalidate_domain_info(domain_name)
+    if not domain_name:
+        return
+    domain_object = zdomains.domain_find(domain_name=domain_name)
+    if not domain_object:
+        return
+    for _, contact_object in domain_object.list_contacts(include_registrant=True):
+        if contact_object:
+            zcache.invalidate_contact_info(contact_object.epp_id)
+
+
+def process_poll_message(poll_message, req):
+    """
+    Executes `handle_event()` for given recorded poll message and stores the result, processing time
+    and error details in the journal.
+    If domain synchronization was postponed by the coalescer, message is marked as "deferred"
+    and will be updated later when synchronization is finished.
+    """
+    _Current.poll_message = poll_message
+    _Current.deferred = False
+    # domain was changed on the back-end, cached EPP responses are not valid anymore
+    invalidate_cached_responses(poll_message.domain_name)
+    error = ''
+    started = time.time()
+    try:
+        result = handle_event(req)
+    except Exception as exc:
+        logger.exception('ERROR in handle_event()')
+        error = repr(exc)
+        result = False
+    finally:
+        _Current.poll_message = None
+    if result:
+        poll_message.status = 'deferred' if _Current.deferred else 'processed'
+    else:
+        poll_message.status = 'failed'
+        error = error or 'poll message was not processed'
+    poll_message.processed = timezone.now()
+    poll_message.duration = time.time() - started
+    poll_message.attempts += 1
+    poll_message.error = error
+    poll_message.save(update_fields=['status', 'processed', 'duration', 'attempts', 'error', ])
+    return result
+
+
+def poller_heartbeat(force=False):
+    """
+    Marks polling loop as running, the DB record is updated not more often than once in 30 seconds.
+    """
+    global _LastHeartbeat
+    from back.models.task_checkpoint import TaskCheckpoint
+    if not force and _LastHeartbeat and time.time() - _LastHeartbeat < 30:
+        return
+    _LastHeartbeat = time.time()
+    TaskCheckpoint.checkpoints.update_or_create(name='epp_poll', defaults=dict(started=timezone.now(), finished=None))
+
+
+def poller_stopped():
+    global _LastHeartbeat
+    from back.models.task_checkpoint import TaskCheckpoint
+    _LastHeartbeat = None
+    TaskCheckpoint.checkpoints.filter(name='epp_poll').update(finished=timezone.now())
+
+
+def poller_active():
+    """
+    Returns True if polling loop was running recently and was not stopped.
+    """
+    from back.models.task_checkpoint import TaskCheckpoint
+    checkpoint = TaskCheckpoint.checkpoints.filter(name='epp_poll').first()
+    if not checkpoint or not checkpoint.started or checkpoint.finished:
+        return False
+    return timezone.now() - checkpoint.started < datetime.timedelta(seconds=settings.ZENAIDA_EPP_POLL_HEARTBEAT_TIMEOUT_SECONDS)
+
+
+def replay_poll_messages(statuses=('received', 'deferred', 'failed', ), limit=None, dry_run=False):
+    """
+    Process again journaled poll messages which were not processed yet, or failed to be processed.
+    Messages are executed in the same order they were received and domain synchronizations
+    requested by multiple messages of the same domain are merged and executed only once.
+    Already processed messages are never touched, so it is safe to run replay multiple times.
+    Messages in "received" and "deferred" state are owned by the running polling loop, so they
+    can not be replayed while it is active.
+    Returns list of tuples: (poll_message, result).
+    """
+    global _Coalescer
+    from back.models.poll_message import PollMessage
+    if not dry_run and set(statuses) & {'received', 'deferred', } and poller_active():
+        raise zerrors.CommandInvalid('polling loop is running, only failed messages can be replayed now')
+    poll_messages = PollMessage.messages.filter(status__in=statuses).order_by('id')
+    if limit:
+        poll_messages = poll_messages[:limit]
+    report = []
+    if dry_run:
+        return [(poll_message, None, ) for poll_message in poll_messages]
+    _Coalescer = DomainSyncCoalescer(window=0)
+    try:
+        for poll_message in poll_messages:
+            logger.info('replay %r', poll_message)
+            report.append((poll_message, process_poll_message(poll_message, poll_message.payload), ))
+        for domain in _Coalescer.list_due(force=True):
+            flush_domain_sync(domain)
+    finally:
+        _Coalescer = None
+    for poll_message, _ in report:
+        poll_message.refresh_from_db()
+    return report
+
+
+class PollWorkersPool(object):
+    """
+    Bounded pool of worker threads to process recorded poll messages.
+    Every domain is always assigned to the same worker, so messages related to one domain
+    are processed in the same order they were received from the back-end.
+    When all the queues are full `submit()` blocks and slows down the polling loop.
+    If `coalescer` is given, pending domain synchronizations are also executed by the worker
+    assigned to that domain as soon as the coalescing window is closed.
+    """
+
+    def __init__(self, workers_count, queue_size, coalescer=None):
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(max(1, workers_count))]
+        self.coalescer = coalescer
+        self.threads = []
+        self.scheduler = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.reported_at = time.time()
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.synchronized = 0
+
+    def start(self):
+        for index in range(len(self.queues)):
+            t = threading.Thread(target=self._worker, args=(index, ), name='zpoll-worker-%d' % index, daemon=True)
+            t.start()
+            self.threads.append(t)
+        if self.coalescer:
+            self.scheduler = threading.Thread(target=self._scheduler, name='zpoll-scheduler', daemon=True)
+            self.scheduler.start()
+        logger.info('started %d poll workers', len(self.threads))
+
+    def stop(self):
+        self.stopping.set()
+        if self.scheduler:
+            self.scheduler.join()
+            self.scheduler = None
+            self._schedule_due(force=True)
+        for q in self.queues:
+            q.put(None)
+        for t in self.threads:
+            t.join()
+        self.threads = []
+        logger.info('poll workers stopped, %r', self.stats())
+
+    def submit(self, poll_message, req):
+        self._queue(poll_message.domain_name).put(('message', poll_message, req, ))
+        with self.lock:
+            self.submitted += 1
+
+    def queue_depth(self):
+        return sum(q.qsize() for q in self.queues)
+
+    def stats(self):
+        with self.lock:
+            finished = self.processed + self.failed
+            duration = max(time.time() - self.started_at, 0.001)
+            return {
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'failed': self.failed,
+                'synchronized': self.synchronized,
+                'absorbed': self.coalescer.absorbed if self.coalescer else 0,
+                'queue_depth': self.queue_depth(),
+                'messages_per_minute': round(finished * 60.0 / duration, 2),
+            }
+
+    def report(self):
+        if time.time() - self.reported_at < settings.ZENAIDA_EPP_POLL_REPORT_INTERVAL_SECONDS:
+            return
+        self.reported_at = time.time()
+        logger.info('poll workers: %r, EPP cache: %r', self.stats(), zcache.cache_stats())
+
+    def _queue(self, domain):
+        return self.queues[zlib.crc32(domain.lower().encode()) % len(self.queues)]
+
+    def _schedule_due(self, force=False):
+        for domain in self.coalescer.list_due(force=force):
+            self._queue(domain).put(('sync', domain, None, ))
+
+    def _scheduler(self):
+        while not self.stopping.wait(1):
+            self._schedule_due()
+
+    def _worker(self, index):
+        q = self.queues[index]
+        while True:
+            item = q.get()
+            if item is None:
                 break
-
+            item_type, target, req = item
+            close_old_connections()
+            if item_type == 'sync':
+                try:
+                    flush_domain_sync(target)
+                except:
+                    logger.exception('ERROR in flush_domain_sync()')
+                with self.lock:
+                    self.synchronized += 1
+                continue
             try:
-                result = handle_event(req)
+                result = process_poll_message(target, req)
             except:
-                logger.exception('ERROR in handle_event()')
-                break
-
-            if result:
-                logger.debug('OK!')
-                break
-
-            logger.debug('NEXT?')
-
-        if not result:
-            time.sleep(settings.ZENAIDA_EPP_POLL_INTERVAL_SECONDS)
+                logger.exception('ERROR in process_poll_message()')
+                result = False
+            with self.lock:
+                if result:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+        connection.close()
+
+
+def main(drain=None, workers=None, queue_size=None, coalesce_window=None):
+    """
+    Polling loop, "listen" EPP notifications from the back-end.
+    In "drain" mode keeps reading messages while back-end responds with code 1301 and only sleeps
+    when the queue is empty. Every message is first stored in the DB, then acknowledged on the back-end
+    and passed to the pool of workers to be processed.
+    If `workers` is 0, messages are processed one by one in the polling loop.
+    Domain synchronizations requested during `coalesce_window` seconds are merged and executed only once.
+    """
+    global _Coalescer
+    if drain is None:
+        drain = settings.ZENAIDA_EPP_POLL_DRAIN_ENABLED
+    if workers is None:
+        workers = settings.ZENAIDA_EPP_POLL_WORKERS
+    if queue_size is None:
+        queue_size = settings.ZENAIDA_EPP_POLL_QUEUE_SIZE
+    if coalesce_window is None:
+        coalesce_window = settings.ZENAIDA_EPP_POLL_COALESCE_WINDOW_SECONDS
+    logger.info('polling loop started at %r, drain=%r workers=%r', time.asctime(), drain, workers)
+    pool = None
+    if workers > 0:
+        if coalesce_window > 0:
+            _Coalescer = DomainSyncCoalescer(window=coalesce_window)
+        pool = PollWorkersPool(workers_count=workers, queue_size=queue_size, coalescer=_Coalescer)
+        pool.start()
+    try:
+        while True:
+            result = False
+            while True:
+                poller_heartbeat()
+                try:
+                    req = rpc_client.cmd_poll_req()
+                    resp_code = str(req['epp']['response']['result']['@code'])
+                except:
+                    logger.exception('ERROR in cmd_poll_req()')
+                    break
+
+                if resp_code == '1300':
+                    # No new messages
+                    # logger.debug('.')
+                    break
+
+                if resp_code != '1301':
+                    logger.error('wrong response from EPP: %s', req)
+                    break
+
+                try:
+                    msg_id = req['epp']['response']['msgQ']['@id']
+                    logger.info('msg_id: %r', msg_id)
+                    poll_message = record_poll_message(msg_id, req)
+                except:
+                    logger.exception('ERROR in record_poll_message()')
+                    break
+
+                try:
+                    rpc_client.cmd_poll_ack(msg_id)
+                except:
+                    logger.exception('ERROR in cmd_poll_ack()')
+                    break
+
+                if poll_message.status != 'received':
+                    logger.info('%r was already handled before', poll_message)
+                    continue
+
+                if pool:
+                    pool.submit(poll_message, req)
+                    result = True
+                else:
+                    result = process_poll_message(poll_message, req)
+
+                if pool:
+                    pool.report()
+
+                if drain:
+                    continue
+
+                if result:
+                    logger.debug('OK!')
+                    break
+
+                logger.debug('NEXT?')
+
+            if pool:
+                pool.report()
+
+            if drain or not result:
+                time.sleep(settings.ZENAIDA_EPP_POLL_INTERVAL_SECONDS)
+    finally:
+        if pool:
+            pool.stop()
+        _Coalescer = None
+        poller_stopped()
 
 
 if __name__ == '__main__':